@@ -0,0 +1,171 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from functools import wraps
+
+from flask import Response, jsonify, request, stream_with_context, current_app
+from flask_login import current_user
+from sqlalchemy import select
+
+from models import db, Employee, JobOffer, Application
+from pagination import keyset_select, split_page
+
+
+# --- API de lectura (v1) ---
+# Listados en JSON paginados por cursor (el mismo keyset que /proyectow) y
+# exportaciones NDJSON / CSV en streaming. Las exportaciones piden columnas
+# sueltas, no objetos ORM, con yield_per (cursor del lado del servidor en
+# PostgreSQL) y las escriben por bloques desde un generador: la memoria del
+# worker no depende del número de filas. La conexión queda ocupada mientras
+# el cliente descarga.
+#
+# Cada recurso es una lista de (campo, columna); el orden es el de las
+# columnas del CSV.
+
+CAMPOS_OFERTA = (
+    ("id", JobOffer.offer_id),
+    ("titulo", JobOffer.title),
+    ("descripcion", JobOffer.description),
+    ("ubicacion", JobOffer.location),
+    ("presupuesto", JobOffer.salary),
+    ("estado", JobOffer.status),
+    ("fecha_publicacion", JobOffer.publish_date),
+)
+
+CAMPOS_POSTULACION = (
+    ("id", Application.application_id),
+    ("oferta_id", Application.offer_id),
+    ("oferta", JobOffer.title),
+    ("worker_id", Application.employee_id),
+    ("worker", Employee.name),
+    ("skills", Employee.skills),
+    ("estado", Application.status),
+    ("fecha", Application.application_date),
+)
+
+FORMATOS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def api_auth(user_type=None):
+    # Como login_required + boss_required, pero con 401/403 en JSON en vez de
+    # redirigir al formulario de login
+    def decorator(f):
+        @wraps(f)
+        def wrap(*args, **kwargs):
+            if not current_user.is_authenticated:
+                return jsonify({"error": "Se requiere iniciar sesión."}), 401
+            if user_type and current_user.user_type != user_type:
+                return jsonify({"error": "No tienes acceso a este recurso."}), 403
+            return f(*args, **kwargs)
+        return wrap
+    return decorator
+
+
+# --- Consultas: (select, columna de fecha, columna de id) para el keyset ---
+
+def ofertas_abiertas():
+    stmt = select(*(c for _, c in CAMPOS_OFERTA)).where(JobOffer.status == "open")
+    return stmt, JobOffer.publish_date, JobOffer.offer_id
+
+
+def ofertas_boss(boss_id):
+    stmt = select(*(c for _, c in CAMPOS_OFERTA)).where(JobOffer.boss_id == boss_id)
+    return stmt, JobOffer.publish_date, JobOffer.offer_id
+
+
+def postulaciones_boss(boss_id, offer_id=None):
+    stmt = (
+        select(*(c for _, c in CAMPOS_POSTULACION))
+        .select_from(Application)
+        .join(JobOffer, JobOffer.offer_id == Application.offer_id)
+        .outerjoin(Employee, Employee.employee_id == Application.employee_id)
+        .where(JobOffer.boss_id == boss_id)
+    )
+    if offer_id is not None:
+        stmt = stmt.where(Application.offer_id == offer_id)
+    return stmt, Application.application_date, Application.application_id
+
+
+# --- Serialización ---
+
+def _json_valor(valor):
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return str(valor)
+    return valor
+
+
+def _csv_valor(valor):
+    if valor is None:
+        return ""
+    # Evita que una hoja de cálculo interprete como fórmula un texto del usuario
+    # (también tras un tabulador o retorno de carro iniciales, que algunas ignoran)
+    if isinstance(valor, str) and valor[:1] in ("=", "+", "-", "@", "\t", "\r"):
+        return "'" + valor
+    return _json_valor(valor)
+
+
+def _fila_json(nombres, fila):
+    return {n: _json_valor(v) for n, v in zip(nombres, fila)}
+
+
+def pagina(consulta, campos):
+    stmt, fecha, id_col = consulta
+    limite = request.args.get("limite", current_app.config["API_POR_PAGINA"], type=int)
+    limite = min(max(limite, 1), current_app.config["API_MAX_POR_PAGINA"])
+    filas = db.session.execute(keyset_select(stmt, fecha, id_col, request.args.get("cursor"), limite)).all()
+    filas, next_cursor = split_page(filas, fecha, id_col, limite)
+    nombres = [n for n, _ in campos]
+    return jsonify({
+        "resultados": [_fila_json(nombres, f) for f in filas],
+        "cursor_siguiente": next_cursor
+    })
+
+
+def _lineas_ndjson(nombres, filas):
+    for fila in filas:
+        yield json.dumps(_fila_json(nombres, fila), ensure_ascii=False) + "\n"
+
+
+def _lineas_csv(nombres, filas):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(nombres)
+    for fila in filas:
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow([_csv_valor(v) for v in fila])
+    yield buffer.getvalue()
+
+
+def exportar(consulta, campos, formato, nombre):
+    stmt, fecha, id_col = consulta
+    lote = current_app.config["API_EXPORT_LOTE"]
+    stmt = stmt.order_by(fecha.desc(), id_col.desc()).execution_options(yield_per=lote)
+    nombres = [n for n, _ in campos]
+    lineas = _lineas_csv if formato == "csv" else _lineas_ndjson
+
+    def generar():
+        # Un trozo por lote: suficiente para que la compresión y la red
+        # trabajen con bloques grandes sin acumular el resultado entero
+        bloque = []
+        for linea in lineas(nombres, db.session.execute(stmt)):
+            bloque.append(linea)
+            if len(bloque) >= lote:
+                yield "".join(bloque)
+                bloque = []
+        if bloque:
+            yield "".join(bloque)
+
+    response = Response(stream_with_context(generar()), mimetype=FORMATOS[formato])
+    response.headers["Content-Disposition"] = (
+        f'attachment; filename="{nombre}-{datetime.now():%Y%m%d}.{formato}"'
+    )
+    return response
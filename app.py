@@ -1,28 +1,164 @@
-from flask import Flask, render_template, request, redirect, url_for, flash
-from config import SQLALCHEMY_DATABASE_URI, SECRET_KEY
-from models import db, User, Employee, Boss, JobOffer, Application
+from flask import Flask, render_template, request, redirect, url_for, flash, make_response, jsonify
+from config import (
+    SQLALCHEMY_DATABASE_URI, SECRET_KEY, PROYECTOS_POR_PAGINA, SLOW_QUERY_MS, METRICS_TOKEN, METRICS_ALLOW_IPS,
+    IDENTITY_CACHE_SIZE, IDENTITY_CACHE_TTL, CACHE_URL, CACHE_DEFAULT_TTL, ASSETS_AUTO_BUILD,
+    COMPRESS_MIN_SIZE, COMPRESS_LEVEL, COMPRESS_CACHE_BYTES,
+    PASSWORD_HASH_METHOD, PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE_LIMIT,
+    LOGIN_NEGATIVE_TTL, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING, DB_STATEMENT_TIMEOUT_MS, DB_PGBOUNCER, DATABASE_REPLICA_URLS,
+    REPLICA_STICKY_SECONDS, REPLICA_CHECK_INTERVAL, REPLICA_MAX_LAG_SECONDS,
+    MIGRATE_LOCK_TIMEOUT_MS, MIGRATE_RETRIES, MATCHING_SYNC_SECONDS,
+    API_POR_PAGINA, API_MAX_POR_PAGINA, API_EXPORT_LOTE,
+    EVENTOS_ENABLED, EVENTOS_BACKEND, EVENTOS_CANAL, SSE_HEARTBEAT_SECONDS, SSE_MAX_SECONDS,
+    JOBS_POLL_SECONDS, JOBS_LOTE, JOBS_VISIBILITY_SECONDS, JOBS_BACKOFF_BASE, JOBS_BACKOFF_MAX,
+    JOBS_PERIODO_EXPIRAR, JOBS_PERIODO_CONTADORES, JOBS_PERIODO_LIMPIEZA, JOBS_RETENCION_HORAS,
+    OFERTAS_EXPIRAN_DIAS,
+    RATELIMIT_ENABLED, RATELIMIT_URL, RATELIMIT_LOGIN_IP, RATELIMIT_LOGIN_CUENTA, RATELIMIT_REGISTRO_IP,
+    RATELIMIT_SOLICITUDES_USUARIO, RATELIMIT_SOLICITUDES_IP, PROXY_HOPS
+)
+from models import db, User, Employee, Boss, JobOffer, Application, Job
+from pagination import cursor_valido, keyset_page
+from search import search_offers
+from instrumentation import init_instrumentation
+from database import init_database, engine_options
+from replicas import init_replicas, read_only
+from identity import IdentityCache
+from cache import Cache, MemoryBackend, create_backend
+from assets import init_assets
+from compression import init_compression
+from conditional import (
+    conditional_get, version_ofertas_worker, version_ofertas_boss, version_postulaciones_worker,
+    version_postulaciones_boss, registrar_borrado
+)
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
+from passwords import PasswordHasher, HasherBusy
+from importer import import_users, read_rows, default_workers
+from application_actions import gestionar_postulaciones, rechazar_pendientes, tocar_ofertas, ACCIONES
+from seed import seed_database
+from migrate import migrate, estado, MigrationError
+from matching import MatchingEngine, ofertas_recomendadas, afinidad_postulantes, candidatos_recomendados
+from api import (
+    api_auth, pagina, exportar, ofertas_abiertas, ofertas_boss, postulaciones_boss,
+    CAMPOS_OFERTA, CAMPOS_POSTULACION
+)
+from events import init_eventos, publicar, canal_usuario, respuesta_sse
+from jobs import estado_cola, Worker
+import tasks  # registra las tareas de la cola
+from ratelimit import RateLimiter, create_buckets
+from werkzeug.middleware.proxy_fix import ProxyFix
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy import func, case, or_, exists, update
+from sqlalchemy.orm import joinedload, contains_eager
 from datetime import datetime
 from functools import wraps
+import click
+import signal
 
 def create_app():
     app = Flask(__name__)
     app.config["SQLALCHEMY_DATABASE_URI"] = SQLALCHEMY_DATABASE_URI
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
     app.config["SECRET_KEY"] = SECRET_KEY
+    app.config["DB_POOL_SIZE"] = DB_POOL_SIZE
+    app.config["DB_MAX_OVERFLOW"] = DB_MAX_OVERFLOW
+    app.config["DB_POOL_TIMEOUT"] = DB_POOL_TIMEOUT
+    app.config["DB_POOL_RECYCLE"] = DB_POOL_RECYCLE
+    app.config["DB_POOL_PRE_PING"] = DB_POOL_PRE_PING
+    app.config["DB_STATEMENT_TIMEOUT_MS"] = DB_STATEMENT_TIMEOUT_MS
+    app.config["DB_PGBOUNCER"] = DB_PGBOUNCER
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(SQLALCHEMY_DATABASE_URI, app.config)
+    app.config["SQLALCHEMY_BINDS"] = {
+        f"replica_{i}": {"url": url, **engine_options(url, app.config)}
+        for i, url in enumerate(DATABASE_REPLICA_URLS)
+    }
+    app.config["REPLICA_STICKY_SECONDS"] = REPLICA_STICKY_SECONDS
+    app.config["REPLICA_CHECK_INTERVAL"] = REPLICA_CHECK_INTERVAL
+    app.config["REPLICA_MAX_LAG_SECONDS"] = REPLICA_MAX_LAG_SECONDS
+    app.config["PROYECTOS_POR_PAGINA"] = PROYECTOS_POR_PAGINA
+    app.config["SLOW_QUERY_MS"] = SLOW_QUERY_MS
+    app.config["METRICS_TOKEN"] = METRICS_TOKEN
+    app.config["METRICS_ALLOW_IPS"] = METRICS_ALLOW_IPS
+    app.config["ASSETS_AUTO_BUILD"] = ASSETS_AUTO_BUILD
+    app.config["COMPRESS_MIN_SIZE"] = COMPRESS_MIN_SIZE
+    app.config["COMPRESS_LEVEL"] = COMPRESS_LEVEL
+    app.config["COMPRESS_CACHE_BYTES"] = COMPRESS_CACHE_BYTES
+    app.config["API_POR_PAGINA"] = API_POR_PAGINA
+    app.config["API_MAX_POR_PAGINA"] = API_MAX_POR_PAGINA
+    app.config["API_EXPORT_LOTE"] = API_EXPORT_LOTE
+    app.config["EVENTOS_ENABLED"] = EVENTOS_ENABLED
+    app.config["EVENTOS_BACKEND"] = EVENTOS_BACKEND
+    app.config["EVENTOS_CANAL"] = EVENTOS_CANAL
+    app.config["SSE_HEARTBEAT_SECONDS"] = SSE_HEARTBEAT_SECONDS
+    app.config["SSE_MAX_SECONDS"] = SSE_MAX_SECONDS
+    app.config["JOBS_PERIODO_EXPIRAR"] = JOBS_PERIODO_EXPIRAR
+    app.config["JOBS_PERIODO_CONTADORES"] = JOBS_PERIODO_CONTADORES
+    app.config["JOBS_PERIODO_LIMPIEZA"] = JOBS_PERIODO_LIMPIEZA
+    app.config["JOBS_RETENCION_HORAS"] = JOBS_RETENCION_HORAS
+    app.config["OFERTAS_EXPIRAN_DIAS"] = OFERTAS_EXPIRAN_DIAS
+    app.config["RATELIMIT_ENABLED"] = RATELIMIT_ENABLED
+
+    if PROXY_HOPS:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=PROXY_HOPS, x_proto=PROXY_HOPS)
 
     db.init_app(app)
+    metrics = init_instrumentation(app)
+    init_database(app, metrics)
+    init_replicas(app, db, list(app.config["SQLALCHEMY_BINDS"]))
+    init_assets(app)
+    init_compression(app)
+    eventos = init_eventos(app)
 
     login_manager = LoginManager()
     login_manager.login_view = "login"
     login_manager.init_app(app)
 
+    identity_cache = IdentityCache(maxsize=IDENTITY_CACHE_SIZE, ttl=IDENTITY_CACHE_TTL)
+    app.extensions["identity_cache"] = identity_cache
+    metrics.collectors.append(identity_cache.metrics_lines)
+
+    cache = Cache(create_backend(CACHE_URL), default_ttl=CACHE_DEFAULT_TTL)
+    app.extensions["cache"] = cache
+
+    hasher = PasswordHasher(
+        method=PASSWORD_HASH_METHOD,
+        workers=PASSWORD_HASH_WORKERS,
+        queue_limit=PASSWORD_HASH_QUEUE_LIMIT
+    )
+    app.extensions["password_hasher"] = hasher
+
+    matching = MatchingEngine(sync_seconds=MATCHING_SYNC_SECONDS)
+    app.extensions["matching"] = matching
+    metrics.collectors.append(matching.metrics_lines)
+
+    limiter = RateLimiter(create_buckets(RATELIMIT_URL))
+    app.extensions["limiter"] = limiter
+    metrics.collectors.append(limiter.metrics_lines)
+
+    # Respuesta cuando la cola de hashing está llena
+    def servidor_ocupado(plantilla):
+        flash("El servidor está ocupado, inténtalo de nuevo en unos segundos.", "warning")
+        response = make_response(render_template(plantilla), 503)
+        response.headers["Retry-After"] = "2"
+        return response
+
+    # Respuesta cuando se supera un límite de peticiones (el limitador pone
+    # el 429 y Retry-After)
+    def demasiados_intentos(plantilla):
+        def respuesta(espera):
+            flash(f"Demasiados intentos. Vuelve a probar en {espera} segundos.", "warning")
+            return make_response(render_template(plantilla))
+        return respuesta
+
+    def cuenta_login():
+        # Cuenta e IP: con sólo la cuenta cualquiera podría bloquear el
+        # acceso de otro usuario fallando a propósito con su email
+        email = request.form.get("email", "").strip().lower()
+        return f"{email}|{request.remote_addr}" if email else None
+
     @login_manager.user_loader
     def load_user(user_id):
         try:
-            return User.query.get(int(user_id))
+            return identity_cache.load(int(user_id))
         except Exception as e:
             app.logger.exception("load_user error: %s", e)
             return None
@@ -48,14 +184,17 @@ def create_app():
 
     # --- Rutas Públicas ---
     @app.route("/")
+    @cache.cached_response("publico", ttl=3600)
     def index():
         return render_template("index.html")
 
     @app.route("/quienessomos")
+    @cache.cached_response("publico", ttl=3600)
     def quienessomos():
         return render_template("quienessomos.html")
 
     @app.route("/porque")
+    @cache.cached_response("publico", ttl=3600)
     def porque():
         return render_template("porque.html")
 
@@ -73,6 +212,7 @@ def create_app():
         return render_template("registrob.html")
 
     @app.route("/registrar_worker", methods=["POST"])
+    @limiter.limit("registro_ip", RATELIMIT_REGISTRO_IP, respuesta=demasiados_intentos("registro.html"))
     def registrar_worker():
         nombre = request.form.get("nombre", "").strip()
         apellidos = request.form.get("apellidos", "").strip()
@@ -84,7 +224,10 @@ def create_app():
             flash("Completa todos los campos.", "danger")
             return redirect(url_for("registro"))
 
-        password_hash = generate_password_hash(password)
+        try:
+            password_hash = hasher.hash(password)
+        except HasherBusy:
+            return servidor_ocupado("registro.html")
         user = User(
             name=f"{nombre} {apellidos}",
             email=correo,
@@ -92,20 +235,10 @@ def create_app():
             user_type="employee"
         )
 
+        # Usuario y perfil en una sola transacción: el flush obtiene user_id
         try:
             db.session.add(user)
-            db.session.commit()
-        except IntegrityError:
-            db.session.rollback()
-            flash("El correo ya está registrado.", "danger")
-            return redirect(url_for("registro"))
-        except SQLAlchemyError as e:
-            db.session.rollback()
-            app.logger.exception("Error al crear usuario worker: %s", e)
-            flash("Error al crear usuario.", "danger")
-            return redirect(url_for("registro"))
-
-        try:
+            db.session.flush()
             employee = Employee(
                 user_id=user.user_id,
                 name=f"{nombre} {apellidos}",
@@ -115,21 +248,22 @@ def create_app():
             )
             db.session.add(employee)
             db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            flash("El correo ya está registrado.", "danger")
+            return redirect(url_for("registro"))
         except SQLAlchemyError as e:
             db.session.rollback()
-            app.logger.exception("Error al crear perfil employee: %s", e)
-            try:
-                db.session.delete(user)
-                db.session.commit()
-            except Exception:
-                db.session.rollback()
-            flash("Error al crear perfil de Worker.", "danger")
+            app.logger.exception("Error al crear usuario worker: %s", e)
+            flash("Error al crear usuario.", "danger")
             return redirect(url_for("registro"))
 
+        olvidar_login_negativo(correo, user.name)
         flash("Registro exitoso. Ya puedes iniciar sesión.", "success")
         return redirect(url_for("login"))
 
     @app.route("/registrar_boss", methods=["POST"])
+    @limiter.limit("registro_ip", RATELIMIT_REGISTRO_IP, respuesta=demasiados_intentos("registrob.html"))
     def registrar_boss():
         nombre = request.form.get("nombre", "").strip()
         apellidos = request.form.get("apellidos", "").strip()
@@ -143,7 +277,10 @@ def create_app():
             flash("Completa todos los campos.", "danger")
             return redirect(url_for("registrob"))
 
-        password_hash = generate_password_hash(password)
+        try:
+            password_hash = hasher.hash(password)
+        except HasherBusy:
+            return servidor_ocupado("registrob.html")
         user = User(
             name=f"{nombre} {apellidos}",
             email=correo,
@@ -151,20 +288,10 @@ def create_app():
             user_type="boss"
         )
 
+        # Usuario y perfil en una sola transacción: el flush obtiene user_id
         try:
             db.session.add(user)
-            db.session.commit()
-        except IntegrityError:
-            db.session.rollback()
-            flash("El correo ya está registrado.", "danger")
-            return redirect(url_for("registrob"))
-        except SQLAlchemyError as e:
-            db.session.rollback()
-            app.logger.exception("Error al crear usuario boss: %s", e)
-            flash("Error al crear usuario Boss.", "danger")
-            return redirect(url_for("registrob"))
-
-        try:
+            db.session.flush()
             boss = Boss(
                 user_id=user.user_id,
                 name=f"{nombre} {apellidos}",
@@ -174,21 +301,46 @@ def create_app():
             )
             db.session.add(boss)
             db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            flash("El correo ya está registrado.", "danger")
+            return redirect(url_for("registrob"))
         except SQLAlchemyError as e:
             db.session.rollback()
-            app.logger.exception("Error al crear boss profile: %s", e)
-            try:
-                db.session.delete(user)
-                db.session.commit()
-            except Exception:
-                db.session.rollback()
-            flash("Error al crear perfil Boss.", "danger")
+            app.logger.exception("Error al crear usuario boss: %s", e)
+            flash("Error al crear usuario Boss.", "danger")
             return redirect(url_for("registrob"))
 
+        olvidar_login_negativo(correo, user.name)
         flash("Registro Boss completo.", "success")
         return redirect(url_for("login"))
 
+    # --- Búsqueda de usuario para login ---
+    # Una sola consulta por correo o nombre (índices en email y lower(name));
+    # los identificadores inexistentes se recuerdan un rato en la caché.
+    def buscar_usuario_login(identificador):
+        if cache.get("login_negativo", identificador) is not None:
+            return None
+        user = (
+            User.query
+            .filter(or_(User.email == identificador, func.lower(User.name) == identificador))
+            .order_by(case((User.email == identificador, 0), else_=1))
+            .first()
+        )
+        if user is None:
+            cache.set("login_negativo", identificador, b"1", LOGIN_NEGATIVE_TTL)
+        return user
+
+    def olvidar_login_negativo(*identificadores):
+        for identificador in identificadores:
+            if identificador:
+                cache.delete("login_negativo", identificador.strip().lower())
+
     @app.route("/login", methods=["GET", "POST"])
+    @limiter.limit("login_ip", RATELIMIT_LOGIN_IP, respuesta=demasiados_intentos("login.html"))
+    # Por cuenta desde una IP: más estricto que login_ip para adivinar la
+    # contraseña de una cuenta concreta
+    @limiter.limit("login_cuenta", RATELIMIT_LOGIN_CUENTA, por=cuenta_login, respuesta=demasiados_intentos("login.html"))
     def login():
         if current_user.is_authenticated:
             if getattr(current_user, "user_type", None) == 'boss':
@@ -207,11 +359,22 @@ def create_app():
             flash("Completa los campos de login.", "warning")
             return redirect(url_for("login"))
 
-        user = User.query.filter_by(email=email).first()
-        if not user:
-            user = User.query.filter_by(name=email).first()
+        user = buscar_usuario_login(email)
 
-        if not user or not check_password_hash(user.password_hash, password):
+        try:
+            valida = user is not None and hasher.verify(user.password_hash, password)
+            # Hash con parámetros antiguos: se rehace con los actuales
+            if valida and hasher.needs_rehash(user.password_hash):
+                user.password_hash = hasher.hash(password)
+                try:
+                    db.session.commit()
+                except SQLAlchemyError as e:
+                    db.session.rollback()
+                    app.logger.exception("Error al actualizar hash de contraseña: %s", e)
+        except HasherBusy:
+            return servidor_ocupado("login.html")
+
+        if not valida:
             flash("Credenciales incorrectas.", "danger")
             return redirect(url_for("login"))
 
@@ -225,6 +388,7 @@ def create_app():
     @app.route("/logout")
     @login_required
     def logout():
+        identity_cache.invalidate(current_user.user_id)
         logout_user()
         flash("Sesión cerrada.", "info")
         return redirect(url_for("login")) 
@@ -234,8 +398,9 @@ def create_app():
     @app.route("/perfilb")
     @login_required
     @boss_required
+    @read_only
     def perfilb():
-        boss_obj = Boss.query.filter_by(user_id=current_user.user_id).first()
+        boss_obj = Boss.query.options(joinedload(Boss.user)).filter_by(boss_id=current_user.boss_id).first()
         if not boss_obj:
             flash("Perfil Boss no encontrado.", "warning")
             return redirect(url_for("index"))
@@ -254,7 +419,7 @@ def create_app():
     @login_required
     @boss_required
     def editar_perfil_boss():
-        boss = Boss.query.filter_by(user_id=current_user.user_id).first()
+        boss = Boss.query.options(joinedload(Boss.user)).filter_by(boss_id=current_user.boss_id).first()
         
         if request.method == "POST":
             boss.name = request.form.get("nombre")
@@ -263,10 +428,12 @@ def create_app():
             boss.phone = request.form.get("telefono")
             
             # Actualizamos también el nombre en la tabla User para coherencia
-            current_user.name = request.form.get("nombre")
+            boss.user.name = request.form.get("nombre")
             
             try:
                 db.session.commit()
+                identity_cache.invalidate(current_user.user_id)
+                olvidar_login_negativo(boss.user.name)
                 flash("Perfil actualizado correctamente.", "success")
                 return redirect(url_for("perfilb"))
             except Exception:
@@ -278,34 +445,46 @@ def create_app():
     @app.route("/proyectob")
     @login_required
     @boss_required
+    @read_only
+    @conditional_get(lambda: version_ofertas_boss(current_user.boss_id))
     def proyectob():
-        boss_obj = Boss.query.filter_by(user_id=current_user.user_id).first()
-        if not boss_obj:
+        boss_id = current_user.boss_id
+        if not boss_id:
             flash("Perfil Boss no encontrado.", "warning")
             return redirect(url_for("index"))
 
-        all_jobs = JobOffer.query.filter_by(boss_id=boss_obj.boss_id).order_by(JobOffer.publish_date.desc()).all()
+        # Conteo de postulaciones desnormalizado (se actualiza al escribir)
+        # y "completado" con un EXISTS por oferta, sin agrupar Application.
+        completado = exists().where(
+            Application.offer_id == JobOffer.offer_id, Application.status == 'completed'
+        )
+        all_jobs = (
+            db.session.query(
+                JobOffer.offer_id,
+                JobOffer.title,
+                JobOffer.description,
+                JobOffer.publish_date,
+                JobOffer.applications_count.label("postulaciones"),
+                completado.label("completado")
+            )
+            .filter(JobOffer.boss_id == boss_id)
+            .order_by(JobOffer.publish_date.desc())
+            .all()
+        )
 
         activos = []
         finalizados = []
 
         for p in all_jobs:
-            es_completado = False
-            if p.applications:
-                for app in p.applications:
-                    if app.status == 'completed':
-                        es_completado = True
-                        break
-            
             datos_proyecto = {
                 "id": p.offer_id,
                 "titulo": p.title,
                 "descripcion": p.description,
                 "fecha_limite": p.publish_date.strftime('%Y-%m-%d'),
-                "postulaciones": len(p.applications) if p.applications else 0
+                "postulaciones": p.postulaciones
             }
 
-            if es_completado:
+            if p.completado:
                 finalizados.append(datos_proyecto)
             else:
                 activos.append(datos_proyecto)
@@ -324,14 +503,13 @@ def create_app():
         ubicacion = request.form.get("ubicacion")
         presupuesto = request.form.get("presupuesto")
 
-        boss = Boss.query.filter_by(user_id=current_user.user_id).first()
-        if not boss:
+        if not current_user.boss_id:
             flash("Perfil Boss no encontrado.", "warning")
             return redirect(url_for("index"))
 
         try:
             project = JobOffer(
-                boss_id=boss.boss_id,
+                boss_id=current_user.boss_id,
                 title=titulo,
                 description=descripcion,
                 salary=float(presupuesto) if presupuesto else None,
@@ -340,7 +518,12 @@ def create_app():
                 publish_date=datetime.now()
             )
             db.session.add(project)
+            db.session.flush()
+            # Tras el commit los atributos caducan: leerlos sería otra consulta
+            offer_id = project.offer_id
             db.session.commit()
+            cache.invalidate("proyectos")
+            matching.indexar_oferta(offer_id, titulo, descripcion, "open")
             flash("Proyecto creado.", "success")
         except SQLAlchemyError as e:
             db.session.rollback()
@@ -355,21 +538,31 @@ def create_app():
     def detallesolicitud(id):
         job = JobOffer.query.get_or_404(id)
         
-        boss_obj = Boss.query.filter_by(user_id=current_user.user_id).first()
-        if not boss_obj or job.boss_id != boss_obj.boss_id:
+        if not current_user.boss_id or job.boss_id != current_user.boss_id:
              flash("Acceso denegado.", "danger")
              return redirect(url_for("proyectob"))
 
-        postulaciones_q = Application.query.filter_by(offer_id=job.offer_id).all()
+        postulaciones_q = (
+            Application.query
+            .filter_by(offer_id=job.offer_id)
+            .options(joinedload(Application.employee))
+            .order_by(Application.application_id)
+            .all()
+        )
+        # Postulantes ordenados por afinidad con la oferta
+        afinidad = afinidad_postulantes(job, [a.employee_id for a in postulaciones_q])
         postulaciones = []
         for a in postulaciones_q:
-            emp = Employee.query.get(a.employee_id)
+            emp = a.employee
             postulaciones.append({
                 "id": a.application_id,
                 "worker": emp.name if emp else "N/A",
                 "status": a.status,
-                "fecha": a.application_date.strftime('%Y-%m-%d')
+                "fecha": a.application_date.strftime('%Y-%m-%d'),
+                "afinidad": afinidad.get(a.employee_id, 0)
             })
+        postulaciones.sort(key=lambda p: -p["afinidad"])
+        candidatos = candidatos_recomendados(job, excluir=[a.employee_id for a in postulaciones_q])
         solicitud = {
             "id": job.offer_id, 
             "proyecto": job.title,
@@ -378,7 +571,9 @@ def create_app():
             "fecha_entrega": job.publish_date.strftime('%Y-%m-%d'),
             "presupuesto": job.salary
         }
-        return render_template("detallesolicitud.html", solicitud=solicitud, postulaciones=postulaciones)
+        return render_template(
+            "detallesolicitud.html", solicitud=solicitud, postulaciones=postulaciones, candidatos=candidatos
+        )
 
     # NUEVA RUTA: Editar Proyecto
     @app.route("/editar_proyecto/<int:id>", methods=["GET", "POST"])
@@ -386,9 +581,8 @@ def create_app():
     @boss_required
     def editar_proyecto(id):
         job = JobOffer.query.get_or_404(id)
-        boss = Boss.query.filter_by(user_id=current_user.user_id).first()
         
-        if job.boss_id != boss.boss_id:
+        if job.boss_id != current_user.boss_id:
             flash("No tienes permiso para editar este proyecto.", "danger")
             return redirect(url_for("proyectob"))
 
@@ -401,6 +595,8 @@ def create_app():
                 job.salary = float(presupuesto)
             
             db.session.commit()
+            cache.invalidate("proyectos")
+            matching.actualizar_oferta(job)
             flash("Proyecto actualizado correctamente.", "success")
             return redirect(url_for("detallesolicitud", id=job.offer_id))
 
@@ -412,15 +608,17 @@ def create_app():
     @boss_required
     def eliminar_proyecto(id):
         job = JobOffer.query.get_or_404(id)
-        boss = Boss.query.filter_by(user_id=current_user.user_id).first()
 
-        if job.boss_id != boss.boss_id:
+        if job.boss_id != current_user.boss_id:
             flash("No tienes permiso para eliminar este proyecto.", "danger")
             return redirect(url_for("proyectob"))
 
         try:
             db.session.delete(job)
+            registrar_borrado()
             db.session.commit()
+            cache.invalidate("proyectos")
+            matching.eliminar_oferta(id)
             flash("Proyecto eliminado.", "success")
         except Exception:
             db.session.rollback()
@@ -438,29 +636,88 @@ def create_app():
         application = Application.query.get_or_404(int(app_id))
         job = JobOffer.query.get(application.offer_id)
         
-        boss = Boss.query.filter_by(user_id=current_user.user_id).first()
-        if job.boss_id != boss.boss_id:
+        if job.boss_id != current_user.boss_id:
             flash("No tienes permiso.", "danger")
             return redirect(url_for("proyectob"))
 
         if accion == 'aceptar':
             application.status = 'accepted'
             job.status = 'closed' 
+            db.session.flush()
+            # El resto de candidatos se rechazan aquí mismo; los avisos, en segundo plano
+            rechazar_pendientes([job.offer_id])
             flash(f"Candidato aceptado. Ahora aparecerá en sus trabajos pendientes.", "success")
         elif accion == 'rechazar':
             application.status = 'rejected'
             flash("Candidato rechazado.", "info")
 
+        if accion in ACCIONES:
+            tocar_ofertas([job.offer_id])
+            publicar(
+                db.session, "worker", application.employee_id, "postulacion",
+                postulacion=application.application_id, oferta=job.title, estado=application.status
+            )
         db.session.commit()
+        cache.invalidate("proyectos")
+        matching.actualizar_oferta(job)
         return redirect(url_for('detallesolicitud', id=job.offer_id))
 
+    # Acepta/rechaza varias postulaciones de una vez. Admite JSON
+    # ({"accion": "rechazar", "ids": [1, 2]}) o el formulario de detallesolicitud.
+    @app.route("/gestionar_solicitudes", methods=["POST"])
+    @login_required
+    @boss_required
+    def gestionar_solicitudes():
+        if request.is_json:
+            datos = request.get_json(silent=True) or {}
+            accion = datos.get("accion")
+            ids_raw = datos.get("ids") or []
+        else:
+            accion = request.form.get("accion")
+            ids_raw = request.form.getlist("app_ids")
+
+        try:
+            ids = [int(i) for i in ids_raw] if isinstance(ids_raw, list) else None
+        except (TypeError, ValueError):
+            ids = None
+
+        if accion not in ACCIONES or ids is None:
+            if request.is_json:
+                return jsonify({"error": "Se requiere 'accion' (aceptar|rechazar) y una lista de 'ids' numéricos."}), 400
+            flash("Solicitud no válida.", "danger")
+            return redirect(url_for("proyectob"))
+
+        try:
+            resultados = gestionar_postulaciones(current_user.boss_id, ids, accion)
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            app.logger.exception("Error en gestión masiva de postulaciones: %s", e)
+            if request.is_json:
+                return jsonify({"error": "Error al actualizar las postulaciones."}), 500
+            flash("Error al actualizar las postulaciones.", "danger")
+            return redirect(url_for("proyectob"))
+
+        if accion == "aceptar" and "accepted" in resultados.values():
+            cache.invalidate("proyectos")
+
+        if request.is_json:
+            return jsonify({"resultados": {str(k): v for k, v in resultados.items()}})
+
+        cambiadas = sum(1 for v in resultados.values() if v in ("accepted", "rejected"))
+        flash(f"{cambiadas} postulaciones actualizadas.", "success" if cambiadas else "info")
+        destino = request.form.get("offer_id", type=int)
+        if destino:
+            return redirect(url_for("detallesolicitud", id=destino))
+        return redirect(url_for("solicitudes"))
+
     # --- RUTAS DE WORKER ---
 
     @app.route("/perfilw")
     @login_required
     @worker_required
+    @read_only
     def perfilw():
-        worker_obj = Employee.query.filter_by(user_id=current_user.user_id).first()
+        worker_obj = Employee.query.options(joinedload(Employee.user)).filter_by(employee_id=current_user.employee_id).first()
         if not worker_obj:
             return redirect(url_for("index"))
 
@@ -478,7 +735,7 @@ def create_app():
     @login_required
     @worker_required
     def editar_perfil_worker():
-        worker = Employee.query.filter_by(user_id=current_user.user_id).first()
+        worker = Employee.query.options(joinedload(Employee.user)).filter_by(employee_id=current_user.employee_id).first()
         
         if request.method == "POST":
             worker.name = request.form.get("nombre")
@@ -486,10 +743,13 @@ def create_app():
             worker.experience = request.form.get("experiencia")
             
             # Actualizamos también el nombre en la tabla User
-            current_user.name = request.form.get("nombre")
+            worker.user.name = request.form.get("nombre")
             
             try:
                 db.session.commit()
+                identity_cache.invalidate(current_user.user_id)
+                olvidar_login_negativo(worker.user.name)
+                matching.actualizar_worker(worker)
                 flash("Perfil actualizado correctamente.", "success")
                 return redirect(url_for("perfilw"))
             except Exception:
@@ -501,30 +761,111 @@ def create_app():
     @app.route("/proyectow")
     @login_required
     @worker_required
+    @read_only
+    @conditional_get(lambda: matching.con_indice(*version_ofertas_worker(current_user.employee_id)))
     def proyectow():
-        proyectos_q = JobOffer.query.filter_by(status="open").order_by(JobOffer.publish_date.desc()).all()
+        cursor = cursor_valido(request.args.get("cursor"))
+
+        # El listado es igual para todos los workers: se cachea el fragmento
+        # renderizado por página y se invalida cuando cambian las ofertas.
+        def render_lista():
+            proyectos_q, next_cursor = keyset_page(
+                JobOffer.query.filter_by(status="open"),
+                JobOffer.publish_date,
+                JobOffer.offer_id,
+                cursor,
+                app.config["PROYECTOS_POR_PAGINA"]
+            )
+            proyectos = []
+            for p in proyectos_q:
+                proyectos.append({
+                    "id": p.offer_id,
+                    "titulo": p.title,
+                    "descripcion": p.description,
+                    "fecha_limite": p.publish_date.strftime('%Y-%m-%d')
+                })
+            return render_template(
+                "proyectow_lista.html",
+                proyectos=proyectos,
+                next_cursor=next_cursor,
+                primera_pagina=not cursor
+            )
+
+        lista_html = cache.fragment("proyectos", cursor or "inicio", render_lista)
+        # Las recomendaciones son por worker: fuera del fragmento y sólo en la primera página
+        recomendados = [] if cursor else ofertas_recomendadas(current_user.employee_id)
+        return render_template("proyectow.html", lista_html=lista_html, recomendados=recomendados)
+
+    @app.route("/buscar")
+    @login_required
+    @worker_required
+    @read_only
+    def buscar():
+        def _float(nombre):
+            try:
+                return float(request.args.get(nombre, ""))
+            except ValueError:
+                return None
+
+        busqueda = {
+            "q": request.args.get("q", "").strip(),
+            "ubicacion": request.args.get("ubicacion", "").strip(),
+            "salario_min": _float("salario_min"),
+            "salario_max": _float("salario_max")
+        }
+        cursor = request.args.get("cursor")
+
+        resultados, next_cursor = search_offers(
+            busqueda["q"],
+            ubicacion=busqueda["ubicacion"],
+            salario_min=busqueda["salario_min"],
+            salario_max=busqueda["salario_max"],
+            limit=app.config["PROYECTOS_POR_PAGINA"],
+            cursor=cursor
+        )
+
         proyectos = []
-        for p in proyectos_q:
+        for p in resultados:
             proyectos.append({
                 "id": p.offer_id,
                 "titulo": p.title,
                 "descripcion": p.description,
                 "fecha_limite": p.publish_date.strftime('%Y-%m-%d')
             })
-        return render_template("proyectow.html", proyectos=proyectos)
+        return render_template(
+            "proyectow.html",
+            proyectos=proyectos,
+            busqueda=busqueda,
+            next_cursor=next_cursor,
+            primera_pagina=not cursor
+        )
+
+    def version_solicitudes():
+        if current_user.user_type == "employee":
+            return version_postulaciones_worker(current_user.employee_id)
+        return version_postulaciones_boss(current_user.boss_id)
 
     @app.route("/solicitudes", methods=["GET", "POST"])
     @login_required
+    @limiter.limit("solicitudes_usuario", RATELIMIT_SOLICITUDES_USUARIO, por="usuario")
+    @limiter.limit("solicitudes_ip", RATELIMIT_SOLICITUDES_IP)
+    @read_only
+    @conditional_get(version_solicitudes)
     def solicitudes():
         if request.method == "GET":
             if current_user.user_type == "employee":
-                worker = Employee.query.filter_by(user_id=current_user.user_id).first()
-                if not worker: return redirect(url_for("index"))
+                if not current_user.employee_id: return redirect(url_for("index"))
                 
-                apps = Application.query.filter_by(employee_id=worker.employee_id).all()
+                apps = (
+                    Application.query
+                    .filter_by(employee_id=current_user.employee_id)
+                    .options(joinedload(Application.job_offer).joinedload(JobOffer.boss))
+                    .order_by(Application.application_id)
+                    .all()
+                )
                 trabajos = []
                 for a in apps:
-                    job = JobOffer.query.get(a.offer_id)
+                    job = a.job_offer
                     trabajos.append({
                         "id": a.application_id,
                         "titulo": job.title if job else "N/A",
@@ -537,21 +878,26 @@ def create_app():
             
             # BOSS: Ve postulaciones recibidas
             else:
-                boss = Boss.query.filter_by(user_id=current_user.user_id).first()
-                if not boss: return redirect(url_for("index"))
+                if not current_user.boss_id: return redirect(url_for("index"))
                 
+                apps = (
+                    Application.query
+                    .join(Application.job_offer)
+                    .filter(JobOffer.boss_id == current_user.boss_id)
+                    .options(contains_eager(Application.job_offer), joinedload(Application.employee))
+                    .order_by(JobOffer.offer_id, Application.application_id)
+                    .all()
+                )
                 postulaciones = []
-                ofertas = JobOffer.query.filter_by(boss_id=boss.boss_id).all()
-                for off in ofertas:
-                    for a in off.applications:
-                        emp = Employee.query.get(a.employee_id)
-                        postulaciones.append({
-                            "id": a.application_id,
-                            "proyecto": off.title,
-                            "worker": emp.name if emp else "N/A",
-                            "estado": a.status,
-                            "fecha": a.application_date.strftime('%Y-%m-%d')
-                        })
+                for a in apps:
+                    emp = a.employee
+                    postulaciones.append({
+                        "id": a.application_id,
+                        "proyecto": a.job_offer.title,
+                        "worker": emp.name if emp else "N/A",
+                        "estado": a.status,
+                        "fecha": a.application_date.strftime('%Y-%m-%d')
+                    })
                 return render_template("solicitudes.html", postulaciones=postulaciones, is_boss=True)
 
         proyecto_id = request.form.get("proyecto_id")
@@ -562,7 +908,7 @@ def create_app():
             flash("Solo Workers pueden postularse.", "danger")
             return redirect(url_for("proyectow"))
 
-        worker = Employee.query.filter_by(user_id=current_user.user_id).first()
+        employee_id = current_user.employee_id
         try:
             job = JobOffer.query.get(int(proyecto_id))
         except:
@@ -572,13 +918,20 @@ def create_app():
             flash("Proyecto no disponible.", "warning")
             return redirect(url_for("proyectow"))
         
-        existe = Application.query.filter_by(employee_id=worker.employee_id, offer_id=job.offer_id).first()
+        existe = Application.query.filter_by(employee_id=employee_id, offer_id=job.offer_id).first()
         if existe:
             flash("Ya te has postulado a este proyecto.", "info")
             return redirect(url_for("proyectow"))
 
-        app_entry = Application(employee_id=worker.employee_id, offer_id=job.offer_id)
+        app_entry = Application(employee_id=employee_id, offer_id=job.offer_id)
         db.session.add(app_entry)
+        db.session.flush()
+        if job.boss_id is not None:
+            publicar(
+                db.session, "boss", job.boss_id, "postulacion",
+                postulacion=app_entry.application_id, oferta=job.title, estado="pending"
+            )
+        tocar_ofertas([job.offer_id], nuevas=1)
         db.session.commit()
         flash("Postulación enviada.", "success")
         return redirect(url_for("proyectow"))
@@ -586,21 +939,24 @@ def create_app():
     @app.route("/trabajospendientes")
     @login_required
     @worker_required
+    @read_only
+    @conditional_get(lambda: version_postulaciones_worker(current_user.employee_id))
     def trabajospendientes():
-        worker = Employee.query.filter_by(user_id=current_user.user_id).first()
-        if not worker:
+        if not current_user.employee_id:
             return redirect(url_for("index"))
         
         apps = Application.query.filter(
-            Application.employee_id == worker.employee_id,
+            Application.employee_id == current_user.employee_id,
             Application.status.in_(['accepted', 'completed'])
+        ).options(
+            joinedload(Application.job_offer).joinedload(JobOffer.boss)
         ).all()
 
         pendientes = []
         completados = []
 
         for a in apps:
-            job = JobOffer.query.get(a.offer_id)
+            job = a.job_offer
             info = {
                 "id": a.application_id, 
                 "titulo": job.title,
@@ -622,12 +978,13 @@ def create_app():
     @login_required
     def ver_trabajopendiente():
         app_id = request.form.get("id")
-        application = Application.query.get_or_404(int(app_id))
-        job = JobOffer.query.get(application.offer_id)
+        application = Application.query.options(
+            joinedload(Application.job_offer).joinedload(JobOffer.boss)
+        ).get_or_404(int(app_id))
+        job = application.job_offer
 
         if current_user.user_type == "employee":
-            worker = Employee.query.filter_by(user_id=current_user.user_id).first()
-            if application.employee_id != worker.employee_id:
+            if application.employee_id != current_user.employee_id:
                 flash("No tienes permiso.", "danger")
                 return redirect(url_for("trabajospendientes"))
         
@@ -646,18 +1003,174 @@ def create_app():
     @login_required
     def marcar_completado():
         app_id = request.form.get("id")
-        application = Application.query.get_or_404(int(app_id))
+        application = Application.query.options(joinedload(Application.job_offer)).get_or_404(int(app_id))
         
         application.status = 'completed'
+        tocar_ofertas([application.offer_id])
+        # El boss de la oferta puede haberse eliminado
+        if application.job_offer.boss_id is not None:
+            publicar(
+                db.session, "boss", application.job_offer.boss_id, "postulacion",
+                postulacion=application.application_id, oferta=application.job_offer.title, estado="completed"
+            )
         db.session.commit()
         
         flash("Trabajo marcado como completado.", "success")
         return redirect(url_for("trabajospendientes"))
 
+    # --- Notificaciones en tiempo real ---
+    # EventSource: cambios de estado de las postulaciones del usuario (ver events.py)
+    @app.route("/eventos")
+    @login_required
+    def eventos_sse():
+        canal = canal_usuario(current_user)
+        if eventos is None or canal is None:
+            return "", 204  # 204: EventSource deja de reconectar
+        return respuesta_sse(
+            eventos, canal, app.config["SSE_HEARTBEAT_SECONDS"], app.config["SSE_MAX_SECONDS"]
+        )
+
+    # --- API de lectura (v1) ---
+    # JSON paginado (?cursor=&limite=) y exportación completa en streaming
+    # (.ndjson / .csv) de cada listado
+    @app.route("/api/v1/ofertas")
+    @api_auth()
+    @read_only
+    def api_ofertas():
+        return pagina(ofertas_abiertas(), CAMPOS_OFERTA)
+
+    @app.route("/api/v1/ofertas.<any(ndjson, csv):formato>")
+    @api_auth()
+    @read_only
+    def api_ofertas_export(formato):
+        return exportar(ofertas_abiertas(), CAMPOS_OFERTA, formato, "ofertas")
+
+    @app.route("/api/v1/mis-ofertas")
+    @api_auth("boss")
+    @read_only
+    def api_mis_ofertas():
+        return pagina(ofertas_boss(current_user.boss_id), CAMPOS_OFERTA)
+
+    @app.route("/api/v1/mis-ofertas.<any(ndjson, csv):formato>")
+    @api_auth("boss")
+    @read_only
+    def api_mis_ofertas_export(formato):
+        return exportar(ofertas_boss(current_user.boss_id), CAMPOS_OFERTA, formato, "mis-ofertas")
+
+    # Postulaciones recibidas en las ofertas del boss (?oferta=<id> para una sola)
+    @app.route("/api/v1/postulaciones")
+    @api_auth("boss")
+    @read_only
+    def api_postulaciones():
+        consulta = postulaciones_boss(current_user.boss_id, request.args.get("oferta", type=int))
+        return pagina(consulta, CAMPOS_POSTULACION)
+
+    @app.route("/api/v1/postulaciones.<any(ndjson, csv):formato>")
+    @api_auth("boss")
+    @read_only
+    def api_postulaciones_export(formato):
+        consulta = postulaciones_boss(current_user.boss_id, request.args.get("oferta", type=int))
+        return exportar(consulta, CAMPOS_POSTULACION, formato, "postulaciones")
+
     @app.cli.command("init-db")
     def init_db():
         db.create_all()
         print("Tablas creadas.")
+        # Sobre un esquema recién creado las migraciones no tienen nada que
+        # hacer (son idempotentes) y quedan registradas como aplicadas
+        migrate(app.config["SQLALCHEMY_DATABASE_URI"], log=lambda *a: None)
+
+    # Cambios de esquema versionados (migrations/), aptos para producción en marcha
+    @app.cli.command("migrate")
+    @click.option("--hasta", type=int, help="Aplica hasta esta versión (incluida).")
+    def migrate_command(hasta):
+        try:
+            migrate(
+                app.config["SQLALCHEMY_DATABASE_URI"],
+                destino=hasta,
+                lock_timeout_ms=MIGRATE_LOCK_TIMEOUT_MS,
+                reintentos=MIGRATE_RETRIES
+            )
+        except MigrationError as e:
+            raise click.ClickException(str(e))
+
+    @app.cli.command("migrate-status")
+    def migrate_status_command():
+        for version, nombre, aplicada_en in estado(app.config["SQLALCHEMY_DATABASE_URI"]):
+            print(f"{version:04d}  {nombre:<40} {aplicada_en or 'pendiente'}")
+
+    @app.cli.command("import-users")
+    @click.argument("ruta", type=click.Path(exists=True, dir_okay=False))
+    @click.option("--formato", type=click.Choice(["csv", "jsonl"]), help="Por defecto según la extensión.")
+    @click.option("--lote", default=1000, show_default=True, help="Usuarios por transacción.")
+    @click.option("--workers", default=default_workers(), show_default=True, help="Procesos para el hash (0 = sin pool).")
+    def import_users_command(ruta, formato, lote, workers):
+        resultado = import_users(
+            read_rows(ruta, formato),
+            method=hasher.method,
+            batch_size=lote,
+            workers=workers
+        )
+        print(f"Creados: {resultado.creados}  Omitidos (ya existían): {resultado.omitidos}  Errores: {resultado.errores}")
+
+    # Datos sintéticos para reproducir problemas de rendimiento a escala.
+    # Todos los usuarios generados comparten la contraseña --password.
+    @app.cli.command("seed")
+    @click.option("--bosses", default=1000, show_default=True)
+    @click.option("--workers", default=100000, show_default=True)
+    @click.option("--ofertas", default=50000, show_default=True)
+    @click.option("--postulaciones", default=1000000, show_default=True)
+    @click.option("--semilla", default=42, show_default=True, help="Misma semilla, mismos datos.")
+    @click.option("--password", default="seed1234", show_default=True)
+    @click.option("--lote", default=10000, show_default=True, help="Filas por bloque de COPY / INSERT.")
+    def seed_command(bosses, workers, ofertas, postulaciones, semilla, password, lote):
+        resultados = seed_database(
+            bosses, workers, ofertas, postulaciones,
+            password_hash=hasher.hash(password),
+            semilla=semilla,
+            lote=lote
+        )
+        cache.invalidate("proyectos")
+        tasks.recalcular_contadores()
+        total = sum(r.filas for r in resultados)
+        segundos = sum(r.segundos for r in resultados)
+        print(f"Total: {total} filas en {segundos:.1f}s")
+
+    # Procesa la cola de tareas en segundo plano (jobs.py / tasks.py).
+    # Se pueden arrancar varios en paralelo.
+    @app.cli.command("worker")
+    @click.option("--lote", default=JOBS_LOTE, show_default=True, help="Tareas por reclamo.")
+    @click.option("--metrics-port", type=int, help="Sirve /metrics (Prometheus) en este puerto.")
+    @click.option("--una-vez", is_flag=True, help="Sale cuando la cola queda vacía.")
+    def worker_command(lote, metrics_port, una_vez):
+        worker = Worker(
+            app, lote=lote, espera=JOBS_POLL_SECONDS, visibilidad=JOBS_VISIBILITY_SECONDS,
+            backoff_base=JOBS_BACKOFF_BASE, backoff_max=JOBS_BACKOFF_MAX
+        )
+        metrics.collectors.append(worker.metrics_lines)
+        if isinstance(cache.backend, MemoryBackend):
+            app.logger.warning("CACHE_URL es memory://: lo que invalide el worker no llega a los procesos web")
+        if metrics_port:
+            worker.servir_metricas(metrics_port, metrics.render)
+        # SIGTERM (despliegues): termina la tarea en curso y sale
+        signal.signal(signal.SIGTERM, lambda *args: worker.parar.set())
+        try:
+            worker.run(una_vez=una_vez)
+        except KeyboardInterrupt:
+            pass
+
+    @app.cli.command("jobs-status")
+    @click.option("--reintentar-fallidas", is_flag=True, help="Vuelve a encolar las tareas fallidas.")
+    def jobs_status_command(reintentar_fallidas):
+        if reintentar_fallidas:
+            n = db.session.execute(
+                update(Job).where(Job.status == "failed")
+                .values(status="pending", attempts=0, run_at=datetime.utcnow(), unique_key=None, finished_at=None)
+            ).rowcount
+            db.session.commit()
+            print(f"Reencoladas: {n}")
+        for nombre, estado_job, n, primera in estado_cola():
+            print(f"{nombre:<24} {estado_job:<8} {n:>8}  {primera:%Y-%m-%d %H:%M:%S}")
 
     return app
 
@@ -0,0 +1,185 @@
+from collections import defaultdict
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import select, update
+
+from events import publicar
+from jobs import encolar
+from models import db, JobOffer, Application
+
+
+# --- Gestión masiva de postulaciones ---
+# Acepta o rechaza una lista de postulaciones con sentencias UPDATE ... IN
+# protegidas por la propiedad de la oferta (boss_id) y devuelve el resultado
+# por id. Al aceptar una postulación se cierra la oferta y se rechazan el
+# resto de postulaciones pendientes de esa oferta.
+
+ACCIONES = {"aceptar": "accepted", "rechazar": "rejected"}
+
+
+def _de_mis_ofertas(boss_id, abiertas=False):
+    stmt = select(JobOffer.offer_id).where(JobOffer.boss_id == boss_id)
+    if abiertas:
+        stmt = stmt.where(JobOffer.status == "open")
+    return stmt.scalar_subquery()
+
+
+def tocar_ofertas(offer_ids, nuevas=0):
+    # Marca el cambio en las postulaciones de las ofertas, en la misma
+    # transacción (firma de ETag del boss), y suma "nuevas" (negativo al
+    # borrar) a applications_count. updated_at no cambia: no es un cambio de
+    # la oferta para los workers ni para el índice de afinidad.
+    if offer_ids:
+        valores = {"applications_updated_at": datetime.utcnow(), "updated_at": JobOffer.updated_at}
+        if nuevas:
+            valores["applications_count"] = JobOffer.applications_count + nuevas
+        db.session.execute(
+            update(JobOffer)
+            .where(JobOffer.offer_id.in_(sorted(set(offer_ids))))
+            .values(**valores),
+            execution_options={"synchronize_session": False}
+        )
+
+
+def rechazar_pendientes(offer_ids):
+    # Al aceptar un candidato (o cerrar la oferta) el resto de pendientes
+    # quedan rechazadas en la misma transacción; sólo los avisos, uno por
+    # postulante, van a una tarea en segundo plano
+    offer_ids = sorted(set(offer_ids))
+    if not offer_ids:
+        return []
+    filas = db.session.execute(
+        update(Application)
+        .where(Application.offer_id.in_(offer_ids), Application.status == "pending")
+        .values(status="rejected")
+        .returning(Application.application_id, Application.employee_id, Application.offer_id),
+        execution_options={"synchronize_session": False}
+    ).all()
+    if not filas:
+        return filas
+    tocar_ofertas([offer_id for _, _, offer_id in filas])
+    if current_app.extensions["eventos"] is not None:
+        por_oferta = defaultdict(list)
+        for app_id, employee_id, offer_id in filas:
+            por_oferta[offer_id].append([app_id, employee_id])
+        titulos = dict(db.session.execute(
+            select(JobOffer.offer_id, JobOffer.title).where(JobOffer.offer_id.in_(list(por_oferta)))
+        ).all())
+        for offer_id, postulaciones in por_oferta.items():
+            encolar("notificar_postulantes", oferta=titulos[offer_id], estado="rejected", postulaciones=postulaciones)
+    return filas
+
+
+def _resultados(resultados, ids, filas, estado):
+    # Sólo cuenta lo que devolvió RETURNING: una petición concurrente pudo
+    # cambiar la postulación entre la lectura y el UPDATE
+    cambiadas = {app_id for app_id, _, _ in filas}
+    for app_id in ids:
+        resultados[app_id] = estado if app_id in cambiadas else "sin_cambios"
+
+
+def gestionar_postulaciones(boss_id, ids, accion):
+    if accion not in ACCIONES:
+        raise ValueError(f"Acción no válida: {accion}")
+
+    ids = sorted(set(ids))
+    resultados = {i: "no_encontrada" for i in ids}
+    if not ids:
+        return resultados
+
+    # Estado actual de las postulaciones pedidas que pertenecen al boss
+    filas = db.session.execute(
+        select(
+            Application.application_id, Application.offer_id, Application.status,
+            JobOffer.status, JobOffer.title
+        )
+        .join(JobOffer, JobOffer.offer_id == Application.offer_id)
+        .where(Application.application_id.in_(ids), JobOffer.boss_id == boss_id)
+    ).all()
+    titulos = {offer_id: titulo for _, offer_id, _, _, titulo in filas}
+
+    def avisar(actualizadas, estado):
+        for app_id, employee_id, offer_id in actualizadas:
+            publicar(
+                db.session, "worker", employee_id, "postulacion",
+                postulacion=app_id, oferta=titulos[offer_id], estado=estado
+            )
+
+    pendientes = {}
+    for app_id, offer_id, estado, estado_oferta, _ in filas:
+        if estado != "pending":
+            resultados[app_id] = f"sin_cambios:{estado}"
+        elif accion == "aceptar" and estado_oferta != "open":
+            resultados[app_id] = "oferta_cerrada"
+        else:
+            pendientes[app_id] = offer_id
+
+    if accion == "rechazar":
+        a_rechazar = list(pendientes)
+        if a_rechazar:
+            rechazadas = db.session.execute(
+                update(Application)
+                .where(
+                    Application.application_id.in_(a_rechazar),
+                    Application.status == "pending",
+                    Application.offer_id.in_(_de_mis_ofertas(boss_id))
+                )
+                .values(status="rejected")
+                .returning(Application.application_id, Application.employee_id, Application.offer_id),
+                execution_options={"synchronize_session": False}
+            ).all()
+            avisar(rechazadas, "rejected")
+            tocar_ofertas([offer_id for _, _, offer_id in rechazadas])
+            _resultados(resultados, a_rechazar, rechazadas, "rejected")
+        db.session.commit()
+        return resultados
+
+    # Aceptar: una sola postulación por oferta (la de menor id)
+    elegidas = {}
+    duplicadas = []
+    for app_id, offer_id in sorted(pendientes.items()):
+        if offer_id in elegidas:
+            duplicadas.append(app_id)
+        else:
+            elegidas[offer_id] = app_id
+
+    if elegidas:
+        aceptadas = db.session.execute(
+            update(Application)
+            .where(
+                Application.application_id.in_(list(elegidas.values())),
+                Application.status == "pending",
+                Application.offer_id.in_(_de_mis_ofertas(boss_id, abiertas=True))
+            )
+            .values(status="accepted")
+            .returning(Application.application_id, Application.employee_id, Application.offer_id),
+            execution_options={"synchronize_session": False}
+        ).all()
+        avisar(aceptadas, "accepted")
+        _resultados(resultados, elegidas.values(), aceptadas, "accepted")
+
+        # Sólo las ofertas donde la aceptación cambió una fila (otra petición
+        # pudo adelantarse): se cierran y el resto de pendientes se rechazan
+        ofertas = sorted({offer_id for _, _, offer_id in aceptadas})
+        rechazadas = []
+        if ofertas:
+            rechazadas = db.session.execute(
+                update(Application)
+                .where(Application.offer_id.in_(ofertas), Application.status == "pending")
+                .values(status="rejected")
+                .returning(Application.application_id, Application.employee_id, Application.offer_id),
+                execution_options={"synchronize_session": False}
+            ).all()
+            avisar(rechazadas, "rejected")
+            db.session.execute(
+                update(JobOffer)
+                .where(JobOffer.offer_id.in_(ofertas), JobOffer.boss_id == boss_id)
+                .values(status="closed"),
+                execution_options={"synchronize_session": False}
+            )
+            tocar_ofertas(ofertas)
+        _resultados(resultados, duplicadas, rechazadas, "rejected")
+
+    db.session.commit()
+    return resultados
@@ -0,0 +1,587 @@
+import asyncio
+import re
+import time
+from contextvars import ContextVar
+from urllib.parse import parse_qs
+
+from asgiref.wsgi import WsgiToAsgi
+from flask import render_template
+from itsdangerous import BadSignature
+from sqlalchemy import event, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import contains_eager, joinedload
+from werkzeug.http import http_date, parse_accept_header, parse_cookie, parse_date, parse_etags, quote_etag
+
+from app import create_app
+from compression import available_encodings, choose_encoding, compress
+from conditional import (
+    consulta_ofertas_worker, consulta_postulaciones_boss, consulta_postulaciones_worker,
+    version_de, calcular_etag, no_modificado
+)
+from database import async_database_url, engine_options
+from events import canal_usuario, formato_sse, COLA_MAX, RETRY_MS
+from identity import UserSnapshot
+from matching import ofertas_recomendadas, afinidad_postulantes, candidatos_recomendados
+from models import User, Boss, Employee, JobOffer, Application
+from pagination import cursor_valido, keyset_select, split_page
+from replicas import SESSION_KEY
+
+
+# --- Modo ASGI ---
+# Flask sigue siendo síncrono: este módulo sirve con un event loop las vistas
+# de lectura más usadas (listados que sólo consultan la base de datos) con
+# SQLAlchemy async, y pasa todo lo demás a la app Flask de siempre a través
+# de WsgiToAsgi (hilos). Comparten models.py, las plantillas, la sesión
+# firmada y las cachés de identidad y de fragmentos.
+#
+# Sólo son async las cuatro vistas de RUTAS (GET de /proyectow,
+# /detallesolicitud/<id>, /solicitudes y /trabajospendientes). Cada una
+# reproduce lo que sus decoradores hacen en Flask:
+# - @conditional_get: la misma consulta de versión (conditional.py), el mismo
+#   ETag, Last-Modified y Cache-Control, y 304 sin cargar filas.
+# - @read_only: lee de una réplica sana elegida por el ReplicaRouter de Flask,
+#   salvo que el usuario haya escrito hace menos de REPLICA_STICKY_SECONDS.
+# - Instrumentación: consultas, tiempo en BD y de render en /metrics y en
+#   Server-Timing, con el mismo nombre de endpoint.
+# Jinja es síncrono: las plantillas se renderizan en un hilo (to_thread) para
+# no bloquear el loop.
+#
+# Se delega en Flask cuando la vista necesita algo que sólo existe allí:
+# peticiones que no son GET, sin sesión válida, con mensajes flash pendientes
+# o de un rol que la vista redirige. Una vista nueva sólo debe añadirse a
+# RUTAS si reproduce también sus decoradores.
+#
+# /eventos (SSE, con EVENTOS_ENABLED) también se sirve aquí: cada conexión es
+# una corrutina que espera en una cola en vez de ocupar un hilo.
+#
+#   uvicorn asgi:app --workers 4
+
+flask_app = create_app()
+fallback = WsgiToAsgi(flask_app)
+
+
+# --- Instrumentación ---
+# La medición de cada petición viaja en un ContextVar: llega a los eventos
+# del engine y a los hilos de to_thread
+
+class Medicion:
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.inicio = time.perf_counter()
+        self.queries = 0
+        self.db = 0.0
+        self.render = 0.0
+
+
+medicion = ContextVar("medicion", default=None)
+metrics = flask_app.extensions["metrics"]
+
+
+def _antes_consulta(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("asgi_query_start", []).append(time.perf_counter())
+
+
+def _tras_consulta(conn, cursor, statement, parameters, context, executemany):
+    duracion = time.perf_counter() - conn.info["asgi_query_start"].pop()
+    m = medicion.get()
+    if m is not None:
+        m.queries += 1
+        m.db += duracion
+    if duracion * 1000 >= flask_app.config.get("SLOW_QUERY_MS", 200):
+        with metrics.lock:
+            metrics.slow_queries += 1
+        flask_app.logger.warning(
+            "Consulta lenta (%.1f ms) en %s: %s",
+            duracion * 1000, m.endpoint if m else "-", " ".join(statement.split())
+        )
+
+
+def _error_consulta(context):
+    # La consulta que falló no llega a after_cursor_execute
+    if context.connection is not None and context.connection.info.get("asgi_query_start"):
+        context.connection.info["asgi_query_start"].pop()
+
+
+def crear_engine(uri):
+    engine = create_async_engine(async_database_url(uri), **engine_options(uri, flask_app.config, use_async=True))
+    event.listen(engine.sync_engine, "before_cursor_execute", _antes_consulta)
+    event.listen(engine.sync_engine, "after_cursor_execute", _tras_consulta)
+    event.listen(engine.sync_engine, "handle_error", _error_consulta)
+    return engine
+
+
+engine = crear_engine(flask_app.config["SQLALCHEMY_DATABASE_URI"])
+
+# Réplicas: un engine async por bind de Flask. Cuál está sana y a cuál le
+# toca lo decide el ReplicaRouter de la app Flask.
+replicas = flask_app.extensions["replicas"]
+engines_replica = {key: crear_engine(conf["url"]) for key, conf in flask_app.config["SQLALCHEMY_BINDS"].items()}
+
+for _key, _engine in engines_replica.items():
+    @event.listens_for(_engine.sync_engine, "handle_error")
+    def _replica_caida(context, key=_key):
+        if context.is_disconnect or isinstance(context.sqlalchemy_exception, OperationalError):
+            replicas.mark_down(key)
+
+identity_cache = flask_app.extensions["identity_cache"]
+matching = flask_app.extensions["matching"]
+cache = flask_app.extensions["cache"]
+serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+encodings = available_encodings()
+eventos_broker = flask_app.extensions["eventos"]
+
+
+class Delegar(Exception):
+    pass
+
+
+def leer_sesion(scope):
+    for nombre, valor in scope["headers"]:
+        if nombre == b"cookie":
+            cookie = parse_cookie(valor.decode("latin-1")).get(flask_app.config["SESSION_COOKIE_NAME"])
+            if not cookie:
+                return {}
+            try:
+                return serializer.loads(
+                    cookie, max_age=int(flask_app.permanent_session_lifetime.total_seconds())
+                )
+            except BadSignature:
+                return {}
+    return {}
+
+
+async def cargar_usuario(db, user_id):
+    snapshot = identity_cache.get(user_id)
+    if snapshot is not None:
+        return snapshot
+    fila = (await db.execute(
+        select(
+            User.user_id, User.name, User.email, User.user_type,
+            Boss.boss_id, Employee.employee_id
+        )
+        .outerjoin(Boss, Boss.user_id == User.user_id)
+        .outerjoin(Employee, Employee.user_id == User.user_id)
+        .where(User.user_id == user_id)
+    )).first()
+    if fila is None:
+        return None
+    snapshot = UserSnapshot(*fila)
+    identity_cache.put(user_id, snapshot)
+    return snapshot
+
+
+def render(path, plantilla, **contexto):
+    # url_for y asset_url necesitan un contexto de petición de Flask
+    inicio = time.perf_counter()
+    with flask_app.test_request_context(path):
+        html = render_template(plantilla, **contexto)
+    m = medicion.get()
+    if m is not None:
+        m.render += time.perf_counter() - inicio
+    return html
+
+
+async def renderizar(path, plantilla, **contexto):
+    return await asyncio.to_thread(render, path, plantilla, **contexto)
+
+
+# La caché es síncrona (Redis por socket): se usa desde un hilo para no
+# bloquear el loop, y con app context porque registra sus errores en el log.
+def leer_fragmento(namespace, key):
+    with flask_app.app_context():
+        html = cache.get(namespace, key)
+    return html.decode("utf-8") if html is not None else None
+
+
+def guardar_fragmento(namespace, key, html):
+    with flask_app.app_context():
+        cache.set(namespace, key, html.encode("utf-8"))
+
+
+# El índice de afinidad y el ReplicaRouter son de la app Flask (consultan con
+# sus engines síncronos)
+def en_app(funcion, *args, **kwargs):
+    with flask_app.app_context():
+        return funcion(*args, **kwargs)
+
+
+# --- Vistas async ---
+
+async def proyectow(db, usuario, path, params):
+    if usuario.user_type != "employee":
+        raise Delegar
+    cursor = cursor_valido(params.get("cursor", [None])[0])
+
+    lista_html = await asyncio.to_thread(leer_fragmento, "proyectos", cursor or "inicio")
+    if lista_html is None:
+        stmt = keyset_select(
+            select(JobOffer).where(JobOffer.status == "open"),
+            JobOffer.publish_date,
+            JobOffer.offer_id,
+            cursor,
+            flask_app.config["PROYECTOS_POR_PAGINA"]
+        )
+        filas = (await db.scalars(stmt)).all()
+        filas, next_cursor = split_page(
+            filas, JobOffer.publish_date, JobOffer.offer_id, flask_app.config["PROYECTOS_POR_PAGINA"]
+        )
+        proyectos = []
+        for p in filas:
+            proyectos.append({
+                "id": p.offer_id,
+                "titulo": p.title,
+                "descripcion": p.description,
+                "fecha_limite": p.publish_date.strftime('%Y-%m-%d')
+            })
+        lista_html = await renderizar(
+            path, "proyectow_lista.html",
+            proyectos=proyectos, next_cursor=next_cursor, primera_pagina=not cursor
+        )
+        await asyncio.to_thread(guardar_fragmento, "proyectos", cursor or "inicio", lista_html)
+    recomendados = [] if cursor else await asyncio.to_thread(
+        en_app, ofertas_recomendadas, usuario.employee_id
+    )
+    return await renderizar(path, "proyectow.html", lista_html=lista_html, recomendados=recomendados)
+
+
+async def detallesolicitud(db, usuario, path, params, id):
+    if usuario.user_type != "boss" or not usuario.boss_id:
+        raise Delegar
+    job = await db.get(JobOffer, id)
+    if job is None or job.boss_id != usuario.boss_id:
+        raise Delegar  # 404 o "Acceso denegado" con flash: lo resuelve Flask
+
+    apps = (await db.scalars(
+        select(Application)
+        .where(Application.offer_id == job.offer_id)
+        .options(joinedload(Application.employee))
+        .order_by(Application.application_id)
+    )).all()
+    ids = [a.employee_id for a in apps]
+    puntos = await asyncio.to_thread(en_app, afinidad_postulantes, job, ids)
+    postulaciones = []
+    for a in apps:
+        emp = a.employee
+        postulaciones.append({
+            "id": a.application_id,
+            "worker": emp.name if emp else "N/A",
+            "status": a.status,
+            "fecha": a.application_date.strftime('%Y-%m-%d'),
+            "afinidad": puntos.get(a.employee_id, 0)
+        })
+    postulaciones.sort(key=lambda p: -p["afinidad"])
+    candidatos = await asyncio.to_thread(en_app, candidatos_recomendados, job, excluir=ids)
+    solicitud = {
+        "id": job.offer_id,
+        "proyecto": job.title,
+        "descripcion": job.description,
+        "categoria": job.location,
+        "fecha_entrega": job.publish_date.strftime('%Y-%m-%d'),
+        "presupuesto": job.salary
+    }
+    return await renderizar(
+        path, "detallesolicitud.html", solicitud=solicitud, postulaciones=postulaciones, candidatos=candidatos
+    )
+
+
+async def solicitudes(db, usuario, path, params):
+    if usuario.user_type == "employee" and usuario.employee_id:
+        apps = (await db.scalars(
+            select(Application)
+            .where(Application.employee_id == usuario.employee_id)
+            .options(joinedload(Application.job_offer).joinedload(JobOffer.boss))
+            .order_by(Application.application_id)
+        )).all()
+        trabajos = []
+        for a in apps:
+            job = a.job_offer
+            trabajos.append({
+                "id": a.application_id,
+                "titulo": job.title if job else "N/A",
+                "cliente": job.boss.name if job and job.boss else "N/A",
+                "descripcion": job.description if job else "",
+                "fecha_limite": job.publish_date.strftime('%Y-%m-%d') if job else "N/A",
+                "estado": a.status
+            })
+        return await renderizar(path, "solicitudes.html", trabajos=trabajos, is_boss=False)
+
+    if usuario.user_type == "boss" and usuario.boss_id:
+        apps = (await db.scalars(
+            select(Application)
+            .join(Application.job_offer)
+            .where(JobOffer.boss_id == usuario.boss_id)
+            .options(contains_eager(Application.job_offer), joinedload(Application.employee))
+            .order_by(JobOffer.offer_id, Application.application_id)
+        )).all()
+        postulaciones = []
+        for a in apps:
+            emp = a.employee
+            postulaciones.append({
+                "id": a.application_id,
+                "proyecto": a.job_offer.title,
+                "worker": emp.name if emp else "N/A",
+                "estado": a.status,
+                "fecha": a.application_date.strftime('%Y-%m-%d')
+            })
+        return await renderizar(path, "solicitudes.html", postulaciones=postulaciones, is_boss=True)
+
+    raise Delegar
+
+
+async def trabajospendientes(db, usuario, path, params):
+    if not usuario.employee_id:
+        raise Delegar
+    apps = (await db.scalars(
+        select(Application)
+        .where(
+            Application.employee_id == usuario.employee_id,
+            Application.status.in_(['accepted', 'completed'])
+        )
+        .options(joinedload(Application.job_offer).joinedload(JobOffer.boss))
+    )).all()
+
+    pendientes = []
+    completados = []
+    for a in apps:
+        job = a.job_offer
+        info = {
+            "id": a.application_id,
+            "titulo": job.title,
+            "cliente": job.boss.name if job.boss else "N/A",
+            "descripcion": job.description,
+            "fecha_limite": job.publish_date.strftime('%Y-%m-%d'),
+            "pago": job.salary,
+            "estado": a.status
+        }
+        if a.status == 'accepted':
+            pendientes.append(info)
+        elif a.status == 'completed':
+            completados.append(info)
+    return await renderizar(path, "trabajospendientes.html", pendientes=pendientes, completados=completados)
+
+
+# --- Versiones (las mismas que @conditional_get en app.py) ---
+
+def version_proyectow(usuario):
+    if usuario.user_type != "employee":
+        raise Delegar
+    return consulta_ofertas_worker(usuario.employee_id)
+
+
+def version_solicitudes(usuario):
+    if usuario.user_type == "employee" and usuario.employee_id:
+        return consulta_postulaciones_worker(usuario.employee_id)
+    if usuario.user_type == "boss" and usuario.boss_id:
+        return consulta_postulaciones_boss(usuario.boss_id)
+    raise Delegar
+
+
+def version_trabajospendientes(usuario):
+    if not usuario.employee_id:
+        raise Delegar
+    return consulta_postulaciones_worker(usuario.employee_id)
+
+
+# (patrón, vista, versión); sin versión la vista no responde 304, como en Flask
+RUTAS = [
+    (re.compile(r"^/proyectow$"), proyectow, version_proyectow),
+    (re.compile(r"^/detallesolicitud/(?P<id>\d+)$"), detallesolicitud, None),
+    (re.compile(r"^/solicitudes$"), solicitudes, version_solicitudes),
+    (re.compile(r"^/trabajospendientes$"), trabajospendientes, version_trabajospendientes),
+]
+
+
+def buscar_ruta(scope):
+    if scope["type"] != "http" or scope["method"] != "GET":
+        return None
+    for patron, vista, version in RUTAS:
+        m = patron.match(scope["path"])
+        if m:
+            return vista, version, {k: int(v) for k, v in m.groupdict().items()}
+    return None
+
+
+def cabecera(scope, nombre):
+    return next((v.decode("latin-1") for n, v in scope["headers"] if n == nombre), None)
+
+
+async def elegir_engine(sesion):
+    # Como @read_only: el primario si el usuario escribió hace poco
+    if not engines_replica:
+        return engine, None
+    if time.time() - sesion.get(SESSION_KEY, 0) < flask_app.config["REPLICA_STICKY_SECONDS"]:
+        return engine, None
+    key = await asyncio.to_thread(en_app, replicas.siguiente)
+    return (engines_replica[key], key) if key else (engine, None)
+
+
+async def servir(scope, send, db, usuario, vista, version, params, kwargs):
+    # Páginas de un usuario: ninguna caché compartida debe guardarlas
+    etag, condicionales = None, [(b"cache-control", b"private")]
+    consulta = version(usuario) if version else None
+    if consulta is not None:
+        ultima, firma = version_de((await db.execute(consulta)).one())
+        if version is version_proyectow:
+            # Como en Flask: la firma incluye si el índice de afinidad está listo
+            ultima, firma = matching.con_indice(ultima, firma)
+        # Mismo ETag que en Flask: request.full_path siempre lleva "?"
+        full_path = f"{scope['path']}?{scope.get('query_string', b'').decode('latin-1')}"
+        etag = calcular_etag(str(usuario.user_id), full_path, firma)
+        ultima = ultima.replace(microsecond=0) if ultima else None
+        condicionales = [(b"cache-control", b"private, no-cache")]
+        if ultima:
+            condicionales.append((b"last-modified", http_date(ultima).encode()))
+        if no_modificado(
+            etag, ultima,
+            parse_etags(cabecera(scope, b"if-none-match")), parse_date(cabecera(scope, b"if-modified-since"))
+        ):
+            return await responder(scope, send, None, etag, condicionales)
+
+    html = await vista(db, usuario, scope["path"], params, **kwargs)
+    return await responder(scope, send, html, etag, condicionales)
+
+
+async def responder(scope, send, html, etag=None, condicionales=()):
+    # html None: 304. El ETag pasa a débil si se comprime, como hace
+    # compression.py
+    cabeceras = [(b"vary", b"Accept-Encoding, Cookie"), *condicionales]
+    cuerpo = b""
+    debil = False
+
+    if html is not None:
+        cuerpo = html.encode("utf-8")
+        cabeceras.append((b"content-type", b"text/html; charset=utf-8"))
+        if len(cuerpo) >= flask_app.config["COMPRESS_MIN_SIZE"]:
+            encoding = choose_encoding(parse_accept_header(cabecera(scope, b"accept-encoding") or ""), encodings)
+            if encoding:
+                cuerpo = await asyncio.to_thread(compress, cuerpo, encoding, flask_app.config["COMPRESS_LEVEL"])
+                cabeceras.append((b"content-encoding", encoding.encode()))
+                debil = True
+        cabeceras.append((b"content-length", str(len(cuerpo)).encode()))
+    if etag:
+        cabeceras.append((b"etag", quote_etag(etag, weak=debil).encode()))
+
+    m = medicion.get()
+    if m is not None:
+        total = time.perf_counter() - m.inicio
+        metrics.observe(m.endpoint, m.queries, m.db, m.render, total)
+        cabeceras.append((b"server-timing", ", ".join([
+            f'db;dur={m.db * 1000:.1f};desc="{m.queries} queries"',
+            f"render;dur={m.render * 1000:.1f}",
+            f"total;dur={total * 1000:.1f}"
+        ]).encode()))
+
+    await send({"type": "http.response.start", "status": 200 if html is not None else 304, "headers": cabeceras})
+    await send({"type": "http.response.body", "body": cuerpo})
+
+
+# --- Server-Sent Events ---
+
+async def eventos(scope, receive, send, usuario):
+    canal = canal_usuario(usuario)
+    if canal is None:
+        raise Delegar
+    loop = asyncio.get_running_loop()
+    cola = asyncio.Queue(maxsize=COLA_MAX)
+
+    def poner(evento):
+        try:
+            cola.put_nowait(evento)
+        except asyncio.QueueFull:
+            eventos_broker.descartados += 1
+
+    # El broker entrega desde otros hilos (vistas Flask, hilo de LISTEN)
+    baja = eventos_broker.suscribir(canal, lambda evento: loop.call_soon_threadsafe(poner, evento))
+    desconexion = asyncio.ensure_future(esperar_desconexion(receive))
+    try:
+        await send({"type": "http.response.start", "status": 200, "headers": [
+            (b"content-type", b"text/event-stream; charset=utf-8"),
+            (b"cache-control", b"no-cache"),
+            (b"x-accel-buffering", b"no"),
+        ]})
+        await send({"type": "http.response.body", "body": f"retry: {RETRY_MS}\n\n".encode(), "more_body": True})
+        fin = loop.time() + flask_app.config["SSE_MAX_SECONDS"]
+        while True:
+            restante = fin - loop.time()
+            if restante <= 0:
+                break
+            siguiente = asyncio.ensure_future(cola.get())
+            hechas, _ = await asyncio.wait(
+                {siguiente, desconexion},
+                timeout=min(flask_app.config["SSE_HEARTBEAT_SECONDS"], restante),
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            if desconexion in hechas:
+                siguiente.cancel()
+                return
+            if siguiente in hechas:
+                trozo = formato_sse(siguiente.result())
+            else:
+                siguiente.cancel()
+                trozo = ": ping\n\n"
+            await send({"type": "http.response.body", "body": trozo.encode("utf-8"), "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+    finally:
+        baja()
+        desconexion.cancel()
+
+
+async def esperar_desconexion(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def lifespan(receive, send):
+    while True:
+        mensaje = await receive()
+        if mensaje["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif mensaje["type"] == "lifespan.shutdown":
+            await engine.dispose()
+            for motor in engines_replica.values():
+                await motor.dispose()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await lifespan(receive, send)
+
+    if eventos_broker is not None and scope["type"] == "http" and scope["method"] == "GET" and scope["path"] == "/eventos":
+        user_id = leer_sesion(scope).get("_user_id")
+        if user_id:
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                usuario = await cargar_usuario(db, int(user_id))
+            if usuario is not None:
+                try:
+                    return await eventos(scope, receive, send, usuario)
+                except Delegar:
+                    pass
+        return await fallback(scope, receive, send)
+
+    ruta = buscar_ruta(scope)
+    if ruta is not None:
+        sesion = leer_sesion(scope)
+        user_id = sesion.get("_user_id")
+        if user_id and not sesion.get("_flashes"):
+            vista, version, kwargs = ruta
+            params = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+            motor, replica = await elegir_engine(sesion)
+            token = medicion.set(Medicion(vista.__name__))
+            try:
+                async with AsyncSession(motor, expire_on_commit=False) as db:
+                    usuario = await cargar_usuario(db, int(user_id))
+                    if usuario is not None:
+                        return await servir(scope, send, db, usuario, vista, version, params, kwargs)
+            except Delegar:
+                pass
+            except OperationalError:
+                # Réplica caída (ya marcada por handle_error): Flask elige otra
+                if replica is None:
+                    raise
+            finally:
+                medicion.reset(token)
+
+    return await fallback(scope, receive, send)
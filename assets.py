@@ -0,0 +1,117 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+
+from flask import request, url_for, send_from_directory, abort
+
+try:
+    import brotli
+except ImportError:  # opcional: sin el paquete Brotli sólo se generan .gz
+    brotli = None
+
+
+# --- Pipeline de estáticos ---
+# Copia static/css y static/js a static/dist con el hash del contenido en el
+# nombre, genera variantes .gz/.br precomprimidas y un manifest.json. Las
+# plantillas usan asset_url('css/login.css'), que resuelve al nombre con hash;
+# al cambiar el contenido cambia la URL, por eso se pueden servir con caché
+# de un año. La compilación es un paso del despliegue ("flask build-assets");
+# ASSETS_AUTO_BUILD=1 la repite al arrancar (desarrollo).
+
+BUNDLE_DIRS = ("css", "js")
+DIST_DIR = "dist"
+MANIFEST = "manifest.json"
+MAX_AGE = 365 * 24 * 3600
+
+
+def _write_atomic(path, data):
+    # Varios workers pueden compilar a la vez: se escribe a un temporal y se renombra
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, "wb") as fh:
+        fh.write(data)
+    # mkstemp crea el fichero con 0600: el servidor web (otro usuario) debe poder leerlo
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, path)
+
+
+def build_assets(static_folder):
+    dist = os.path.join(static_folder, DIST_DIR)
+    manifest = {}
+
+    for carpeta in BUNDLE_DIRS:
+        origen = os.path.join(static_folder, carpeta)
+        if not os.path.isdir(origen):
+            continue
+        os.makedirs(os.path.join(dist, carpeta), exist_ok=True)
+
+        for nombre in sorted(os.listdir(origen)):
+            with open(os.path.join(origen, nombre), "rb") as fh:
+                datos = fh.read()
+            base, ext = os.path.splitext(nombre)
+            digest = hashlib.sha256(datos).hexdigest()[:12]
+            destino = f"{carpeta}/{base}.{digest}{ext}"
+            ruta = os.path.join(dist, destino)
+
+            if not os.path.exists(ruta):
+                _write_atomic(ruta, datos)
+                _write_atomic(ruta + ".gz", gzip.compress(datos, compresslevel=9, mtime=0))
+                if brotli is not None:
+                    _write_atomic(ruta + ".br", brotli.compress(datos, quality=11))
+            manifest[f"{carpeta}/{nombre}"] = destino
+
+    os.makedirs(dist, exist_ok=True)
+    _write_atomic(os.path.join(dist, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode())
+    return manifest
+
+
+def init_assets(app):
+    dist = os.path.join(app.static_folder, DIST_DIR)
+    manifest_path = os.path.join(dist, MANIFEST)
+
+    if app.config.get("ASSETS_AUTO_BUILD"):
+        manifest = build_assets(app.static_folder)
+    elif os.path.exists(manifest_path):
+        with open(manifest_path) as fh:
+            manifest = json.load(fh)
+    else:
+        # Sin "flask build-assets" se sirven los originales de /static
+        app.logger.warning("Sin %s: ejecuta \"flask build-assets\" en el despliegue", manifest_path)
+        manifest = {}
+
+    def asset_url(path):
+        hashed = manifest.get(path)
+        if hashed is None:
+            return url_for("static", filename=path)
+        return url_for("assets", filename=hashed)
+
+    app.jinja_env.globals["asset_url"] = asset_url
+
+    @app.route("/assets/<path:filename>")
+    def assets(filename):
+        if filename not in manifest.values():
+            abort(404)
+
+        aceptadas = request.accept_encodings
+        variante, encoding = filename, None
+        for ext, enc in ((".br", "br"), (".gz", "gzip")):
+            if aceptadas[enc] and os.path.exists(os.path.join(dist, filename + ext)):
+                variante, encoding = filename + ext, enc
+                break
+
+        mimetype = "text/css" if filename.endswith(".css") else "application/javascript"
+        response = send_from_directory(dist, variante, mimetype=mimetype, max_age=MAX_AGE)
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        response.headers["Vary"] = "Accept-Encoding"
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+
+    @app.cli.command("build-assets")
+    def build_assets_command():
+        generados = build_assets(app.static_folder)
+        print(f"{len(generados)} ficheros estáticos generados.")
+
+    return manifest
@@ -0,0 +1,119 @@
+"""Benchmark de concurrencia: despliegue WSGI (gunicorn) frente a ASGI (uvicorn).
+
+Lanza la misma carga de lecturas autenticadas contra dos servidores ya
+arrancados y compara peticiones/seg y latencias p50/p95/p99 a varios
+niveles de concurrencia. La cookie de sesión se obtiene con un login real.
+
+    gunicorn -w 4 -k gthread --threads 8 -b :8000 "app:create_app()"
+    uvicorn asgi:app --workers 4 --port 8001
+    python benchmarks/async_vs_sync.py --email w@x --password ... \\
+        [--sync http://localhost:8000] [--async http://localhost:8001]
+"""
+import argparse
+import http.client
+import statistics
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+
+
+RUTAS_WORKER = ["/proyectow", "/solicitudes", "/trabajospendientes"]
+RUTAS_BOSS = ["/solicitudes", "/proyectob"]
+
+
+def conectar(base):
+    partes = urlsplit(base)
+    if partes.scheme == "https":
+        return http.client.HTTPSConnection(partes.netloc, timeout=30)
+    return http.client.HTTPConnection(partes.netloc, timeout=30)
+
+
+def login(base, email, password):
+    conn = conectar(base)
+    conn.request(
+        "POST", "/login",
+        body=urlencode({"email": email, "password": password}),
+        headers={"Content-Type": "application/x-www-form-urlencoded"}
+    )
+    r = conn.getresponse()
+    r.read()
+    for nombre, valor in r.getheaders():
+        if nombre.lower() == "set-cookie" and valor.startswith("session="):
+            return valor.split(";", 1)[0]
+    raise SystemExit(f"Login fallido en {base} (HTTP {r.status})")
+
+
+def carga(base, cookie, rutas, concurrencia, segundos):
+    latencias = []
+    errores = [0]
+    lock = threading.Lock()
+    fin = time.perf_counter() + segundos
+
+    def cliente(n):
+        conn = conectar(base)
+        propias = []
+        i = n
+        while time.perf_counter() < fin:
+            ruta = rutas[i % len(rutas)]
+            i += 1
+            inicio = time.perf_counter()
+            try:
+                conn.request("GET", ruta, headers={"Cookie": cookie, "Accept-Encoding": "gzip"})
+                r = conn.getresponse()
+                r.read()
+                if r.status != 200:
+                    with lock:
+                        errores[0] += 1
+            except (OSError, http.client.HTTPException):
+                with lock:
+                    errores[0] += 1
+                conn.close()
+                conn = conectar(base)
+                continue
+            propias.append(time.perf_counter() - inicio)
+        with lock:
+            latencias.extend(propias)
+
+    hilos = [threading.Thread(target=cliente, args=(n,)) for n in range(concurrencia)]
+    inicio = time.perf_counter()
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    return latencias, errores[0], time.perf_counter() - inicio
+
+
+def percentil(valores, p):
+    if len(valores) < 2:
+        return valores[0] if valores else 0.0
+    return statistics.quantiles(valores, n=100, method="inclusive")[p - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sync", dest="base_sync", default="http://localhost:8000")
+    parser.add_argument("--async", dest="base_async", default="http://localhost:8001")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--boss", action="store_true", help="la cuenta es Boss")
+    parser.add_argument("--concurrencia", default="1,8,32,64")
+    parser.add_argument("--segundos", type=float, default=10)
+    args = parser.parse_args()
+
+    rutas = RUTAS_BOSS if args.boss else RUTAS_WORKER
+    niveles = [int(n) for n in args.concurrencia.split(",")]
+
+    print(f"{'servidor':<8} {'conc':>5} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errores':>8}")
+    for nombre, base in (("sync", args.base_sync), ("async", args.base_async)):
+        cookie = login(base, args.email, args.password)
+        for concurrencia in niveles:
+            latencias, errores, duracion = carga(base, cookie, rutas, concurrencia, args.segundos)
+            ms = [l * 1000 for l in latencias]
+            print(
+                f"{nombre:<8} {concurrencia:>5} {len(latencias) / duracion:>9.1f} "
+                f"{percentil(ms, 50):>8.1f} {percentil(ms, 95):>8.1f} {percentil(ms, 99):>8.1f} {errores:>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
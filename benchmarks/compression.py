@@ -0,0 +1,98 @@
+"""Benchmark de compresión sobre las plantillas reales.
+
+Renderiza cada página con datos de ejemplo y mide, por codificación
+disponible, el tamaño resultante, el tiempo de compresión y el tiempo de
+transferencia estimado en enlaces lentos.
+
+    python benchmarks/compression.py [--repeticiones 50] [--items 20]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from flask import render_template
+
+from app import create_app
+from compression import available_encodings, compress
+
+
+ENLACES_KBPS = {"3G": 750, "4G": 10000}
+
+
+def datos_ejemplo(n):
+    fecha = datetime(2026, 1, 1).strftime("%Y-%m-%d")
+    texto = "Desarrollo de una aplicación web con Flask y PostgreSQL para gestión de proyectos. " * 3
+    proyecto = lambda i: {
+        "id": i, "titulo": f"Proyecto {i}", "descripcion": texto, "fecha_limite": fecha,
+        "postulaciones": i % 7, "proyecto": f"Proyecto {i}", "worker": f"Trabajador {i}",
+        "estado": "pending", "fecha": fecha, "cliente": f"Empresa {i}", "pago": 1500, "status": "pending",
+    }
+    lista = [proyecto(i) for i in range(n)]
+    return {
+        "index.html": {},
+        "quienessomos.html": {},
+        "porque.html": {},
+        "login.html": {},
+        "proyectow.html": {"proyectos": lista, "next_cursor": "x", "primera_pagina": True},
+        "proyectob.html": {"activos": lista, "finalizados": lista[: n // 4]},
+        "solicitudes.html": {"postulaciones": lista, "is_boss": True},
+        "trabajospendientes.html": {"pendientes": lista, "completados": lista[: n // 4]},
+        "detallesolicitud.html": {
+            "solicitud": {"id": 1, "proyecto": "Proyecto", "descripcion": texto, "categoria": "Lima",
+                          "fecha_entrega": fecha, "presupuesto": 1500},
+            "postulaciones": lista,
+        },
+    }
+
+
+def medir(datos, encoding, level, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        salida = compress(datos, encoding, level)
+        tiempos.append(time.perf_counter() - inicio)
+    return len(salida), statistics.median(tiempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeticiones", type=int, default=50)
+    parser.add_argument("--items", type=int, default=20)
+    parser.add_argument("--nivel", type=int, default=6)
+    args = parser.parse_args()
+
+    app = create_app()
+    encodings = available_encodings()
+    usuario = SimpleNamespace(is_authenticated=True, user_type="employee", name="Demo")
+
+    cabecera = f"{'plantilla':26} {'original':>9}"
+    for enc in encodings:
+        cabecera += f" {enc + ' bytes':>11} {enc + ' ms':>8}"
+    for enlace in ENLACES_KBPS:
+        cabecera += f" {enlace + ' ahorro ms':>14}"
+    print(cabecera)
+
+    with app.test_request_context():
+        for plantilla, contexto in datos_ejemplo(args.items).items():
+            html = render_template(plantilla, current_user=usuario, **contexto).encode()
+            fila = f"{plantilla:26} {len(html):>9}"
+            mejor = len(html)
+            for enc in encodings:
+                tam, seg = medir(html, enc, args.nivel, args.repeticiones)
+                mejor = min(mejor, tam)
+                fila += f" {tam:>11} {seg * 1000:>8.3f}"
+            for kbps in ENLACES_KBPS.values():
+                ahorro_ms = (len(html) - mejor) * 8 / kbps
+                fila += f" {ahorro_ms:>14.1f}"
+            print(fila)
+
+
+if __name__ == "__main__":
+    main()
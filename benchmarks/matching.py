@@ -0,0 +1,69 @@
+"""Benchmark del índice de afinidad: construcción, consultas y actualizaciones.
+
+Indexa perfiles y ofertas sintéticos (los mismos generadores que flask seed,
+sin base de datos) y mide la latencia de "ofertas recomendadas" para un
+worker, "mejores candidatos" para una oferta y la actualización incremental
+de un documento.
+
+    python benchmarks/matching.py [--workers 100000] [--ofertas 50000] [--consultas 500]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from matching import TermIndex, tokenize
+from seed import generar_workers, generar_ofertas
+
+
+def percentil(valores, p):
+    return statistics.quantiles(valores, n=100, method="inclusive")[p - 1]
+
+
+def medir(nombre, funcion, argumentos):
+    tiempos = []
+    for arg in argumentos:
+        inicio = time.perf_counter()
+        funcion(arg)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    print(f"{nombre:<28} p50 {percentil(tiempos, 50):6.2f} ms   p99 {percentil(tiempos, 99):6.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=100000)
+    parser.add_argument("--ofertas", type=int, default=50000)
+    parser.add_argument("--consultas", type=int, default=500)
+    parser.add_argument("--semilla", type=int, default=42)
+    args = parser.parse_args()
+
+    workers = [(w[0], w[3]) for w in generar_workers(args.semilla, 1, 1, args.workers, datetime.now())]
+    cerradas = bytearray(args.ofertas)
+    ofertas = [
+        (o[0], o[2], o[3])
+        for o in generar_ofertas(args.semilla, 1, (1, 1000), args.ofertas, cerradas, datetime.now())
+    ]
+
+    indice_workers, indice_ofertas = TermIndex(), TermIndex()
+    inicio = time.perf_counter()
+    indice_workers.cargar({employee_id: tokenize(skills) for employee_id, skills in workers})
+    indice_ofertas.cargar({
+        offer_id: tokenize(titulo) + tokenize(descripcion) for offer_id, titulo, descripcion in ofertas
+    })
+    print(f"Construcción: {len(workers)} workers y {len(ofertas)} ofertas en {time.perf_counter() - inicio:.1f}s\n")
+
+    n = args.consultas
+    medir("ofertas recomendadas", lambda w: indice_ofertas.top(tokenize(w[1]), 5), workers[:n])
+    medir("mejores candidatos", lambda o: indice_workers.top(tokenize(o[1]) + tokenize(o[2]), 5), ofertas[:n])
+    medir("afinidad de 50 postulantes", lambda o: indice_workers.top(
+        tokenize(o[1]) + tokenize(o[2]), 50, entre=[w[0] for w in workers[:50]]
+    ), ofertas[:n])
+    medir("actualizar un worker", lambda w: indice_workers.add(w[0], tokenize(w[1]) + ["rust"]), workers[:n])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Benchmark de hashing de contraseñas: logins/seg por núcleo.
+
+Mide la verificación (lo que cuesta cada login) para varios métodos y
+costes de werkzeug, primero en el propio proceso y después a través del
+pool de procesos de PasswordHasher.
+
+    python benchmarks/password_hashing.py [--segundos 3] [--workers N]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from passwords import PasswordHasher
+
+
+METODOS = [
+    "scrypt:32768:8:1",
+    "scrypt:16384:8:1",
+    "pbkdf2:sha256:600000",
+    "pbkdf2:sha256:260000",
+]
+
+
+def logins_por_segundo(hasher, password_hash, segundos, concurrencia=1):
+    fin = time.perf_counter() + segundos
+
+    def bucle():
+        n = 0
+        while time.perf_counter() < fin:
+            hasher.verify(password_hash, "contraseña-de-prueba")
+            n += 1
+        return n
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrencia) as ex:
+        total = sum(ex.map(lambda _: bucle(), range(concurrencia)))
+    return total / (time.perf_counter() - inicio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--segundos", type=float, default=3)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    print(f"{'método':24} {'inline/núcleo':>14} {'pool total':>11} {'pool/núcleo':>12}")
+    for metodo in METODOS:
+        inline = PasswordHasher(method=metodo)
+        password_hash = inline.hash("contraseña-de-prueba")
+        por_nucleo = logins_por_segundo(inline, password_hash, args.segundos)
+
+        pool = PasswordHasher(method=metodo, workers=args.workers, queue_limit=args.workers * 2)
+        total = logins_por_segundo(pool, password_hash, args.segundos, concurrencia=args.workers)
+        pool.shutdown()
+
+        print(f"{metodo:24} {por_nucleo:>14.1f} {total:>11.1f} {total / args.workers:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
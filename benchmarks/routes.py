@@ -0,0 +1,427 @@
+"""Benchmark de todas las rutas: latencia, throughput y consultas por petición.
+
+Siembra una base de datos con volúmenes configurables de usuarios, bosses,
+workers, ofertas y postulaciones, inicia sesión con un Boss y un Worker y
+recorre cada ruta de create_app() (GET y POST) con el cliente de pruebas de
+Flask. Por ruta informa p50/p95/p99, peticiones/seg y consultas SQL por
+petición (leídas de la cabecera Server-Timing).
+
+Con --regresion compara contra benchmarks/route_budgets.json y termina con
+código 1 si alguna ruta supera su presupuesto de consultas o de p95, o si
+hay rutas registradas sin escenario. --guardar-presupuestos reescribe el
+fichero con las mediciones actuales (más un margen).
+
+    python benchmarks/routes.py [--workers 200 --ofertas 1000 ...] [--regresion]
+    python benchmarks/routes.py --db postgresql://.../bench --reset
+"""
+import argparse
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict, namedtuple
+from datetime import datetime, timedelta
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+PRESUPUESTOS = os.path.join(RAIZ, "benchmarks", "route_budgets.json")
+PASSWORD = "benchmark"
+
+# Conexiones de larga duración (SSE): su latencia no es comparable
+SIN_MEDIR = {"eventos_sse"}
+
+# rol: anon | boss | worker. ruta, datos y preparar reciben el contexto
+# (ids sembrados) y el número de iteración. preparar se ejecuta fuera de la
+# medición y devuelve claves extra para el contexto (p. ej. una oferta nueva
+# que eliminar). sesion_propia: cliente recién logueado en cada iteración.
+Escenario = namedtuple("Escenario", "rol metodo ruta datos preparar json sesion_propia")
+
+
+def escenario(rol, metodo, ruta, datos=None, preparar=None, json=False, sesion_propia=False):
+    return Escenario(rol, metodo, ruta, datos, preparar, json, sesion_propia)
+
+
+# --- Siembra ---
+
+def sembrar(db, volumenes, password_hash, semilla):
+    from sqlalchemy import insert
+    from models import User, Boss, Employee, JobOffer, Application
+
+    rnd = random.Random(semilla)
+    ahora = datetime.now()
+
+    def insertar(modelo, columna, filas):
+        ids = []
+        for i in range(0, len(filas), 1000):
+            ids += db.session.scalars(
+                insert(modelo).returning(columna, sort_by_parameter_order=True), filas[i:i + 1000]
+            ).all()
+        return ids
+
+    def usuarios(tipo, n):
+        return insertar(User, User.user_id, [{
+            "name": f"bench {tipo} {i}",
+            "email": f"bench-{tipo}-{i}@example.com",
+            "password_hash": password_hash,
+            "user_type": tipo,
+        } for i in range(n)])
+
+    boss_users = usuarios("boss", volumenes.bosses)
+    worker_users = usuarios("employee", volumenes.workers)
+    boss_ids = insertar(Boss, Boss.boss_id, [{
+        "user_id": uid, "name": f"bench boss {i}", "contact": "CTO", "phone": "600000000",
+        "address": f"Empresa {i}",
+    } for i, uid in enumerate(boss_users)])
+    employee_ids = insertar(Employee, Employee.employee_id, [{
+        "user_id": uid, "name": f"bench employee {i}", "skills": "python, sql",
+        "experience": "Experiencia de prueba", "resume": "",
+    } for i, uid in enumerate(worker_users)])
+
+    ofertas = []
+    for i in range(volumenes.ofertas):
+        fecha = ahora - timedelta(minutes=rnd.randrange(365 * 24 * 60))
+        ofertas.append({
+            # La primera oferta de cada boss queda abierta para los escenarios
+            "boss_id": boss_ids[i % len(boss_ids)],
+            "title": f"Proyecto {i} {rnd.choice(['web', 'móvil', 'datos', 'diseño'])}",
+            "description": "Descripción del proyecto de prueba " * rnd.randint(1, 5),
+            "salary": rnd.randint(100, 5000),
+            "location": rnd.choice(["Madrid", "Lima", "CDMX", "Remoto"]),
+            "publish_date": fecha,
+            "updated_at": fecha,
+            "status": "open" if i < len(boss_ids) or rnd.random() < 0.7 else "closed",
+        })
+    offer_ids = insertar(JobOffer, JobOffer.offer_id, ofertas)
+
+    pares = set()
+    # El primer worker tiene postulaciones en todos los estados
+    for j, estado in enumerate(["pending", "accepted", "completed", "rejected"]):
+        pares.add((employee_ids[0], offer_ids[j % len(offer_ids)], estado))
+    vistos = {(e, o) for e, o, _ in pares}
+    limite = min(volumenes.postulaciones, len(employee_ids) * len(offer_ids))
+    while len(pares) < limite:
+        par = (rnd.choice(employee_ids), rnd.choice(offer_ids))
+        if par not in vistos:
+            vistos.add(par)
+            pares.add(par + (rnd.choices(["pending", "accepted", "rejected", "completed"], [6, 2, 1, 1])[0],))
+    insertar(Application, Application.application_id, [{
+        "employee_id": e, "offer_id": o, "status": estado,
+        "application_date": ahora, "updated_at": ahora,
+    } for e, o, estado in sorted(pares)])
+    db.session.commit()
+
+    return {
+        "boss_email": "bench-boss-0@example.com",
+        "worker_email": "bench-employee-0@example.com",
+        "boss_id": boss_ids[0],
+        "employee_id": employee_ids[0],
+    }
+
+
+def contexto_escenarios(db, ctx):
+    from models import JobOffer, Application
+
+    oferta = JobOffer.query.filter_by(boss_id=ctx["boss_id"]).order_by(JobOffer.offer_id).first()
+    postulacion = (
+        Application.query.join(Application.job_offer)
+        .filter(JobOffer.boss_id == ctx["boss_id"])
+        .order_by(Application.application_id).first()
+    )
+    aceptada = Application.query.filter_by(employee_id=ctx["employee_id"], status="accepted").first()
+    ctx.update(
+        oferta_boss=oferta.offer_id,
+        postulacion_boss=postulacion.application_id if postulacion else 0,
+        postulacion_worker=aceptada.application_id,
+    )
+    return ctx
+
+
+def nueva_oferta(db, boss_id, status="open"):
+    from models import JobOffer
+
+    oferta = JobOffer(boss_id=boss_id, title="Oferta temporal", description="x", status=status,
+                      publish_date=datetime.now())
+    db.session.add(oferta)
+    db.session.commit()
+    return oferta.offer_id
+
+
+# --- Escenarios ---
+
+def escenarios(db, asset):
+    return [
+        escenario("anon", "GET", "/"),
+        escenario("anon", "GET", "/quienessomos"),
+        escenario("anon", "GET", "/porque"),
+        escenario("anon", "GET", "/registroa"),
+        escenario("anon", "GET", "/registro"),
+        escenario("anon", "GET", "/registrob"),
+        escenario("anon", "GET", "/login"),
+        escenario("anon", "POST", "/login",
+                  datos=lambda c, i: {"email": c["worker_email"], "password": PASSWORD}),
+        escenario("anon", "POST", "/registrar_worker", datos=lambda c, i: {
+            "nombre": "Nuevo", "apellidos": f"Worker {i}", "correo": f"bench-nuevo-w{i}@example.com",
+            "usuario": f"nuevo{i}", "password": PASSWORD}),
+        escenario("anon", "POST", "/registrar_boss", datos=lambda c, i: {
+            "nombre": "Nuevo", "apellidos": f"Boss {i}", "correo": f"bench-nuevo-b{i}@example.com",
+            "password": PASSWORD, "empresa": "Empresa", "telefono": "600", "cargo": "CEO"}),
+        escenario("anon", "GET", "/metrics"),
+        escenario("anon", "GET", asset),
+
+        escenario("boss", "GET", "/perfilb"),
+        escenario("boss", "GET", "/editar_perfil_boss"),
+        escenario("boss", "POST", "/editar_perfil_boss", datos=lambda c, i: {
+            "nombre": "bench boss 0", "empresa": "Empresa 0", "cargo": "CTO", "telefono": "600000000"}),
+        escenario("boss", "GET", "/proyectob"),
+        escenario("boss", "GET", "/crearproyecto"),
+        escenario("boss", "POST", "/crearproyecto", datos=lambda c, i: {
+            "titulo": f"Proyecto nuevo {i}", "descripcion": "desc", "ubicacion": "Remoto", "presupuesto": "100"}),
+        escenario("boss", "GET", lambda c: f"/detallesolicitud/{c['oferta_boss']}"),
+        escenario("boss", "GET", lambda c: f"/editar_proyecto/{c['oferta_boss']}"),
+        escenario("boss", "POST", lambda c: f"/editar_proyecto/{c['oferta_boss']}", datos=lambda c, i: {
+            "titulo": "Proyecto 0 web", "descripcion": "desc", "ubicacion": "Madrid", "presupuesto": "100"}),
+        escenario("boss", "POST", lambda c: f"/eliminar_proyecto/{c['oferta_temporal']}",
+                  preparar=lambda c: {"oferta_temporal": nueva_oferta(db, c["boss_id"])}),
+        escenario("boss", "POST", "/gestionar_solicitud",
+                  datos=lambda c, i: {"app_id": c["postulacion_boss"], "accion": "rechazar"}),
+        escenario("boss", "POST", "/gestionar_solicitudes", json=True,
+                  datos=lambda c, i: {"accion": "rechazar", "ids": [c["postulacion_boss"]]}),
+        escenario("boss", "GET", "/solicitudes"),
+        escenario("boss", "GET", "/api/v1/mis-ofertas"),
+        escenario("boss", "GET", "/api/v1/mis-ofertas.csv"),
+        escenario("boss", "GET", "/api/v1/postulaciones"),
+        escenario("boss", "GET", "/api/v1/postulaciones.ndjson"),
+        escenario("boss", "GET", "/logout", sesion_propia=True),
+
+        escenario("worker", "GET", "/perfilw"),
+        escenario("worker", "GET", "/editar_perfil_worker"),
+        escenario("worker", "POST", "/editar_perfil_worker", datos=lambda c, i: {
+            "nombre": "bench employee 0", "profesion": "python, sql", "experiencia": "Experiencia de prueba"}),
+        escenario("worker", "GET", "/proyectow"),
+        escenario("worker", "GET", "/buscar?q=proyecto&ubicacion=Remoto"),
+        escenario("worker", "GET", "/api/v1/ofertas"),
+        escenario("worker", "GET", "/api/v1/ofertas.ndjson"),
+        escenario("worker", "GET", "/solicitudes"),
+        escenario("worker", "POST", "/solicitudes",
+                  preparar=lambda c: {"oferta_temporal": nueva_oferta(db, c["boss_id"])},
+                  datos=lambda c, i: {"proyecto_id": c["oferta_temporal"]}),
+        escenario("worker", "GET", "/trabajospendientes"),
+        escenario("worker", "POST", "/ver_trabajopendiente",
+                  datos=lambda c, i: {"id": c["postulacion_worker"]}),
+        escenario("worker", "POST", "/marcar_completado",
+                  datos=lambda c, i: {"id": c["postulacion_worker"]}),
+    ]
+
+
+# --- Medición ---
+
+QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+def percentil(valores, p):
+    if len(valores) < 2:
+        return valores[0] if valores else 0.0
+    return statistics.quantiles(valores, n=100, method="inclusive")[p - 1]
+
+
+def cliente_logueado(app, email):
+    cliente = app.test_client()
+    r = cliente.post("/login", data={"email": email, "password": PASSWORD})
+    if r.status_code != 302 or "/login" in r.headers.get("Location", ""):
+        raise SystemExit(f"No se pudo iniciar sesión como {email}")
+    return cliente
+
+
+def medir(app, esc, clientes, ctx, repeticiones, calentamiento):
+    latencias, consultas, errores = [], [], 0
+    for i in range(-calentamiento, repeticiones):
+        ctx_i = dict(ctx)
+        if esc.preparar:
+            with app.app_context():
+                ctx_i.update(esc.preparar(ctx_i))
+        if esc.sesion_propia:
+            cliente = cliente_logueado(app, ctx[f"{esc.rol}_email"])
+        else:
+            cliente = clientes[esc.rol]
+        ruta = esc.ruta(ctx_i) if callable(esc.ruta) else esc.ruta
+        kwargs = {}
+        if esc.datos:
+            datos = esc.datos(ctx_i, i)
+            kwargs = {"json": datos} if esc.json else {"data": datos}
+
+        inicio = time.perf_counter()
+        r = cliente.open(ruta, method=esc.metodo, **kwargs)
+        r.get_data()  # las respuestas en streaming se generan al leerlas
+        duracion = time.perf_counter() - inicio
+        r.close()
+
+        if i < 0:
+            continue
+        latencias.append(duracion * 1000)
+        m = QUERIES.search(r.headers.get("Server-Timing", ""))
+        consultas.append(int(m.group(1)) if m else 0)
+        if r.status_code >= 400:
+            errores += 1
+    return latencias, consultas, errores
+
+
+def ruta_de(esc, ctx):
+    # Para mostrar la ruta: los ids que crea preparar aún no existen
+    return esc.ruta(defaultdict(int, ctx)) if callable(esc.ruta) else esc.ruta
+
+
+def endpoint_de(app, esc, ctx):
+    ruta = ruta_de(esc, ctx)
+    adapter = app.url_map.bind("localhost")
+    endpoint, _ = adapter.match(ruta.split("?", 1)[0], method=esc.metodo)
+    return endpoint
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", help="URL de la base de datos (por defecto un SQLite temporal)")
+    parser.add_argument("--reset", action="store_true", help="borra y recrea las tablas de --db")
+    parser.add_argument("--bosses", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=200)
+    parser.add_argument("--ofertas", type=int, default=1000)
+    parser.add_argument("--postulaciones", type=int, default=5000)
+    parser.add_argument("--semilla", type=int, default=1)
+    parser.add_argument("--repeticiones", type=int, default=30)
+    parser.add_argument("--calentamiento", type=int, default=2)
+    parser.add_argument("--solo", help="regex: sólo los escenarios cuyo 'MÉTODO ruta' coincida")
+    parser.add_argument("--presupuestos", default=PRESUPUESTOS)
+    parser.add_argument("--regresion", action="store_true")
+    parser.add_argument("--guardar-presupuestos", action="store_true")
+    parser.add_argument("--margen", type=float, default=2.0, help="factor sobre p95 al guardar presupuestos")
+    parser.add_argument("--json", dest="salida_json", help="escribe los resultados en este fichero")
+    args = parser.parse_args()
+
+    if args.db and not args.reset:
+        parser.error("--db requiere --reset: el benchmark recrea las tablas")
+    os.environ["DATABASE_URL"] = args.db or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+    # Todas las peticiones salen de la misma IP y usuario: sin límites
+    os.environ["RATELIMIT_ENABLED"] = "0"
+    # /metrics ya no está abierto a localhost por defecto; el test client llega desde 127.0.0.1
+    os.environ.setdefault("METRICS_ALLOW_IPS", "127.0.0.1")
+
+    from app import create_app
+    from models import db
+    from migrate import TABLA, migrate
+    from sqlalchemy import text
+
+    app = create_app()
+    volumenes = argparse.Namespace(
+        bosses=max(args.bosses, 1), workers=max(args.workers, 1),
+        ofertas=max(args.ofertas, 4), postulaciones=args.postulaciones
+    )
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        # Como init-db: las migraciones (índice de búsqueda incluido) sobre el esquema nuevo
+        db.session.execute(text(f"DROP TABLE IF EXISTS {TABLA}"))
+        db.session.commit()
+        migrate(app.config["SQLALCHEMY_DATABASE_URI"], log=lambda *a: None)
+        inicio = time.perf_counter()
+        ctx = sembrar(db, volumenes, app.extensions["password_hasher"].hash(PASSWORD), args.semilla)
+        print(f"Siembra: {volumenes.bosses} bosses, {volumenes.workers} workers, {volumenes.ofertas} ofertas, "
+              f"{volumenes.postulaciones} postulaciones en {time.perf_counter() - inicio:.1f}s")
+        ctx = contexto_escenarios(db, ctx)
+        # El índice de afinidad se construye en segundo plano: aquí se espera
+        # a tenerlo para medir las páginas con recomendaciones completas
+        app.extensions["matching"].construir()
+
+    with app.test_request_context():
+        asset = app.jinja_env.globals["asset_url"]("css/index.css")
+
+    clientes = {
+        "anon": app.test_client(use_cookies=False),
+        "boss": cliente_logueado(app, ctx["boss_email"]),
+        "worker": cliente_logueado(app, ctx["worker_email"]),
+    }
+
+    lista = escenarios(db, asset)
+
+    cubiertos = {endpoint_de(app, e, ctx) for e in lista}
+    sin_escenario = sorted(
+        r.endpoint for r in app.url_map.iter_rules()
+        if r.endpoint != "static" and r.endpoint not in cubiertos and r.endpoint not in SIN_MEDIR
+    )
+
+    resultados = {}
+    print(f"\n{'ruta':<38} {'n':>4} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'q/pet':>6} {'q max':>6} {'err':>4}")
+    for esc in lista:
+        ruta = ruta_de(esc, ctx)
+        clave = f"{esc.metodo} {esc.rol} {endpoint_de(app, esc, ctx)}"
+        if args.solo and not re.search(args.solo, f"{esc.metodo} {ruta}"):
+            continue
+        # Sin app context alrededor: cada petición debe tener el suyo (g, sesión)
+        latencias, consultas, errores = medir(
+            app, esc, clientes, ctx, args.repeticiones, args.calentamiento
+        )
+        total_s = sum(latencias) / 1000
+        resultados[clave] = {
+            "ruta": ruta,
+            "n": len(latencias),
+            "req_s": len(latencias) / total_s if total_s else 0.0,
+            "p50_ms": percentil(latencias, 50),
+            "p95_ms": percentil(latencias, 95),
+            "p99_ms": percentil(latencias, 99),
+            "queries": statistics.median(consultas) if consultas else 0,
+            "queries_max": max(consultas, default=0),
+            "errores": errores,
+        }
+        r = resultados[clave]
+        print(f"{esc.metodo + ' ' + ruta:<38.38} {r['n']:>4} {r['req_s']:>8.1f} {r['p50_ms']:>8.1f} "
+              f"{r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['queries']:>6g} {r['queries_max']:>6} {errores:>4}")
+
+    total = sum(r["n"] for r in resultados.values())
+    segundos = sum(r["n"] / r["req_s"] for r in resultados.values() if r["req_s"])
+    print(f"\nTotal: {total} peticiones, {total / segundos if segundos else 0:.1f} req/s (secuencial, en proceso)")
+    if sin_escenario:
+        print("Rutas sin escenario: " + ", ".join(sin_escenario))
+
+    if args.salida_json:
+        with open(args.salida_json, "w") as fh:
+            json.dump(resultados, fh, indent=2, sort_keys=True)
+
+    if args.guardar_presupuestos:
+        presupuestos = {
+            clave: {"queries": r["queries_max"], "p95_ms": round(r["p95_ms"] * args.margen, 1)}
+            for clave, r in resultados.items()
+        }
+        with open(args.presupuestos, "w") as fh:
+            json.dump(presupuestos, fh, indent=2, sort_keys=True)
+            fh.write("\n")
+        print(f"Presupuestos guardados en {args.presupuestos}")
+
+    if args.regresion:
+        with open(args.presupuestos) as fh:
+            presupuestos = json.load(fh)
+        fallos = [f"sin escenario: {e}" for e in sin_escenario]
+        for clave, r in resultados.items():
+            limite = presupuestos.get(clave)
+            if limite is None:
+                fallos.append(f"{clave}: sin presupuesto")
+                continue
+            if r["errores"]:
+                fallos.append(f"{clave}: {r['errores']} respuestas con error")
+            if "queries" in limite and r["queries_max"] > limite["queries"]:
+                fallos.append(f"{clave}: {r['queries_max']} consultas (presupuesto {limite['queries']})")
+            if "p95_ms" in limite and r["p95_ms"] > limite["p95_ms"]:
+                fallos.append(f"{clave}: p95 {r['p95_ms']:.1f} ms (presupuesto {limite['p95_ms']} ms)")
+        if fallos:
+            print("\nREGRESIÓN:")
+            for fallo in fallos:
+                print(f"  - {fallo}")
+            sys.exit(1)
+        print("\nSin regresiones.")
+
+
+if __name__ == "__main__":
+    main()
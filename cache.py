@@ -0,0 +1,252 @@
+import socket
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from urllib.parse import urlencode, urlparse
+
+from flask import request, session, current_app, make_response
+
+
+# --- Caché compartida para respuestas y fragmentos renderizados ---
+# Backends: "memory://" (por proceso) y "redis://host:puerto/db" (protocolo
+# RESP, compartido entre workers). La invalidación es por espacio de nombres:
+# cada espacio tiene un número de versión que forma parte de la clave, así
+# invalidar es un único INCR y las entradas viejas caducan solas por TTL.
+#
+# Con "memory://" invalidar sólo afecta al proceso que lo hace: los demás
+# workers de gunicorn y el proceso "flask worker" (p. ej. expirar_ofertas)
+# no se enteran y sirven lo guardado hasta que caduque. Con más de un
+# proceso hay que usar Redis.
+
+class CacheError(Exception):
+    pass
+
+
+class CacheUnavailable(CacheError):
+    pass
+
+
+class MemoryBackend:
+    def __init__(self, maxsize=2048):
+        self.maxsize = maxsize
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        # Contadores de incr() (versiones de los espacios de nombres) aparte:
+        # la LRU no los expulsa, o las entradas de la versión anterior
+        # volverían a ser válidas
+        self.contadores = {}
+
+    def get(self, key):
+        with self.lock:
+            if key in self.contadores:
+                return str(self.contadores[key]).encode()
+            entrada = self.entries.get(key)
+            if entrada is None:
+                return None
+            valor, expira = entrada
+            if expira is not None and expira < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return valor
+
+    def set(self, key, value, ttl=None):
+        expira = time.monotonic() + ttl if ttl else None
+        with self.lock:
+            self.entries[key] = (value, expira)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+            self.contadores.pop(key, None)
+
+    def incr(self, key):
+        with self.lock:
+            self.contadores[key] = self.contadores.get(key, 0) + 1
+            return self.contadores[key]
+
+
+class RedisBackend:
+    def __init__(self, host="localhost", port=6379, db=0, password=None, timeout=0.5, retry_after=5):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        # Tras un fallo de conexión no se reintenta hasta pasados retry_after
+        # segundos, para no pagar el timeout en cada petición.
+        self.retry_after = retry_after
+        self.down_until = 0.0
+        # Una conexión por hilo: el protocolo no admite peticiones intercaladas
+        self.local = threading.local()
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        partes = urlparse(url)
+        db = int(partes.path.lstrip("/") or 0)
+        return cls(partes.hostname or "localhost", partes.port or 6379, db, partes.password, **kwargs)
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self.local.sock = sock
+        self.local.reader = sock.makefile("rb")
+        if self.password:
+            self._send("AUTH", self.password)
+        if self.db:
+            self._send("SELECT", self.db)
+
+    def _close(self):
+        sock = getattr(self.local, "sock", None)
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+        self.local.sock = None
+
+    def _send(self, *args):
+        partes = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode()
+            partes.append(f"${len(arg)}\r\n".encode() + arg + b"\r\n")
+        self.local.sock.sendall(b"".join(partes))
+        return self._read_reply()
+
+    def _read_reply(self):
+        linea = self.local.reader.readline()
+        if not linea:
+            raise CacheError("Conexión cerrada por el servidor")
+        tipo, resto = linea[:1], linea[1:-2]
+        if tipo == b"+":
+            return resto
+        if tipo == b"-":
+            raise CacheError(resto.decode(errors="replace"))
+        if tipo == b":":
+            return int(resto)
+        if tipo == b"$":
+            largo = int(resto)
+            if largo < 0:
+                return None
+            datos = self.local.reader.read(largo + 2)
+            return datos[:-2]
+        if tipo == b"*":
+            largo = int(resto)
+            if largo < 0:
+                return None
+            return [self._read_reply() for _ in range(largo)]
+        raise CacheError(f"Respuesta desconocida: {linea!r}")
+
+    def command(self, *args):
+        if time.monotonic() < self.down_until:
+            raise CacheUnavailable("Redis no disponible")
+        try:
+            if getattr(self.local, "sock", None) is None:
+                self._connect()
+            return self._send(*args)
+        except OSError:
+            self._close()
+            self.down_until = time.monotonic() + self.retry_after
+            raise
+        except CacheError:
+            self._close()
+            raise
+
+    def get(self, key):
+        return self.command("GET", key)
+
+    def set(self, key, value, ttl=None):
+        if ttl:
+            self.command("SET", key, value, "EX", int(ttl))
+        else:
+            self.command("SET", key, value)
+
+    def delete(self, key):
+        self.command("DEL", key)
+
+    def incr(self, key):
+        return self.command("INCR", key)
+
+
+def create_backend(url):
+    if not url or url.startswith("memory://"):
+        return MemoryBackend()
+    if url.startswith("redis://"):
+        return RedisBackend.from_url(url)
+    raise ValueError(f"Backend de caché no soportado: {url}")
+
+
+class Cache:
+    def __init__(self, backend, default_ttl=60, prefix="ws"):
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self.prefix = prefix
+
+    # Un fallo del backend (p. ej. Redis caído) nunca debe tumbar la petición:
+    # se registra y se comporta como un fallo de caché.
+    def _safe(self, operacion, *args):
+        try:
+            return operacion(*args)
+        except CacheUnavailable:
+            return None
+        except (OSError, CacheError) as e:
+            current_app.logger.warning("Error de caché: %s", e)
+            return None
+
+    def _key(self, namespace, key):
+        version = self._safe(self.backend.get, f"{self.prefix}:ns:{namespace}") or b"0"
+        return f"{self.prefix}:{namespace}:{int(version)}:{key}"
+
+    def get(self, namespace, key):
+        return self._safe(self.backend.get, self._key(namespace, key))
+
+    def set(self, namespace, key, value, ttl=None):
+        self._safe(self.backend.set, self._key(namespace, key), value, ttl or self.default_ttl)
+
+    def delete(self, namespace, key):
+        self._safe(self.backend.delete, self._key(namespace, key))
+
+    def invalidate(self, *namespaces):
+        for namespace in namespaces:
+            self._safe(self.backend.incr, f"{self.prefix}:ns:{namespace}")
+
+    def fragment(self, namespace, key, render, ttl=None):
+        html = self.get(namespace, key)
+        if html is not None:
+            return html.decode("utf-8")
+        html = render()
+        self.set(namespace, key, html.encode("utf-8"), ttl)
+        return html
+
+    def cached_response(self, namespace, ttl=None, key_func=None, params=()):
+        # Clave: la ruta y sólo los parámetros de "params" (los que cambian la
+        # página); con cualquier otro una query string aleatoria crearía una
+        # entrada nueva en cada petición
+        def clave():
+            valores = [(p, v) for p in params for v in request.args.getlist(p)]
+            return request.path + ("?" + urlencode(valores) if valores else "")
+
+        def decorator(f):
+            @wraps(f)
+            def wrap(*args, **kwargs):
+                # Sólo GET sin mensajes flash pendientes: la página no debe
+                # guardar ni ocultar los avisos de otro usuario.
+                if request.method != "GET" or session.get("_flashes"):
+                    return f(*args, **kwargs)
+
+                key = key_func() if key_func else clave()
+                guardado = self.get(namespace, key)
+                if guardado is not None:
+                    mimetype, _, cuerpo = guardado.partition(b"\n")
+                    return current_app.response_class(cuerpo, mimetype=mimetype.decode())
+
+                response = make_response(f(*args, **kwargs))
+                if response.status_code == 200 and not response.is_streamed:
+                    self.set(namespace, key, response.mimetype.encode() + b"\n" + response.get_data(), ttl)
+                return response
+            return wrap
+        return decorator
@@ -0,0 +1,162 @@
+import gzip
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # opcional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # opcional
+    zstandard = None
+
+
+# --- Compresión de respuestas ---
+# Negocia br / zstd / gzip según Accept-Encoding y los módulos instalados.
+# No toca respuestas pequeñas, ya comprimidas o de ficheros (send_file).
+# Las respuestas en streaming se comprimen trozo a trozo con flush para no
+# retrasar la entrega. Las demás guardan su versión comprimida en una LRU
+# acotada por bytes, con el hash del cuerpo como clave (lleven ETag o no): la
+# siguiente respuesta idéntica no vuelve a comprimir.
+#
+# text/event-stream no se comprime: cada evento tendría que forzar un flush
+# del compresor y algunos proxies retienen el stream comprimido.
+
+COMPRESSIBLE = {
+    "text/html", "text/css", "text/plain", "text/csv",
+    "application/json", "application/javascript", "application/x-ndjson",
+}
+
+
+def available_encodings():
+    encodings = []
+    if brotli is not None:
+        encodings.append("br")
+    if zstandard is not None:
+        encodings.append("zstd")
+    encodings.append("gzip")
+    return encodings
+
+
+def choose_encoding(accept_encodings, encodings):
+    mejor, mejor_q = None, 0
+    for enc in encodings:  # en orden de preferencia ante empate
+        q = accept_encodings.quality(enc)
+        if q > mejor_q:
+            mejor, mejor_q = enc, q
+    return mejor
+
+
+def compress(data, encoding, level):
+    if encoding == "br":
+        return brotli.compress(data, quality=min(level, 11))
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def stream_compressor(encoding, level):
+    # Devuelve (comprimir_trozo, terminar)
+    if encoding == "br":
+        c = brotli.Compressor(quality=min(level, 11))
+        return (lambda trozo: c.process(trozo) + c.flush()), c.finish
+    if encoding == "zstd":
+        c = zstandard.ZstdCompressor(level=level).compressobj()
+        return (lambda trozo: c.compress(trozo) + c.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)), c.flush
+    c = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return (lambda trozo: c.compress(trozo) + c.flush(zlib.Z_SYNC_FLUSH)), c.flush
+
+
+class CompressedCache:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        with self.lock:
+            datos = self.entries.get(key)
+            if datos is not None:
+                self.entries.move_to_end(key)
+            return datos
+
+    def put(self, key, datos):
+        if len(datos) > self.max_bytes:
+            return
+        with self.lock:
+            anterior = self.entries.pop(key, None)
+            if anterior is not None:
+                self.size -= len(anterior)
+            self.entries[key] = datos
+            self.size += len(datos)
+            while self.size > self.max_bytes:
+                _, viejo = self.entries.popitem(last=False)
+                self.size -= len(viejo)
+
+
+def init_compression(app):
+    min_size = app.config.get("COMPRESS_MIN_SIZE", 500)
+    level = app.config.get("COMPRESS_LEVEL", 6)
+    cache = CompressedCache(app.config.get("COMPRESS_CACHE_BYTES", 8 * 1024 * 1024))
+    encodings = available_encodings()
+
+    @app.after_request
+    def _compress_response(response):
+        if (
+            response.status_code != 200
+            or response.direct_passthrough
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE
+        ):
+            return response
+
+        encoding = choose_encoding(request.accept_encodings, encodings)
+        response.vary.add("Accept-Encoding")
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            comprimir, terminar = stream_compressor(encoding, level)
+            original = response.response
+
+            def generar():
+                for trozo in original:
+                    if isinstance(trozo, str):
+                        trozo = trozo.encode("utf-8")
+                    salida = comprimir(trozo)
+                    if salida:
+                        yield salida
+                yield terminar()
+
+            response.response = generar()
+            response.headers.pop("Content-Length", None)
+        else:
+            datos = response.get_data()
+            if len(datos) < min_size:
+                return response
+
+            # Hashear es mucho más barato que comprimir
+            clave = (hashlib.blake2b(datos, digest_size=16).digest(), encoding)
+            comprimido = cache.get(clave)
+            if comprimido is None:
+                comprimido = compress(datos, encoding, level)
+                cache.put(clave, comprimido)
+            if len(comprimido) >= len(datos):
+                return response
+            response.set_data(comprimido)
+
+        response.headers["Content-Encoding"] = encoding
+        # Otra representación del mismo recurso: el ETag pasa a débil, como hace nginx
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    return cache
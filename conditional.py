@@ -0,0 +1,155 @@
+import hashlib
+from functools import wraps
+
+from flask import request, session, make_response, current_app
+from flask_login import current_user
+from sqlalchemy import func, select, update
+
+from models import db, Employee, Boss, JobOffer, Application, Version
+
+
+# --- Peticiones condicionales (ETag / Last-Modified) ---
+# Antes de ejecutar la vista se consulta una "versión" barata de los datos:
+# max(updated_at) sobre columnas indexadas de lo que muestra la página, sin
+# contar filas. Los borrados no cambian ningún máximo, así que incrementan
+# la fila "borrados" de versiones (registrar_borrado). Si la versión coincide
+# con la del cliente se responde 304 sin cargar filas ni renderizar.
+
+BORRADOS = "borrados"
+
+
+def registrar_borrado():
+    actualizadas = db.session.execute(
+        update(Version).where(Version.nombre == BORRADOS).values(valor=Version.valor + 1),
+        execution_options={"synchronize_session": False}
+    ).rowcount
+    # Esquema creado con create_all sin pasar por la migración 0008
+    if not actualizadas:
+        db.session.add(Version(nombre=BORRADOS, valor=1))
+
+
+def _max(columna, *condiciones):
+    return select(func.max(columna)).where(*condiciones).scalar_subquery()
+
+
+def _borrados():
+    return select(Version.valor).where(Version.nombre == BORRADOS).scalar_subquery()
+
+
+# Cada consulta de versión es un SELECT de una fila: fechas (updated_at
+# máximos) y, al final, el contador de borrados. asgi.py ejecuta las mismas
+# con su sesión async.
+
+def consulta_ofertas_worker(employee_id):
+    # /proyectow incluye recomendaciones: dependen también del perfil del
+    # worker y de dónde se ha postulado. Una sola consulta.
+    return select(
+        _max(JobOffer.updated_at),
+        select(Employee.updated_at).where(Employee.employee_id == employee_id).scalar_subquery(),
+        _max(Application.updated_at, Application.employee_id == employee_id),
+        _borrados()
+    )
+
+
+def consulta_ofertas_boss(boss_id, *extra):
+    # Postulaciones nuevas y cambios de estado actualizan
+    # applications_updated_at de su oferta (application_actions.tocar_ofertas)
+    de_boss = JobOffer.boss_id == boss_id
+    return select(
+        _max(JobOffer.updated_at, de_boss),
+        _max(JobOffer.applications_updated_at, de_boss),
+        *extra,
+        _borrados()
+    )
+
+
+def consulta_postulaciones_boss(boss_id):
+    # Además muestra el nombre de cada postulante: basta el máximo global
+    # (indexado) de employees.updated_at
+    return consulta_ofertas_boss(boss_id, _max(Employee.updated_at))
+
+
+def consulta_postulaciones_worker(employee_id):
+    # Ofertas y bosses de las postulaciones del worker: acotado por sus
+    # propias postulaciones (índice employee_id, updated_at)
+    de_worker = Application.employee_id == employee_id
+    ofertas = select(Application.offer_id).where(de_worker)
+    bosses = select(JobOffer.boss_id).where(JobOffer.offer_id.in_(ofertas))
+    return select(
+        _max(Application.updated_at, de_worker),
+        _max(JobOffer.updated_at, JobOffer.offer_id.in_(ofertas)),
+        _max(Boss.updated_at, Boss.boss_id.in_(bosses)),
+        _borrados()
+    )
+
+
+def version_de(fila):
+    # (última modificación para Last-Modified, firma para el ETag)
+    fechas = [f for f in fila[:-1] if f is not None]
+    return (max(fechas) if fechas else None), tuple(fila)
+
+
+def _version(consulta):
+    return version_de(db.session.execute(consulta).one())
+
+
+def version_ofertas_worker(employee_id):
+    return _version(consulta_ofertas_worker(employee_id))
+
+
+def version_ofertas_boss(boss_id):
+    return _version(consulta_ofertas_boss(boss_id))
+
+
+def version_postulaciones_boss(boss_id):
+    return _version(consulta_postulaciones_boss(boss_id))
+
+
+def version_postulaciones_worker(employee_id):
+    return _version(consulta_postulaciones_worker(employee_id))
+
+
+def calcular_etag(user_id, full_path, firma):
+    # La página depende del usuario y de la URL (cursor, filtros)
+    clave = repr((user_id, full_path, firma))
+    return hashlib.sha1(clave.encode()).hexdigest()
+
+
+def no_modificado(etag, ultima, if_none_match, if_modified_since):
+    if if_none_match:
+        # If-None-Match usa comparación débil: la respuesta comprimida
+        # lleva el mismo ETag marcado como W/
+        return if_none_match.contains_weak(etag)
+    if ultima and if_modified_since:
+        return if_modified_since.replace(tzinfo=None) >= ultima
+    return False
+
+
+def conditional_get(version_func):
+    def decorator(f):
+        @wraps(f)
+        def wrap(*args, **kwargs):
+            # Con avisos flash pendientes la página debe renderizarse para mostrarlos
+            if request.method != "GET" or session.get("_flashes"):
+                return f(*args, **kwargs)
+
+            ultima, firma = version_func()
+            etag = calcular_etag(current_user.get_id(), request.full_path, firma)
+            ultima = ultima.replace(microsecond=0) if ultima else None
+
+            if no_modificado(etag, ultima, request.if_none_match, request.if_modified_since):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            if ultima:
+                response.last_modified = ultima
+            # Páginas privadas: el navegador puede guardarlas pero debe revalidar
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            return response
+        return wrap
+    return decorator
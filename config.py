@@ -7,3 +7,119 @@ DATABASE_URL = os.environ.get("DATABASE_URL",
 SECRET_KEY = os.environ.get("SECRET_KEY", "dev-secret-key")
 SQLALCHEMY_DATABASE_URI = DATABASE_URL
 SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+# Tamaño de página del listado de proyectos abiertos (/proyectow)
+PROYECTOS_POR_PAGINA = int(os.environ.get("PROYECTOS_POR_PAGINA", 20))
+
+# Consultas más lentas que este umbral (ms) se registran en el log con su ruta
+SLOW_QUERY_MS = int(os.environ.get("SLOW_QUERY_MS", 200))
+
+# Acceso a /metrics (y al puerto de métricas del worker): cabecera
+# "Authorization: Bearer <METRICS_TOKEN>" o una IP de METRICS_ALLOW_IPS (IPs o
+# redes separadas por comas). Por defecto ninguna IP: hace falta el token (con
+# un proxy en la misma máquina todas las peticiones llegarían desde 127.0.0.1).
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+METRICS_ALLOW_IPS = [u.strip() for u in os.environ.get("METRICS_ALLOW_IPS", "").split(",") if u.strip()]
+
+# Caché de identidad de load_user: número máximo de usuarios y TTL en segundos
+IDENTITY_CACHE_SIZE = int(os.environ.get("IDENTITY_CACHE_SIZE", 1024))
+IDENTITY_CACHE_TTL = int(os.environ.get("IDENTITY_CACHE_TTL", 300))
+
+# Caché de páginas y fragmentos: "memory://" o "redis://host:6379/0".
+# "memory://" es por proceso, también al invalidar: sólo vale con un único
+# proceso web y sin "flask worker".
+CACHE_URL = os.environ.get("CACHE_URL", "memory://")
+CACHE_DEFAULT_TTL = int(os.environ.get("CACHE_DEFAULT_TTL", 60))
+
+# Recompilar los estáticos con hash al arrancar (sólo desarrollo: en el despliegue se ejecuta "flask build-assets")
+ASSETS_AUTO_BUILD = os.environ.get("ASSETS_AUTO_BUILD", "0") == "1"
+
+# Compresión de respuestas: tamaño mínimo (bytes), nivel y memoria para variantes comprimidas (por hash del cuerpo)
+COMPRESS_MIN_SIZE = int(os.environ.get("COMPRESS_MIN_SIZE", 500))
+COMPRESS_LEVEL = int(os.environ.get("COMPRESS_LEVEL", 6))
+COMPRESS_CACHE_BYTES = int(os.environ.get("COMPRESS_CACHE_BYTES", 8 * 1024 * 1024))
+
+# Hash de contraseñas: método/coste de werkzeug y pool de procesos opcional
+# (PASSWORD_HASH_WORKERS=0 calcula en el propio worker)
+PASSWORD_HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", 0))
+PASSWORD_HASH_QUEUE_LIMIT = int(os.environ.get("PASSWORD_HASH_QUEUE_LIMIT", 32))
+
+# Segundos que se recuerda un identificador de login inexistente
+LOGIN_NEGATIVE_TTL = int(os.environ.get("LOGIN_NEGATIVE_TTL", 60))
+
+# Pool de conexiones. Con gunicorn el total es workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 5))
+DB_POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", 10))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "1") == "1"
+# Límite por transacción (ms, 0 = sin límite) y modo compatible con PgBouncer (pool por transacción)
+DB_STATEMENT_TIMEOUT_MS = int(os.environ.get("DB_STATEMENT_TIMEOUT_MS", 5000))
+DB_PGBOUNCER = os.environ.get("DB_PGBOUNCER", "0") == "1"
+
+# Réplicas de lectura (URLs separadas por comas). Tras escribir, el usuario lee
+# del primario durante REPLICA_STICKY_SECONDS.
+DATABASE_REPLICA_URLS = [u.strip() for u in os.environ.get("DATABASE_REPLICA_URLS", "").split(",") if u.strip()]
+REPLICA_STICKY_SECONDS = int(os.environ.get("REPLICA_STICKY_SECONDS", 5))
+REPLICA_CHECK_INTERVAL = int(os.environ.get("REPLICA_CHECK_INTERVAL", 10))
+REPLICA_MAX_LAG_SECONDS = int(os.environ.get("REPLICA_MAX_LAG_SECONDS", 30))
+
+# Migraciones (flask migrate): espera máxima por un bloqueo antes de desistir
+# y reintentar, para no encolar el tráfico detrás de una DDL
+MIGRATE_LOCK_TIMEOUT_MS = int(os.environ.get("MIGRATE_LOCK_TIMEOUT_MS", 3000))
+MIGRATE_RETRIES = int(os.environ.get("MIGRATE_RETRIES", 5))
+
+# Índice de afinidad worker/oferta: cada cuántos segundos un proceso recoge
+# los cambios hechos por otros procesos
+MATCHING_SYNC_SECONDS = int(os.environ.get("MATCHING_SYNC_SECONDS", 30))
+
+# API de lectura (/api/v1): tamaño de página por defecto y máximo, y filas
+# por lote (yield_per) en las exportaciones NDJSON/CSV
+API_POR_PAGINA = int(os.environ.get("API_POR_PAGINA", 50))
+API_MAX_POR_PAGINA = int(os.environ.get("API_MAX_POR_PAGINA", 500))
+API_EXPORT_LOTE = int(os.environ.get("API_EXPORT_LOTE", 1000))
+
+# Notificaciones en tiempo real (/eventos). Desactivadas por defecto: con
+# workers WSGI síncronos cada conexión abierta ocupa un hilo. Activarlas sólo
+# con gunicorn gthread/gevent o sirviendo /eventos desde asgi.py. Sin ellas
+# las páginas no cargan eventos.js y se actualizan recargando.
+# "auto" usa LISTEN/NOTIFY si la base de datos es PostgreSQL y pub/sub en
+# memoria (un solo proceso) si no. Latido y duración máxima de cada conexión
+# SSE en segundos.
+EVENTOS_ENABLED = os.environ.get("EVENTOS_ENABLED", "0") == "1"
+EVENTOS_BACKEND = os.environ.get("EVENTOS_BACKEND", "auto")
+EVENTOS_CANAL = os.environ.get("EVENTOS_CANAL", "workspace_eventos")
+SSE_HEARTBEAT_SECONDS = int(os.environ.get("SSE_HEARTBEAT_SECONDS", 15))
+SSE_MAX_SECONDS = int(os.environ.get("SSE_MAX_SECONDS", 300))
+
+# Cola de tareas en segundo plano (flask worker): espera entre consultas
+# cuando no hay trabajo, tareas por reclamo, segundos tras los que se
+# recupera una tarea de un worker caído y espera exponencial de reintentos
+JOBS_POLL_SECONDS = float(os.environ.get("JOBS_POLL_SECONDS", 1))
+JOBS_LOTE = int(os.environ.get("JOBS_LOTE", 10))
+JOBS_VISIBILITY_SECONDS = int(os.environ.get("JOBS_VISIBILITY_SECONDS", 300))
+JOBS_BACKOFF_BASE = int(os.environ.get("JOBS_BACKOFF_BASE", 10))
+JOBS_BACKOFF_MAX = int(os.environ.get("JOBS_BACKOFF_MAX", 3600))
+# Tareas periódicas: segundos entre ejecuciones (0 = desactivada) y retención
+JOBS_PERIODO_EXPIRAR = int(os.environ.get("JOBS_PERIODO_EXPIRAR", 3600))
+JOBS_PERIODO_CONTADORES = int(os.environ.get("JOBS_PERIODO_CONTADORES", 6 * 3600))
+JOBS_PERIODO_LIMPIEZA = int(os.environ.get("JOBS_PERIODO_LIMPIEZA", 24 * 3600))
+JOBS_RETENCION_HORAS = int(os.environ.get("JOBS_RETENCION_HORAS", 72))
+# Ofertas abiertas más de estos días se cierran (0 = nunca)
+OFERTAS_EXPIRAN_DIAS = int(os.environ.get("OFERTAS_EXPIRAN_DIAS", 60))
+
+# Límite de peticiones (token bucket, ratelimit.py): "memory://" o
+# "redis://..." (por defecto el mismo servidor que la caché). Límites como
+# "N/segundos"; vacío o "0" desactiva esa regla. RATELIMIT_LOGIN_CUENTA es
+# por cuenta e IP (no bloquea a la víctima desde otras IPs).
+RATELIMIT_ENABLED = os.environ.get("RATELIMIT_ENABLED", "1") == "1"
+RATELIMIT_URL = os.environ.get("RATELIMIT_URL", CACHE_URL)
+RATELIMIT_LOGIN_IP = os.environ.get("RATELIMIT_LOGIN_IP", "20/60")
+RATELIMIT_LOGIN_CUENTA = os.environ.get("RATELIMIT_LOGIN_CUENTA", "10/300")
+RATELIMIT_REGISTRO_IP = os.environ.get("RATELIMIT_REGISTRO_IP", "10/3600")
+RATELIMIT_SOLICITUDES_USUARIO = os.environ.get("RATELIMIT_SOLICITUDES_USUARIO", "60/3600")
+RATELIMIT_SOLICITUDES_IP = os.environ.get("RATELIMIT_SOLICITUDES_IP", "200/3600")
+# Proxies de confianza delante de la aplicación (nginx, balanceador): la IP
+# del cliente se toma de X-Forwarded-For saltando estos saltos
+PROXY_HOPS = int(os.environ.get("PROXY_HOPS", 0))
@@ -0,0 +1,121 @@
+import threading
+import time
+
+from flask import g, current_app, has_app_context, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+# --- Configuración del engine y del pool de conexiones ---
+# Tamaño, overflow, timeout, reciclado y pre-ping configurables; statement_timeout
+# por transacción (SET LOCAL, compatible con PgBouncer en modo transacción) y
+# métricas del pool (conexiones en uso, overflow, tiempo de espera) en /metrics.
+
+class PoolStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.max_wait = 0.0
+        self.timeouts = 0
+
+    def observe(self, segundos, timeout=False):
+        with self.lock:
+            self.waits += 1
+            self.wait_seconds += segundos
+            self.max_wait = max(self.max_wait, segundos)
+            if timeout:
+                self.timeouts += 1
+
+
+pool_stats = PoolStats()
+
+
+class _EsperaMedida:
+    # Mide cuánto espera cada checkout por una conexión libre
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            conexion = super()._do_get()
+        except PoolTimeoutError:
+            pool_stats.observe(time.perf_counter() - inicio, timeout=True)
+            raise
+        pool_stats.observe(time.perf_counter() - inicio)
+        return conexion
+
+
+class TimedQueuePool(_EsperaMedida, QueuePool):
+    pass
+
+
+# create_async_engine no admite pools síncronos: la misma medición sobre la
+# cola de asyncio (asgi.py)
+class TimedAsyncQueuePool(_EsperaMedida, AsyncAdaptedQueuePool):
+    pass
+
+
+# Mismo servidor con el driver async (asgi.py)
+def async_database_url(uri):
+    esquema, resto = uri.split("://", 1)
+    if esquema in ("postgresql", "postgres", "postgresql+psycopg2", "postgresql+psycopg"):
+        return "postgresql+asyncpg://" + resto
+    if esquema == "sqlite":
+        return "sqlite+aiosqlite://" + resto
+    return uri
+
+
+def engine_options(uri, config, use_async=False):
+    if uri.startswith("sqlite"):
+        return {}
+
+    opciones = {
+        "poolclass": TimedAsyncQueuePool if use_async else TimedQueuePool,
+        "pool_size": config["DB_POOL_SIZE"],
+        "max_overflow": config["DB_MAX_OVERFLOW"],
+        "pool_timeout": config["DB_POOL_TIMEOUT"],
+        "pool_recycle": config["DB_POOL_RECYCLE"],
+        "pool_pre_ping": config["DB_POOL_PRE_PING"],
+    }
+    # PgBouncer en modo transacción no conserva sentencias preparadas entre
+    # transacciones. psycopg2 no las usa; asyncpg las cachea por defecto.
+    if config["DB_PGBOUNCER"] and use_async:
+        opciones["connect_args"] = {"statement_cache_size": 0, "prepared_statement_cache_size": 0}
+    return opciones
+
+
+def _set_statement_timeout(conn):
+    if conn.dialect.name != "postgresql" or not has_app_context():
+        return
+    timeout = current_app.config.get("DB_STATEMENT_TIMEOUT_MS", 0)
+    if has_request_context():
+        timeout = g.get("statement_timeout_ms", timeout)
+    if timeout:
+        conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout)}")
+
+
+def pool_metrics_lines():
+    pool = current_app.extensions["sqlalchemy"].engine.pool
+    lineas = []
+    if isinstance(pool, QueuePool):
+        lineas += [
+            "# TYPE db_pool_size gauge", f"db_pool_size {pool.size()}",
+            "# TYPE db_pool_checked_out gauge", f"db_pool_checked_out {pool.checkedout()}",
+            "# TYPE db_pool_checked_in gauge", f"db_pool_checked_in {pool.checkedin()}",
+            "# TYPE db_pool_overflow gauge", f"db_pool_overflow {pool.overflow()}",
+        ]
+    with pool_stats.lock:
+        lineas += [
+            "# TYPE db_pool_wait_seconds_total counter", f"db_pool_wait_seconds_total {pool_stats.wait_seconds:.6f}",
+            "# TYPE db_pool_checkouts_total counter", f"db_pool_checkouts_total {pool_stats.waits}",
+            "# TYPE db_pool_max_wait_seconds gauge", f"db_pool_max_wait_seconds {pool_stats.max_wait:.6f}",
+            "# TYPE db_pool_timeouts_total counter", f"db_pool_timeouts_total {pool_stats.timeouts}",
+        ]
+    return lineas
+
+
+def init_database(app, metrics):
+    if not event.contains(Engine, "begin", _set_statement_timeout):
+        event.listen(Engine, "begin", _set_statement_timeout)
+    metrics.collectors.append(pool_metrics_lines)
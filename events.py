@@ -0,0 +1,273 @@
+import json
+import queue
+import select
+import threading
+import time
+from collections import defaultdict, namedtuple
+
+from flask import Response, current_app, has_app_context
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.pool import NullPool
+
+from replicas import RoutingSession
+
+
+# --- Notificaciones en tiempo real (Server-Sent Events) ---
+# Cada usuario con una página abierta mantiene una conexión GET /eventos
+# (EventSource) y recibe los cambios de sus postulaciones: el worker cuando
+# se las aceptan o rechazan, el boss cuando alguien se postula a una de sus
+# ofertas o marca un trabajo como completado. Así las páginas no tienen que
+# recargarse para enterarse.
+#
+# Las vistas llaman a publicar() antes del commit: el evento sale sólo si la
+# transacción se confirma. Backends:
+# - "memory": pub/sub dentro del proceso. Vale para desarrollo, tests o un
+#   único worker; los eventos no cruzan procesos.
+# - "postgres": el evento viaja con NOTIFY dentro de la propia transacción.
+#   Cada proceso tiene un hilo con una conexión propia en LISTEN que reparte
+#   los avisos a sus suscriptores, así llega aunque el usuario esté conectado
+#   a otro worker.
+#
+# Una conexión SSE ocupa un hilo mientras está abierta: con gunicorn hay que
+# usar worker_class gthread o gevent, o servir /eventos desde asgi.py (una
+# corrutina por conexión). Las conexiones se cierran cada SSE_MAX_SECONDS y
+# el navegador reconecta solo. Por eso todo esto está detrás de
+# EVENTOS_ENABLED (desactivado por defecto).
+
+Evento = namedtuple("Evento", "canal tipo datos")
+
+PENDIENTES = "eventos_pendientes"
+COLA_MAX = 100
+RETRY_MS = 3000
+
+
+def canal_de(rol, item_id):
+    return f"{rol}:{item_id}"
+
+
+def canal_usuario(usuario):
+    if usuario.user_type == "boss" and usuario.boss_id:
+        return canal_de("boss", usuario.boss_id)
+    if usuario.user_type == "employee" and usuario.employee_id:
+        return canal_de("worker", usuario.employee_id)
+    return None
+
+
+def publicar(session, rol, item_id, tipo, **datos):
+    # Se entrega al hacer commit la sesión; un rollback lo descarta. Con
+    # EVENTOS_ENABLED desactivado no hay broker y no se hace nada.
+    if _broker() is None:
+        return
+    session.info.setdefault(PENDIENTES, []).append(Evento(canal_de(rol, item_id), tipo, datos))
+
+
+def formato_sse(evento):
+    return f"event: {evento.tipo}\ndata: {json.dumps(evento.datos, ensure_ascii=False)}\n\n"
+
+
+class MemoryBroker:
+    # Los eventos se entregan al confirmarse la transacción (after_commit)
+    transaccional = False
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.suscriptores = defaultdict(set)
+        self.publicados = 0
+        self.entregados = 0
+        self.descartados = 0
+
+    def suscribir(self, canal, entregar):
+        # entregar(evento) se llama desde el hilo que publica: no debe bloquear
+        with self.lock:
+            self.suscriptores[canal].add(entregar)
+
+        def baja():
+            with self.lock:
+                activos = self.suscriptores.get(canal)
+                if activos is not None:
+                    activos.discard(entregar)
+                    if not activos:
+                        del self.suscriptores[canal]
+        return baja
+
+    def conexiones(self):
+        with self.lock:
+            return sum(len(s) for s in self.suscriptores.values())
+
+    def repartir(self, evento):
+        with self.lock:
+            destinos = list(self.suscriptores.get(evento.canal, ()))
+        for entregar in destinos:
+            try:
+                entregar(evento)
+                self.entregados += 1
+            except queue.Full:
+                # Cliente que no lee: se pierde el evento, no se frena al resto
+                self.descartados += 1
+
+    def publicar(self, session, eventos):
+        self.publicados += len(eventos)
+        for evento in eventos:
+            self.repartir(evento)
+
+    def metrics_lines(self):
+        return [
+            "# TYPE events_published_total counter",
+            f"events_published_total {self.publicados}",
+            "# TYPE events_delivered_total counter",
+            f"events_delivered_total {self.entregados}",
+            "# TYPE events_dropped_total counter",
+            f"events_dropped_total {self.descartados}",
+            "# TYPE sse_connections gauge",
+            f"sse_connections {self.conexiones()}",
+        ]
+
+
+class PostgresBroker(MemoryBroker):
+    # Los eventos se envían con NOTIFY antes del commit (before_commit)
+    transaccional = True
+
+    def __init__(self, uri, canal_pg, logger):
+        super().__init__()
+        self.uri = uri
+        self.canal_pg = canal_pg
+        self.logger = logger
+        self.hilo = None
+        self.arranque = threading.Lock()
+
+    def suscribir(self, canal, entregar):
+        self._arrancar()
+        return super().suscribir(canal, entregar)
+
+    def publicar(self, session, eventos):
+        # Una sola sentencia para todos los eventos de la transacción
+        cargas = [json.dumps([e.canal, e.tipo, e.datos], ensure_ascii=False) for e in eventos]
+        session.execute(
+            text("SELECT pg_notify(:canal, carga) FROM unnest(CAST(:cargas AS text[])) AS carga"),
+            {"canal": self.canal_pg, "cargas": cargas}
+        )
+        self.publicados += len(eventos)
+
+    def _arrancar(self):
+        # El hilo de LISTEN sólo hace falta si este proceso tiene suscriptores
+        if self.hilo is not None:
+            return
+        with self.arranque:
+            if self.hilo is None:
+                self.hilo = threading.Thread(target=self._escuchar, name="eventos-listen", daemon=True)
+                self.hilo.start()
+
+    def _escuchar(self):
+        engine = create_engine(self.uri, poolclass=NullPool)
+        espera = 1
+        while True:
+            try:
+                conexion = engine.raw_connection()
+                try:
+                    dbapi = conexion.dbapi_connection
+                    dbapi.autocommit = True
+                    cursor = dbapi.cursor()
+                    cursor.execute(f'LISTEN "{self.canal_pg}"')
+                    espera = 1
+                    while True:
+                        if select.select([dbapi], [], [], 30) == ([], [], []):
+                            continue
+                        dbapi.poll()
+                        while dbapi.notifies:
+                            aviso = dbapi.notifies.pop(0)
+                            canal_evento, tipo, datos = json.loads(aviso.payload)
+                            self.repartir(Evento(canal_evento, tipo, datos))
+                finally:
+                    conexion.invalidate()
+            except Exception as e:
+                # Mientras no hay conexión se pierden los eventos: los clientes
+                # recargan el estado al reconectar
+                self.logger.warning("LISTEN de eventos caído, reintento en %ss: %s", espera, e)
+                time.sleep(espera)
+                espera = min(espera * 2, 30)
+
+
+def create_broker(backend, uri, canal_pg, logger):
+    if backend == "auto":
+        backend = "postgres" if uri.startswith("postgres") else "memory"
+    if backend == "postgres":
+        return PostgresBroker(uri, canal_pg, logger)
+    if backend == "memory":
+        return MemoryBroker()
+    raise ValueError(f"EVENTOS_BACKEND no válido: {backend}")
+
+
+# --- Entrega ligada a la transacción ---
+
+def _broker():
+    return current_app.extensions.get("eventos") if has_app_context() else None
+
+
+def _antes_commit(session):
+    broker = _broker()
+    if broker is not None and broker.transaccional and session.info.get(PENDIENTES):
+        broker.publicar(session, session.info.pop(PENDIENTES))
+
+
+def _tras_commit(session):
+    eventos = session.info.pop(PENDIENTES, None)
+    broker = _broker()
+    if eventos and broker is not None:
+        broker.publicar(session, eventos)
+
+
+def _tras_rollback(session):
+    session.info.pop(PENDIENTES, None)
+
+
+# --- Respuesta SSE (modo WSGI) ---
+
+def respuesta_sse(broker, canal, heartbeat=15, duracion=300):
+    cola = queue.Queue(maxsize=COLA_MAX)
+    baja = broker.suscribir(canal, cola.put_nowait)
+
+    # Sin stream_with_context: la conexión no retiene el contexto de la
+    # petición ni una conexión a la base de datos
+    def generar():
+        try:
+            yield f"retry: {RETRY_MS}\n\n"
+            fin = time.monotonic() + duracion
+            while True:
+                restante = fin - time.monotonic()
+                if restante <= 0:
+                    return
+                try:
+                    evento = cola.get(timeout=min(heartbeat, restante))
+                except queue.Empty:
+                    # Comentario SSE: mantiene viva la conexión en proxies y
+                    # detecta clientes que ya se fueron
+                    yield ": ping\n\n"
+                    continue
+                yield formato_sse(evento)
+        finally:
+            baja()
+
+    response = Response(generar(), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"  # nginx: no acumular la respuesta
+    return response
+
+
+def init_eventos(app):
+    if not app.config["EVENTOS_ENABLED"]:
+        app.extensions["eventos"] = None
+        return None
+    broker = create_broker(
+        app.config["EVENTOS_BACKEND"],
+        app.config["SQLALCHEMY_DATABASE_URI"],
+        app.config["EVENTOS_CANAL"],
+        app.logger
+    )
+    app.extensions["eventos"] = broker
+    app.extensions["metrics"].collectors.append(broker.metrics_lines)
+
+    if not event.contains(RoutingSession, "before_commit", _antes_commit):
+        event.listen(RoutingSession, "before_commit", _antes_commit)
+        event.listen(RoutingSession, "after_commit", _tras_commit)
+        event.listen(RoutingSession, "after_rollback", _tras_rollback)
+    return broker
@@ -0,0 +1,103 @@
+import threading
+import time
+from collections import OrderedDict
+
+from flask_login import UserMixin
+
+from models import db, User, Boss, Employee
+
+
+# --- Caché de identidad para load_user ---
+# Guarda una "foto" ligera del usuario (datos básicos + boss_id/employee_id)
+# para que una petición autenticada no haga consultas de identidad.
+# La caché es por proceso: las invalidaciones explícitas sólo afectan al
+# worker que las hace, el TTL acota cuánto tarda en verse un cambio en los demás.
+
+class UserSnapshot(UserMixin):
+    def __init__(self, user_id, name, email, user_type, boss_id=None, employee_id=None):
+        self.user_id = user_id
+        self.name = name
+        self.email = email
+        self.user_type = user_type
+        self.boss_id = boss_id
+        self.employee_id = employee_id
+
+    @property
+    def id(self):
+        return self.user_id
+
+    @classmethod
+    def load(cls, user_id):
+        fila = (
+            db.session.query(
+                User.user_id, User.name, User.email, User.user_type,
+                Boss.boss_id, Employee.employee_id
+            )
+            .outerjoin(Boss, Boss.user_id == User.user_id)
+            .outerjoin(Employee, Employee.user_id == User.user_id)
+            .filter(User.user_id == user_id)
+            .first()
+        )
+        if fila is None:
+            return None
+        return cls(*fila)
+
+
+class IdentityCache:
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id):
+        with self.lock:
+            entrada = self.entries.get(user_id)
+            if entrada is None:
+                self.misses += 1
+                return None
+            snapshot, expira = entrada
+            if expira < time.monotonic():
+                del self.entries[user_id]
+                self.misses += 1
+                return None
+            self.entries.move_to_end(user_id)
+            self.hits += 1
+            return snapshot
+
+    def put(self, user_id, snapshot):
+        with self.lock:
+            self.entries[user_id] = (snapshot, time.monotonic() + self.ttl)
+            self.entries.move_to_end(user_id)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self.lock:
+            self.entries.pop(user_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def load(self, user_id):
+        snapshot = self.get(user_id)
+        if snapshot is None:
+            snapshot = UserSnapshot.load(user_id)
+            if snapshot is not None:
+                self.put(user_id, snapshot)
+        return snapshot
+
+    def metrics_lines(self):
+        with self.lock:
+            tam = len(self.entries)
+        return [
+            "# TYPE identity_cache_hits_total counter",
+            f"identity_cache_hits_total {self.hits}",
+            "# TYPE identity_cache_misses_total counter",
+            f"identity_cache_misses_total {self.misses}",
+            "# TYPE identity_cache_entries gauge",
+            f"identity_cache_entries {tam}",
+        ]
@@ -0,0 +1,150 @@
+import csv
+import json
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice, repeat
+
+from sqlalchemy import insert, select
+from werkzeug.security import generate_password_hash
+
+from models import db, User, Employee, Boss
+
+
+# --- Alta masiva de usuarios (flask import-users) ---
+# Lee CSV o JSONL con las mismas columnas que los formularios de registro:
+#   tipo (worker|boss), nombre, apellidos, correo, password o password_hash,
+#   y opcionalmente empresa, telefono, cargo (boss) o profesion, experiencia (worker).
+# Inserta por lotes: un INSERT multi-fila con RETURNING para los usuarios y
+# otro executemany para los perfiles, con un commit por lote.
+
+ImportResult = namedtuple("ImportResult", "creados omitidos errores")
+
+TIPOS = {"worker": "employee", "employee": "employee", "boss": "boss"}
+
+
+def read_rows(ruta, formato=None):
+    formato = formato or ("jsonl" if ruta.endswith((".jsonl", ".ndjson")) else "csv")
+    with open(ruta, newline="", encoding="utf-8") as fh:
+        if formato == "jsonl":
+            for linea in fh:
+                if linea.strip():
+                    yield json.loads(linea)
+        else:
+            yield from csv.DictReader(fh)
+
+
+def _normalizar(fila):
+    def campo(*nombres):
+        for nombre in nombres:
+            valor = fila.get(nombre)
+            if valor:
+                return str(valor).strip()
+        return ""
+
+    tipo = TIPOS.get(campo("tipo", "user_type").lower())
+    correo = campo("correo", "email").lower()
+    nombre = " ".join(p for p in (campo("nombre"), campo("apellidos")) if p) or campo("name")
+    password = campo("password")
+    password_hash = campo("password_hash")
+
+    if not tipo:
+        raise ValueError("tipo debe ser worker o boss")
+    if not (correo and nombre and (password or password_hash)):
+        raise ValueError("faltan nombre, correo o password")
+
+    perfil = {"name": nombre}
+    if tipo == "boss":
+        perfil.update(contact=campo("cargo"), phone=campo("telefono"), address=campo("empresa"))
+    else:
+        perfil.update(skills=campo("profesion", "skills"), experience=campo("experiencia", "experience"), resume="")
+
+    return {
+        "user": {"name": nombre, "email": correo, "password_hash": password_hash, "user_type": tipo},
+        "password": password,
+        "perfil": perfil,
+    }
+
+
+def _lotes(iterable, tam):
+    it = iter(iterable)
+    while True:
+        lote = list(islice(it, tam))
+        if not lote:
+            return
+        yield lote
+
+
+def import_users(filas, method="scrypt", batch_size=1000, workers=0, log=print):
+    creados = omitidos = errores = 0
+    vistos = set()
+    pool = ProcessPoolExecutor(max_workers=workers) if workers else None
+
+    try:
+        for numero, lote in enumerate(_lotes(filas, batch_size), start=1):
+            validas = []
+            for fila in lote:
+                try:
+                    datos = _normalizar(fila)
+                except ValueError as e:
+                    errores += 1
+                    log(f"Fila inválida ({e}): {fila}")
+                    continue
+                if datos["user"]["email"] in vistos:
+                    omitidos += 1
+                    continue
+                vistos.add(datos["user"]["email"])
+                validas.append(datos)
+
+            if not validas:
+                continue
+
+            existentes = set(db.session.scalars(
+                select(User.email).where(User.email.in_([d["user"]["email"] for d in validas]))
+            ))
+            omitidos += sum(1 for d in validas if d["user"]["email"] in existentes)
+            validas = [d for d in validas if d["user"]["email"] not in existentes]
+            if not validas:
+                continue
+
+            # Hash de las contraseñas en claro, en paralelo si hay pool
+            pendientes = [d for d in validas if not d["user"]["password_hash"]]
+            passwords = [d["password"] for d in pendientes]
+            if pool:
+                hashes = pool.map(generate_password_hash, passwords, repeat(method), chunksize=64)
+            else:
+                hashes = map(generate_password_hash, passwords, repeat(method))
+            for datos, password_hash in zip(pendientes, hashes):
+                datos["user"]["password_hash"] = password_hash
+
+            ids = dict(
+                (email, user_id) for user_id, email in db.session.execute(
+                    insert(User).returning(User.user_id, User.email),
+                    [d["user"] for d in validas]
+                )
+            )
+
+            empleados, jefes = [], []
+            for datos in validas:
+                perfil = dict(datos["perfil"], user_id=ids[datos["user"]["email"]])
+                (jefes if datos["user"]["user_type"] == "boss" else empleados).append(perfil)
+            if empleados:
+                db.session.execute(insert(Employee), empleados)
+            if jefes:
+                db.session.execute(insert(Boss), jefes)
+
+            db.session.commit()
+            creados += len(validas)
+            log(f"Lote {numero}: {len(validas)} usuarios creados ({creados} en total).")
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        if pool:
+            pool.shutdown()
+
+    return ImportResult(creados, omitidos, errores)
+
+
+def default_workers():
+    return max((os.cpu_count() or 1) - 1, 1)
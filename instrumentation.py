@@ -0,0 +1,200 @@
+import hmac
+import ipaddress
+import threading
+import time
+
+from flask import (
+    g, request, current_app, has_app_context, has_request_context, Response, abort,
+    template_rendered, before_render_template
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+# --- Instrumentación por petición ---
+# Cuenta consultas SQL, tiempo en BD, tiempo de render y latencia total por
+# endpoint. Se expone en la cabecera Server-Timing y en /metrics (formato
+# Prometheus). Las métricas son por proceso: con gunicorn cada worker
+# publica las suyas. /metrics sólo responde con METRICS_TOKEN o desde
+# METRICS_ALLOW_IPS (ver metricas_permitidas).
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class EndpointStats:
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.render_seconds = 0.0
+        self.total_seconds = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+
+    def observe(self, queries, db_seconds, render_seconds, total_seconds):
+        self.requests += 1
+        self.queries += queries
+        self.db_seconds += db_seconds
+        self.render_seconds += render_seconds
+        self.total_seconds += total_seconds
+        for i, limite in enumerate(LATENCY_BUCKETS):
+            if total_seconds <= limite:
+                self.buckets[i] += 1
+
+
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.endpoints = {}
+        self.slow_queries = 0
+        # Funciones extra que devuelven líneas en formato Prometheus
+        self.collectors = []
+
+    def observe(self, endpoint, queries, db_seconds, render_seconds, total_seconds):
+        with self.lock:
+            stats = self.endpoints.get(endpoint)
+            if stats is None:
+                stats = self.endpoints[endpoint] = EndpointStats()
+            stats.observe(queries, db_seconds, render_seconds, total_seconds)
+
+    def render(self):
+        lineas = []
+        with self.lock:
+            lineas.append("# TYPE http_requests_total counter")
+            for ep, st in sorted(self.endpoints.items()):
+                lineas.append(f'http_requests_total{{endpoint="{ep}"}} {st.requests}')
+
+            lineas.append("# TYPE http_request_duration_seconds histogram")
+            for ep, st in sorted(self.endpoints.items()):
+                for limite, n in zip(LATENCY_BUCKETS, st.buckets):
+                    lineas.append(f'http_request_duration_seconds_bucket{{endpoint="{ep}",le="{limite}"}} {n}')
+                lineas.append(f'http_request_duration_seconds_bucket{{endpoint="{ep}",le="+Inf"}} {st.requests}')
+                lineas.append(f'http_request_duration_seconds_sum{{endpoint="{ep}"}} {st.total_seconds:.6f}')
+                lineas.append(f'http_request_duration_seconds_count{{endpoint="{ep}"}} {st.requests}')
+
+            lineas.append("# TYPE db_queries_total counter")
+            for ep, st in sorted(self.endpoints.items()):
+                lineas.append(f'db_queries_total{{endpoint="{ep}"}} {st.queries}')
+
+            lineas.append("# TYPE db_time_seconds_total counter")
+            for ep, st in sorted(self.endpoints.items()):
+                lineas.append(f'db_time_seconds_total{{endpoint="{ep}"}} {st.db_seconds:.6f}')
+
+            lineas.append("# TYPE template_render_seconds_total counter")
+            for ep, st in sorted(self.endpoints.items()):
+                lineas.append(f'template_render_seconds_total{{endpoint="{ep}"}} {st.render_seconds:.6f}')
+
+            lineas.append("# TYPE db_slow_queries_total counter")
+            lineas.append(f"db_slow_queries_total {self.slow_queries}")
+
+        for collector in self.collectors:
+            lineas.extend(collector())
+        return "\n".join(lineas) + "\n"
+
+
+def _endpoint():
+    return request.endpoint or "desconocido"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _handle_error(context):
+    # La consulta que falló no llega a after_cursor_execute: sin esto la pila
+    # de la conexión crece y la siguiente mediría desde el inicio equivocado
+    if context.connection is not None and context.connection.info.get("query_start"):
+        context.connection.info["query_start"].pop()
+
+
+def metricas_permitidas(ip, authorization, config):
+    token = config.get("METRICS_TOKEN")
+    if token and authorization and hmac.compare_digest(authorization, f"Bearer {token}"):
+        return True
+    try:
+        direccion = ipaddress.ip_address(ip)
+    except (TypeError, ValueError):
+        return False
+    return any(direccion in ipaddress.ip_network(red, strict=False) for red in config.get("METRICS_ALLOW_IPS", ()))
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    inicio = conn.info["query_start"].pop()
+    duracion = time.perf_counter() - inicio
+
+    if not has_app_context():
+        return
+
+    ruta = None
+    if has_request_context() and "instr_start" in g:
+        g.instr_queries += 1
+        g.instr_db += duracion
+        ruta = _endpoint()
+
+    if duracion * 1000 >= current_app.config.get("SLOW_QUERY_MS", 200):
+        metrics = current_app.extensions["metrics"]
+        with metrics.lock:
+            metrics.slow_queries += 1
+        current_app.logger.warning(
+            "Consulta lenta (%.1f ms) en %s: %s",
+            duracion * 1000, ruta or "-", " ".join(statement.split())
+        )
+
+
+def init_instrumentation(app):
+    # Los eventos se registran una sola vez sobre la clase Engine para cubrir
+    # cualquier engine que cree Flask-SQLAlchemy (incluidos binds adicionales),
+    # aunque create_app() se llame varias veces en el mismo proceso.
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+
+    metrics = Metrics()
+    app.extensions["metrics"] = metrics
+
+    @before_render_template.connect_via(app)
+    def _before_render(sender, template, context, **extra):
+        if "instr_start" in g:
+            g.instr_render_start = time.perf_counter()
+
+    @template_rendered.connect_via(app)
+    def _after_render(sender, template, context, **extra):
+        inicio = g.pop("instr_render_start", None)
+        if inicio is not None:
+            g.instr_render += time.perf_counter() - inicio
+
+    @app.before_request
+    def _start_timer():
+        g.instr_start = time.perf_counter()
+        g.instr_queries = 0
+        g.instr_db = 0.0
+        g.instr_render = 0.0
+
+    @app.after_request
+    def _server_timing(response):
+        if "instr_start" not in g:
+            return response
+        total = time.perf_counter() - g.instr_start
+        response.headers["Server-Timing"] = ", ".join([
+            f'db;dur={g.instr_db * 1000:.1f};desc="{g.instr_queries} queries"',
+            f"render;dur={g.instr_render * 1000:.1f}",
+            f"total;dur={total * 1000:.1f}"
+        ])
+        return response
+
+    # En teardown y no en after_request: también cuenta las peticiones que
+    # terminan en una excepción (500)
+    @app.teardown_request
+    def _record_request(exc):
+        if "instr_start" not in g:
+            return
+        total = time.perf_counter() - g.pop("instr_start")
+        metrics.observe(_endpoint(), g.instr_queries, g.instr_db, g.instr_render, total)
+
+    @app.route("/metrics")
+    def metrics_endpoint():
+        if not metricas_permitidas(request.remote_addr, request.headers.get("Authorization"), app.config):
+            abort(404)
+        return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+    return metrics
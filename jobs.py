@@ -0,0 +1,277 @@
+import json
+import os
+import random
+import socket
+import threading
+import time
+from collections import Counter, namedtuple
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from sqlalchemy import and_, func, insert, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from instrumentation import metricas_permitidas
+from models import db, Job
+
+
+# --- Cola de tareas en segundo plano ---
+# Las vistas encolan trabajo diferido con encolar() dentro de su propia
+# transacción: la tarea existe sólo si la petición hace commit. Uno o varios
+# procesos "flask worker" la ejecutan después:
+#
+# - Reclamar: un UPDATE ... WHERE job_id IN (SELECT ... FOR UPDATE SKIP LOCKED)
+#   marca un lote como "running" y lo confirma enseguida. Varios workers
+#   reclaman a la vez sin esperarse ni repetir filas. Si un worker muere, sus
+#   tareas vuelven a reclamarse pasados JOBS_VISIBILITY_SECONDS.
+# - Ejecutar: la tarea y su paso a "done" van en la misma transacción. Si
+#   falla, rollback y vuelve a "pending" con espera exponencial (con jitter)
+#   hasta agotar max_attempts; entonces queda "failed" con el error.
+# - Periódicas: cada worker encola las tareas con periodo al empezar cada
+#   franja (clave nombre:franja). Con varios workers una franja puede
+#   ejecutarse más de una vez: las tareas tienen que ser idempotentes.
+#
+# En SQLite no hay SKIP LOCKED (se ignora): vale para un solo worker.
+
+Tarea = namedtuple("Tarea", "nombre funcion max_intentos periodo")
+
+TAREAS = {}
+ERROR_MAX = 2000
+
+
+def tarea(nombre, max_intentos=5, periodo=None):
+    # periodo: clave de configuración con los segundos entre ejecuciones
+    # (0 la desactiva)
+    def decorator(f):
+        TAREAS[nombre] = Tarea(nombre, f, max_intentos, periodo)
+        return f
+    return decorator
+
+
+def encolar(nombre, clave=None, retraso=0, **datos):
+    # clave: como mucho una tarea pendiente con esa clave; las repetidas se
+    # descartan (varias postulaciones seguidas -> un solo recálculo)
+    if nombre not in TAREAS:
+        raise ValueError(f"Tarea desconocida: {nombre}")
+    ahora = datetime.utcnow()
+    valores = {
+        "name": nombre,
+        "payload": json.dumps(datos),
+        "status": "pending",
+        "attempts": 0,
+        "max_attempts": TAREAS[nombre].max_intentos,
+        "run_at": ahora + timedelta(seconds=retraso),
+        "unique_key": clave,
+        "created_at": ahora,
+    }
+    if clave is None:
+        stmt = insert(Job).values(**valores)
+    else:
+        dialecto = db.session.get_bind().dialect.name
+        insert_dialecto = pg_insert if dialecto == "postgresql" else sqlite_insert
+        stmt = insert_dialecto(Job).values(**valores).on_conflict_do_nothing(
+            index_elements=["unique_key"], index_where=Job.status == "pending"
+        )
+    db.session.execute(stmt)
+
+
+def espera_reintento(intentos, base, maximo):
+    # Exponencial con jitter: los fallos de una misma causa no reintentan a la vez
+    return min(base * 2 ** (intentos - 1), maximo) * random.uniform(0.5, 1)
+
+
+def estado_cola():
+    return db.session.execute(
+        select(Job.name, Job.status, func.count(Job.job_id), func.min(Job.run_at))
+        .group_by(Job.name, Job.status)
+        .order_by(Job.name, Job.status)
+    ).all()
+
+
+class Worker:
+    def __init__(self, app, lote=10, espera=1.0, visibilidad=300, backoff_base=10, backoff_max=3600):
+        self.app = app
+        self.nombre = f"{socket.gethostname()}:{os.getpid()}"
+        self.lote = lote
+        self.espera = espera
+        self.visibilidad = visibilidad
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.parar = threading.Event()
+        self.franjas = {}
+        self.lock = threading.Lock()
+        self.resultados = Counter()   # (tarea, resultado) -> número
+        self.segundos = Counter()     # tarea -> segundos ejecutando
+
+    # --- Bucle ---
+
+    def run(self, una_vez=False):
+        logger = self.app.logger
+        logger.info("Worker %s: %d tareas registradas", self.nombre, len(TAREAS))
+        ultimo_resumen, hechas = time.monotonic(), 0
+        with self.app.app_context():
+            while not self.parar.is_set():
+                try:
+                    self.programar_periodicas()
+                    trabajos = self.reclamar()
+                    for trabajo in trabajos:
+                        self.ejecutar(*trabajo)
+                except SQLAlchemyError:
+                    # Base de datos caída o reiniciándose: se reintenta en la
+                    # siguiente vuelta; las tareas a medias se recuperan por
+                    # visibilidad
+                    logger.exception("Worker %s: error de base de datos", self.nombre)
+                    db.session.remove()
+                    self.parar.wait(self.espera * 5)
+                    continue
+                hechas += len(trabajos)
+
+                if time.monotonic() - ultimo_resumen >= 60:
+                    segundos = time.monotonic() - ultimo_resumen
+                    logger.info("Worker %s: %d tareas en %.0fs (%.1f/s)", self.nombre, hechas, segundos, hechas / segundos)
+                    ultimo_resumen, hechas = time.monotonic(), 0
+                if una_vez and not trabajos:
+                    return
+                if len(trabajos) < self.lote:
+                    self.parar.wait(self.espera)
+
+    def programar_periodicas(self):
+        ahora = time.time()
+        nuevas = False
+        for t in TAREAS.values():
+            periodo = self.app.config.get(t.periodo, 0) if t.periodo else 0
+            if not periodo:
+                continue
+            franja = int(ahora // periodo)
+            if self.franjas.get(t.nombre) != franja:
+                encolar(t.nombre, clave=f"{t.nombre}:{franja}")
+                self.franjas[t.nombre] = franja
+                nuevas = True
+        if nuevas:
+            db.session.commit()
+
+    def reclamar(self):
+        ahora = datetime.utcnow()
+        listos = (
+            select(Job.job_id)
+            .where(or_(
+                and_(Job.status == "pending", Job.run_at <= ahora),
+                # Reclamadas por un worker que no terminó (caído o colgado)
+                and_(Job.status == "running", Job.locked_at < ahora - timedelta(seconds=self.visibilidad))
+            ))
+            .order_by(Job.run_at)
+            .limit(self.lote)
+            .with_for_update(skip_locked=True)
+        )
+        trabajos = db.session.execute(
+            update(Job)
+            .where(Job.job_id.in_(listos))
+            .values(status="running", locked_by=self.nombre, locked_at=ahora, attempts=Job.attempts + 1)
+            .returning(Job.job_id, Job.name, Job.payload, Job.attempts, Job.max_attempts),
+            execution_options={"synchronize_session": False}
+        ).all()
+        db.session.commit()
+        return sorted(trabajos)
+
+    def _cerrar(self, job_id, **valores):
+        # Sólo si sigue siendo nuestra: tras JOBS_VISIBILITY_SECONDS otro
+        # worker puede haberla reclamado
+        db.session.execute(
+            update(Job)
+            .where(Job.job_id == job_id, Job.status == "running", Job.locked_by == self.nombre)
+            .values(locked_by=None, locked_at=None, **valores),
+            execution_options={"synchronize_session": False}
+        )
+
+    def ejecutar(self, job_id, nombre, payload, intentos, max_intentos):
+        inicio = time.perf_counter()
+        resultado = "ok"
+        try:
+            t = TAREAS.get(nombre)
+            if t is None:
+                raise LookupError(f"Tarea desconocida: {nombre}")
+            if intentos > max_intentos:
+                raise RuntimeError("Reclamada de nuevo tras agotar los intentos")
+            t.funcion(**json.loads(payload))
+            self._cerrar(job_id, status="done", finished_at=datetime.utcnow(), last_error=None)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            error = f"{type(e).__name__}: {e}"[:ERROR_MAX]
+            if intentos >= max_intentos:
+                resultado = "failed"
+                self.app.logger.exception("Tarea %s #%d fallida definitivamente", nombre, job_id)
+                self._cerrar(job_id, status="failed", finished_at=datetime.utcnow(), last_error=error)
+            else:
+                resultado = "retry"
+                espera = espera_reintento(intentos, self.backoff_base, self.backoff_max)
+                self.app.logger.warning(
+                    "Tarea %s #%d falló (intento %d/%d), reintento en %.0fs: %s",
+                    nombre, job_id, intentos, max_intentos, espera, error
+                )
+                # Sin clave: mientras corría pudo encolarse otra pendiente
+                # con la misma, y el índice único no admite dos
+                self._cerrar(
+                    job_id, status="pending", last_error=error, unique_key=None,
+                    run_at=datetime.utcnow() + timedelta(seconds=espera)
+                )
+            db.session.commit()
+        finally:
+            db.session.remove()
+            with self.lock:
+                self.resultados[(nombre, resultado)] += 1
+                self.segundos[nombre] += time.perf_counter() - inicio
+
+    # --- Métricas ---
+
+    def metrics_lines(self):
+        with self.lock:
+            resultados = sorted(self.resultados.items())
+            segundos = sorted(self.segundos.items())
+        lineas = ["# TYPE jobs_processed_total counter"]
+        lineas += [f'jobs_processed_total{{tarea="{n}",resultado="{r}"}} {c}' for (n, r), c in resultados]
+        lineas.append("# TYPE jobs_seconds_total counter")
+        lineas += [f'jobs_seconds_total{{tarea="{n}"}} {s:.6f}' for n, s in segundos]
+
+        # Profundidad de la cola, consultada en cada lectura de /metrics
+        with self.app.app_context():
+            try:
+                filas = estado_cola()
+            finally:
+                db.session.remove()
+        ahora = datetime.utcnow()
+        lineas.append("# TYPE jobs_queue gauge")
+        lineas += [f'jobs_queue{{tarea="{n}",estado="{e}"}} {c}' for n, e, c, _ in filas]
+        lineas.append("# TYPE jobs_oldest_pending_seconds gauge")
+        lineas += [
+            f'jobs_oldest_pending_seconds{{tarea="{n}"}} {max((ahora - primera).total_seconds(), 0):.0f}'
+            for n, e, _, primera in filas if e == "pending"
+        ]
+        return lineas
+
+    def servir_metricas(self, puerto, render):
+        app = self.app
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                # Mismo control de acceso que /metrics
+                if not metricas_permitidas(self.client_address[0], self.headers.get("Authorization"), app.config):
+                    self.send_error(404)
+                    return
+                # Algunos recolectores (pool de conexiones) usan current_app
+                with app.app_context():
+                    cuerpo = render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(cuerpo)))
+                self.end_headers()
+                self.wfile.write(cuerpo)
+
+            def log_message(self, *args):
+                pass
+
+        servidor = ThreadingHTTPServer(("", puerto), Handler)
+        threading.Thread(target=servidor.serve_forever, name="jobs-metrics", daemon=True).start()
+        return servidor
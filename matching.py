@@ -0,0 +1,427 @@
+import math
+import os
+import re
+import threading
+import time
+import unicodedata
+from array import array
+from collections import Counter
+from datetime import datetime, timedelta
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import exists, select
+
+from models import db, Employee, JobOffer, Application
+
+
+# --- Afinidad worker / oferta ---
+# Índice invertido en memoria (por proceso) con dos colecciones: ofertas
+# abiertas (título + descripción) y workers (skills). Lo construye un hilo del
+# proceso, fuera de las peticiones, que arranca con la primera consulta (así
+# cada proceso de gunicorn tiene el suyo aunque se haga fork tras cargar la
+# app). Hasta que está listo las consultas devuelven vacío: sin recomendaciones
+# y con afinidad 0, como si no hubiera coincidencias. Después se mantiene de
+# forma incremental: las vistas que escriben avisan con actualizar_* y, para
+# ver lo que cambian otros procesos, el mismo hilo reindexa cada
+# MATCHING_SYNC_SECONDS las filas con updated_at reciente.
+#
+# Puntuación TF-IDF (coseno): tf logarítmico, idf suavizado. Las postings de
+# cada término son arrays contiguos (slot, tf) que numpy lee sin copiar, así
+# una consulta es una suma vectorizada por término de la consulta y un
+# argpartition, independiente del número de documentos que no comparten
+# términos. Actualizar un documento marca su slot viejo como muerto y añade
+# uno nuevo; cuando la mitad están muertos se compacta.
+#
+# Normas: el idf usa un número de documentos de referencia (n) fijado en la
+# última compactación, así un alta o baja sólo cambia el idf de sus propios
+# términos y se corrige la norma de los documentos que los contienen (norma²
+# = suma de (tf·idf)²). Cuando el número real se aleja mucho de n se compacta
+# y se recalcula todo.
+
+STOPWORDS = set("""
+a al algo ante como con de del desde e el en entre es esta este for from
+hay in is la las lo los mas muy no o of on or para pero por que se ser sin
+sobre su sus the to u un una unas uno unos y ya with años experiencia
+proyecto proyectos cliente sector valora
+""".split())
+
+TOKEN = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+
+
+def tokenize(texto):
+    if not texto:
+        return []
+    texto = unicodedata.normalize("NFKD", texto.lower()).encode("ascii", "ignore").decode()
+    tokens = []
+    for token in TOKEN.findall(texto):
+        token = token.rstrip(".")
+        if len(token) > 1 and token not in STOPWORDS and not token.isdigit():
+            tokens.append(token)
+    return tokens
+
+
+def _idf(n, df):
+    return math.log((n + 1) / (df + 1)) + 1
+
+
+class TermIndex:
+    def __init__(self):
+        self.slot_doc = array("i")     # slot -> doc_id (-1 si está muerto)
+        self.slot_norm2 = array("d")   # slot -> norma² (0 si está muerto)
+        self.doc_slot = {}
+        self.doc_terms = {}
+        self.postings = {}             # término -> (array slots, array tf)
+        self.df = Counter()
+        self.n = 1
+        self.muertos = 0
+
+    def __len__(self):
+        return len(self.doc_slot)
+
+    def idf(self, df):
+        # Con n de referencia pequeño df puede superarlo: el idf nunca baja de 1
+        return _idf(max(self.n, df), df)
+
+    def add(self, doc_id, tokens):
+        self.remove(doc_id)
+        pesos = [(t, 1 + math.log(c)) for t, c in Counter(tokens).items()]
+        if not pesos:
+            return
+        self._ajustar_df([t for t, _ in pesos], 1)
+        self._insertar(doc_id, pesos)
+        self._compactar_si_hace_falta()
+
+    def cargar(self, documentos):
+        # documentos: {doc_id: tokens}. Carga completa: primero df y después
+        # cada norma una sola vez, sin las correcciones incrementales
+        self.reconstruir({
+            doc_id: tuple((t, 1 + math.log(c)) for t, c in Counter(tokens).items())
+            for doc_id, tokens in documentos.items()
+        })
+
+    def reconstruir(self, pesos_por_doc):
+        pesos_por_doc = {d: p for d, p in pesos_por_doc.items() if p}
+        self.__init__()
+        self.n = max(len(pesos_por_doc), 1)
+        for pesos in pesos_por_doc.values():
+            self.df.update(t for t, _ in pesos)
+        for doc_id, pesos in pesos_por_doc.items():
+            self._insertar(doc_id, pesos)
+
+    def _insertar(self, doc_id, pesos):
+        slot = len(self.slot_doc)
+        self.slot_doc.append(doc_id)
+        self.slot_norm2.append(sum((w * self.idf(self.df[t])) ** 2 for t, w in pesos))
+        for t, w in pesos:
+            slots, tfs = self.postings.setdefault(t, (array("i"), array("f")))
+            slots.append(slot)
+            tfs.append(w)
+        self.doc_slot[doc_id] = slot
+        self.doc_terms[doc_id] = tuple(pesos)
+
+    def _ajustar_df(self, terminos, delta):
+        # Cambia el df (y con él el idf) de estos términos y corrige la norma
+        # de los documentos que ya los contienen
+        norma2 = np.frombuffer(self.slot_norm2, dtype=np.float64)
+        vivos = np.frombuffer(self.slot_doc, dtype=np.intc) >= 0
+        for t in terminos:
+            antes = self.df[t]
+            despues = antes + delta
+            if antes and t in self.postings:
+                slots, tfs = self.postings[t]
+                idx = np.frombuffer(slots, dtype=np.intc)
+                tf = np.frombuffer(tfs, dtype=np.float32).astype(np.float64)
+                cambio = tf * tf * (self.idf(despues) ** 2 - self.idf(antes) ** 2)
+                norma2[idx] += np.where(vivos[idx], cambio, 0)
+            if despues:
+                self.df[t] = despues
+            else:
+                del self.df[t]
+
+    def remove(self, doc_id):
+        slot = self.doc_slot.pop(doc_id, None)
+        if slot is None:
+            return
+        self.slot_doc[slot] = -1
+        self._ajustar_df([t for t, _ in self.doc_terms.pop(doc_id)], -1)
+        self.slot_norm2[slot] = 0.0
+        self.muertos += 1
+        self._compactar_si_hace_falta()
+
+    def _compactar_si_hace_falta(self):
+        limite = max(1024, len(self.slot_doc) // 2)
+        if self.muertos > limite or abs(len(self.doc_slot) - self.n) > max(1024, self.n // 2):
+            self.compact()
+
+    def compact(self):
+        # Reconstruye sin slots muertos y con n y normas al día
+        self.reconstruir(self.doc_terms)
+
+    def scores(self, tokens):
+        n = len(self.doc_slot)
+        puntos = np.zeros(len(self.slot_doc), dtype=np.float32)
+        if not n:
+            return puntos
+        consulta = {}
+        for t, c in Counter(tokens).items():
+            if t in self.df:
+                consulta[t] = (1 + math.log(c)) * self.idf(self.df[t])
+        norma_q = math.sqrt(sum(w * w for w in consulta.values()))
+        for t, wq in consulta.items():
+            slots, tfs = self.postings[t]
+            idx = np.frombuffer(slots, dtype=np.intc)
+            # Los slots de un término son únicos: la suma indexada es segura
+            puntos[idx] += (wq * self.idf(self.df[t]) / norma_q) * np.frombuffer(tfs, dtype=np.float32)
+        vivos = np.frombuffer(self.slot_doc, dtype=np.intc) >= 0
+        puntos[vivos] /= np.sqrt(np.frombuffer(self.slot_norm2, dtype=np.float64)[vivos]).astype(np.float32)
+        puntos[~vivos] = 0
+        return puntos
+
+    def top(self, tokens, limit, entre=None, excluir=()):
+        puntos = self.scores(tokens)
+        if entre is not None:
+            candidatos = [(d, float(puntos[self.doc_slot[d]])) for d in entre if d in self.doc_slot]
+            return sorted(candidatos, key=lambda x: -x[1])[:limit]
+
+        for doc_id in excluir:
+            slot = self.doc_slot.get(doc_id)
+            if slot is not None:
+                puntos[slot] = 0
+        positivos = np.count_nonzero(puntos)
+        k = min(limit, positivos)
+        if not k:
+            return []
+        mejores = np.argpartition(puntos, -k)[-k:]
+        mejores = mejores[np.argsort(-puntos[mejores])]
+        return [(self.slot_doc[s], float(puntos[s])) for s in mejores]
+
+
+class MatchingEngine:
+    SOLAPE = timedelta(seconds=5)  # margen por relojes distintos entre procesos
+
+    def __init__(self, sync_seconds=30):
+        self.sync_seconds = sync_seconds
+        self.lock = threading.RLock()
+        self.ofertas = TermIndex()
+        self.workers = TermIndex()
+        self.listo = False
+        self.marca_ofertas = None
+        self.marca_workers = None
+        self.pid = None
+        self.consultas = 0
+        self.segundos = 0.0
+
+    @staticmethod
+    def texto_oferta(titulo, descripcion):
+        return tokenize(titulo) + tokenize(descripcion)
+
+    def _desde(self, marca):
+        return marca - self.SOLAPE if marca else datetime(1970, 1, 1)
+
+    def _leer(self, desde_ofertas=None, desde_workers=None):
+        # Lee y tokeniza sin el lock: las consultas se siguen atendiendo.
+        # Ofertas que ya no están abiertas -> None (se quitan del índice)
+        q_ofertas = select(
+            JobOffer.offer_id, JobOffer.title, JobOffer.description, JobOffer.status, JobOffer.updated_at
+        )
+        q_workers = select(Employee.employee_id, Employee.skills, Employee.updated_at)
+        if desde_ofertas is not None:
+            q_ofertas = q_ofertas.where(JobOffer.updated_at >= desde_ofertas)
+        else:
+            q_ofertas = q_ofertas.where(JobOffer.status == "open")
+        if desde_workers is not None:
+            q_workers = q_workers.where(Employee.updated_at >= desde_workers)
+
+        ofertas, workers = {}, {}
+        marca_ofertas, marca_workers = self.marca_ofertas, self.marca_workers
+        for offer_id, titulo, descripcion, status, updated_at in db.session.execute(
+            q_ofertas.execution_options(yield_per=5000)
+        ):
+            ofertas[offer_id] = self.texto_oferta(titulo, descripcion) if status == "open" else None
+            if updated_at and (marca_ofertas is None or updated_at > marca_ofertas):
+                marca_ofertas = updated_at
+        for employee_id, skills, updated_at in db.session.execute(
+            q_workers.execution_options(yield_per=5000)
+        ):
+            workers[employee_id] = tokenize(skills)
+            if updated_at and (marca_workers is None or updated_at > marca_workers):
+                marca_workers = updated_at
+        return ofertas, workers, marca_ofertas, marca_workers
+
+    def construir(self):
+        # Carga completa en índices nuevos; el lock sólo se toma para cambiarlos
+        inicio = time.perf_counter()
+        ofertas, workers, marca_ofertas, marca_workers = self._leer()
+        nuevas, nuevos = TermIndex(), TermIndex()
+        nuevas.cargar({offer_id: tokens for offer_id, tokens in ofertas.items() if tokens is not None})
+        nuevos.cargar(workers)
+        with self.lock:
+            self.ofertas, self.workers = nuevas, nuevos
+            self.marca_ofertas, self.marca_workers = marca_ofertas, marca_workers
+            self.listo = True
+        current_app.logger.info(
+            "Índice de afinidad: %d ofertas y %d workers en %.1fs",
+            len(nuevas), len(nuevos), time.perf_counter() - inicio
+        )
+
+    def sincronizar(self):
+        ofertas, workers, marca_ofertas, marca_workers = self._leer(
+            self._desde(self.marca_ofertas), self._desde(self.marca_workers)
+        )
+        with self.lock:
+            for offer_id, tokens in ofertas.items():
+                if tokens is None:
+                    self.ofertas.remove(offer_id)
+                else:
+                    self.ofertas.add(offer_id, tokens)
+            for employee_id, tokens in workers.items():
+                self.workers.add(employee_id, tokens)
+            self.marca_ofertas, self.marca_workers = marca_ofertas, marca_workers
+
+    def _bucle(self, app):
+        with app.app_context():
+            while True:
+                try:
+                    if self.listo:
+                        self.sincronizar()
+                    else:
+                        self.construir()
+                except Exception:
+                    app.logger.exception("Índice de afinidad: error al cargar, se reintenta")
+                finally:
+                    db.session.remove()
+                time.sleep(max(self.sync_seconds, 1))
+
+    def iniciar(self):
+        # Una vez por proceso (tras un fork el hilo del padre no existe)
+        if self.pid == os.getpid():
+            return
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            self.pid = os.getpid()
+            threading.Thread(
+                target=self._bucle, args=(current_app._get_current_object(),),
+                name="matching", daemon=True
+            ).start()
+
+    # Avisos de las vistas que escriben (sólo si el índice ya está cargado:
+    # si no, la carga inicial ya verá el cambio)
+    def actualizar_oferta(self, oferta):
+        self.indexar_oferta(oferta.offer_id, oferta.title, oferta.description, oferta.status)
+
+    def indexar_oferta(self, offer_id, titulo, descripcion, status):
+        with self.lock:
+            if not self.listo:
+                return
+            if status == "open":
+                self.ofertas.add(offer_id, self.texto_oferta(titulo, descripcion))
+            else:
+                self.ofertas.remove(offer_id)
+
+    def eliminar_oferta(self, offer_id):
+        with self.lock:
+            self.ofertas.remove(offer_id)
+
+    def actualizar_worker(self, worker):
+        with self.lock:
+            if self.listo:
+                self.workers.add(worker.employee_id, tokenize(worker.skills))
+
+    def _medir(self, buscar):
+        # Mientras se construye el índice: sin resultados
+        self.iniciar()
+        if not self.listo:
+            return []
+        inicio = time.perf_counter()
+        with self.lock:
+            resultado = buscar()
+            self.consultas += 1
+            self.segundos += time.perf_counter() - inicio
+        return resultado
+
+    def con_indice(self, ultima, firma):
+        # Para el ETag de páginas con recomendaciones: la respuesta servida
+        # sin índice no debe seguir valiendo cuando el índice esté listo
+        if not self.listo:
+            return None, (*firma, False)
+        return ultima, (*firma, True)
+
+    def ofertas_recomendadas(self, skills, limit=5, excluir=()):
+        tokens = tokenize(skills)
+        if not tokens:
+            return []
+        return self._medir(lambda: self.ofertas.top(tokens, limit, excluir=excluir))
+
+    def mejores_candidatos(self, titulo, descripcion, limit=5, entre=None, excluir=()):
+        tokens = self.texto_oferta(titulo, descripcion)
+        if not tokens:
+            return []
+        return self._medir(lambda: self.workers.top(tokens, limit, entre=entre, excluir=excluir))
+
+    def metrics_lines(self):
+        return [
+            "# TYPE matching_documents gauge",
+            f'matching_documents{{coleccion="ofertas"}} {len(self.ofertas)}',
+            f'matching_documents{{coleccion="workers"}} {len(self.workers)}',
+            "# TYPE matching_ready gauge",
+            f"matching_ready {int(self.listo)}",
+            "# TYPE matching_queries_total counter",
+            f"matching_queries_total {self.consultas}",
+            "# TYPE matching_query_seconds_total counter",
+            f"matching_query_seconds_total {self.segundos:.6f}",
+        ]
+
+
+# --- Consultas para las vistas ---
+# El índice puede ir unos segundos por detrás: las filas se leen de la base de
+# datos con los filtros reales (oferta abierta, sin postulación previa).
+
+def _afinidad(puntos):
+    return min(round(puntos * 100), 100)
+
+
+def ofertas_recomendadas(employee_id, limit=5):
+    engine = current_app.extensions["matching"]
+    skills = db.session.scalar(select(Employee.skills).where(Employee.employee_id == employee_id))
+    puntos = dict(engine.ofertas_recomendadas(skills, limit=limit * 3))
+    if not puntos:
+        return []
+
+    ya_postulado = exists().where(
+        Application.offer_id == JobOffer.offer_id, Application.employee_id == employee_id
+    )
+    ofertas = JobOffer.query.filter(
+        JobOffer.offer_id.in_(puntos), JobOffer.status == "open", ~ya_postulado
+    ).all()
+    ofertas.sort(key=lambda o: -puntos[o.offer_id])
+    return [{
+        "id": o.offer_id,
+        "titulo": o.title,
+        "descripcion": o.description,
+        "fecha_limite": o.publish_date.strftime('%Y-%m-%d'),
+        "afinidad": _afinidad(puntos[o.offer_id])
+    } for o in ofertas[:limit]]
+
+
+def afinidad_postulantes(oferta, employee_ids):
+    engine = current_app.extensions["matching"]
+    puntos = engine.mejores_candidatos(
+        oferta.title, oferta.description, limit=len(employee_ids), entre=employee_ids
+    )
+    return {employee_id: _afinidad(p) for employee_id, p in puntos}
+
+
+def candidatos_recomendados(oferta, excluir=(), limit=5):
+    engine = current_app.extensions["matching"]
+    puntos = dict(engine.mejores_candidatos(oferta.title, oferta.description, limit=limit, excluir=excluir))
+    if not puntos:
+        return []
+    workers = Employee.query.filter(Employee.employee_id.in_(puntos)).all()
+    workers.sort(key=lambda w: -puntos[w.employee_id])
+    return [{
+        "nombre": w.name,
+        "skills": w.skills or "",
+        "afinidad": _afinidad(puntos[w.employee_id])
+    } for w in workers]
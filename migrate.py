@@ -0,0 +1,229 @@
+import importlib.util
+import os
+import time
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import NullPool
+
+
+# --- Migraciones versionadas ---
+# Cada fichero migrations/NNNN_descripcion.py define upgrade(m) y, si sus
+# operaciones no pueden ir en una transacción (CREATE INDEX CONCURRENTLY),
+# TRANSACCIONAL = False. Las versiones aplicadas quedan en schema_migrations.
+#
+# Pensado para ejecutarse con la aplicación en marcha:
+# - Índices con CREATE INDEX CONCURRENTLY (no bloquea escrituras); si uno
+#   quedó INVALID por un intento fallido, se borra y se vuelve a crear.
+# - CHECK con NOT VALID + VALIDATE CONSTRAINT: la validación no bloquea
+#   lecturas ni escrituras.
+# - lock_timeout corto: si una tabla caliente está bloqueada, la DDL desiste
+#   en vez de encolar a todas las consultas detrás; se reintenta con espera.
+# - Un advisory lock impide dos migraciones a la vez.
+# Todas las operaciones son idempotentes, así que repetir una migración que
+# falló a medias es seguro. En SQLite (desarrollo) se omiten las que el motor
+# no admite: create_all ya crea el esquema completo.
+
+DIRECTORIO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+TABLA = "schema_migrations"
+ADVISORY_LOCK = 4207311  # arbitrario, único para esta aplicación
+
+Migracion = namedtuple("Migracion", "version nombre modulo")
+
+
+class MigrationError(Exception):
+    pass
+
+
+def cargar_migraciones(directorio=DIRECTORIO):
+    migraciones = []
+    for fichero in sorted(os.listdir(directorio)):
+        if not (fichero.endswith(".py") and fichero[:4].isdigit()):
+            continue
+        nombre = fichero[:-3]
+        spec = importlib.util.spec_from_file_location(f"migrations.{nombre}", os.path.join(directorio, fichero))
+        modulo = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(modulo)
+        migraciones.append(Migracion(int(fichero[:4]), nombre, modulo))
+    versiones = [m.version for m in migraciones]
+    if len(set(versiones)) != len(versiones):
+        raise MigrationError("Hay dos migraciones con el mismo número de versión.")
+    return migraciones
+
+
+class Migrador:
+    # Operaciones disponibles para upgrade(m)
+    def __init__(self, conexion, log):
+        self.conexion = conexion
+        self.postgres = conexion.dialect.name == "postgresql"
+        self.log = log
+
+    def ejecutar(self, sql, **params):
+        return self.conexion.execute(text(sql), params)
+
+    def crear_indice(self, nombre, tabla, columnas, unico=False, donde=None, metodo=None):
+        unique = "UNIQUE " if unico else ""
+        where = f" WHERE {donde}" if donde else ""
+        using = f" USING {metodo}" if metodo else ""
+        if not self.postgres:
+            self.ejecutar(f"CREATE {unique}INDEX IF NOT EXISTS {nombre} ON {tabla} ({columnas}){where}")
+            return
+        valido = self.conexion.execute(text(
+            "SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = :nombre"
+        ), {"nombre": nombre}).scalar()
+        if valido is False:
+            self.log(f"  {nombre} quedó INVALID en un intento anterior: se recrea")
+            self.ejecutar(f"DROP INDEX CONCURRENTLY IF EXISTS {nombre}")
+        self.ejecutar(
+            f"CREATE {unique}INDEX CONCURRENTLY IF NOT EXISTS {nombre} ON {tabla}{using} ({columnas}){where}"
+        )
+
+    def agregar_columna(self, tabla, columna, definicion):
+        if self.postgres:
+            self.ejecutar(f"ALTER TABLE {tabla} ADD COLUMN IF NOT EXISTS {columna} {definicion}")
+            return
+        existentes = {fila[1] for fila in self.conexion.execute(text(f"PRAGMA table_info({tabla})"))}
+        if columna not in existentes:
+            self.ejecutar(f"ALTER TABLE {tabla} ADD COLUMN {columna} {definicion}")
+
+    # Usar en migraciones con TRANSACCIONAL = False: dentro de una transacción
+    # el bloqueo exclusivo del ADD CONSTRAINT duraría toda la validación.
+    def crear_check(self, nombre, tabla, condicion):
+        if not self.postgres:
+            self.log(f"  {nombre}: SQLite no admite añadir CHECK, se omite")
+            return
+        actual = self.conexion.execute(text(
+            "SELECT pg_get_constraintdef(oid), convalidated FROM pg_constraint "
+            "WHERE conname = :nombre AND conrelid = CAST(:tabla AS regclass)"
+        ), {"nombre": nombre, "tabla": tabla}).first()
+        if actual is not None and not _misma_condicion(actual[0], condicion):
+            self.ejecutar(f"ALTER TABLE {tabla} DROP CONSTRAINT {nombre}")
+            actual = None
+        if actual is None:
+            # NOT VALID sólo comprueba las filas nuevas: el ALTER es instantáneo
+            self.ejecutar(f"ALTER TABLE {tabla} ADD CONSTRAINT {nombre} CHECK ({condicion}) NOT VALID")
+        if actual is None or not actual[1]:
+            self.ejecutar(f"ALTER TABLE {tabla} VALIDATE CONSTRAINT {nombre}")
+
+
+    def no_nulo(self, tabla, columna):
+        # SET NOT NULL directo recorre la tabla con bloqueo exclusivo. Con un
+        # CHECK ya validado (sin ese bloqueo) PostgreSQL 12+ se salta el
+        # recorrido; después el CHECK sobra.
+        if not self.postgres:
+            self.log(f"  {tabla}.{columna}: SQLite no admite SET NOT NULL, se omite")
+            return
+        nombre = f"{tabla}_{columna}_not_null"
+        self.crear_check(nombre, tabla, f"{columna} IS NOT NULL")
+        self.ejecutar(f"ALTER TABLE {tabla} ALTER COLUMN {columna} SET NOT NULL")
+        self.ejecutar(f"ALTER TABLE {tabla} DROP CONSTRAINT IF EXISTS {nombre}")
+
+
+def _misma_condicion(definicion, condicion):
+    # pg_get_constraintdef normaliza: CHECK (((status)::text = ANY (ARRAY[...])))
+    valores = sorted(v for v in condicion.split("'")[1::2])
+    return sorted(definicion.split("'")[1::2]) == valores
+
+
+def _engine(uri):
+    # Conexiones propias y sin pool: los SET de sesión no vuelven al pool de la app
+    return create_engine(uri, poolclass=NullPool)
+
+
+def _crear_tabla(engine):
+    with engine.begin() as conexion:
+        conexion.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {TABLA} ("
+            "version INTEGER PRIMARY KEY, nombre VARCHAR(200) NOT NULL, aplicada_en TIMESTAMP NOT NULL)"
+        ))
+
+
+def aplicadas(engine):
+    _crear_tabla(engine)
+    with engine.connect() as conexion:
+        return {v: (n, f) for v, n, f in conexion.execute(text(f"SELECT version, nombre, aplicada_en FROM {TABLA}"))}
+
+
+def _registrar(conexion, migracion):
+    conexion.execute(
+        text(f"INSERT INTO {TABLA} (version, nombre, aplicada_en) VALUES (:v, :n, :f)"),
+        {"v": migracion.version, "n": migracion.nombre, "f": datetime.utcnow()}
+    )
+
+
+def _es_lock_timeout(error):
+    return getattr(error.orig, "pgcode", None) == "55P03" or "lock timeout" in str(error.orig)
+
+
+def _aplicar(engine, migracion, lock_timeout_ms, log):
+    transaccional = getattr(migracion.modulo, "TRANSACCIONAL", True)
+    postgres = engine.dialect.name == "postgresql"
+
+    if transaccional:
+        with engine.begin() as conexion:
+            if postgres:
+                conexion.exec_driver_sql(f"SET LOCAL lock_timeout = {int(lock_timeout_ms)}")
+                conexion.exec_driver_sql("SET LOCAL statement_timeout = 0")
+            migracion.modulo.upgrade(Migrador(conexion, log))
+            _registrar(conexion, migracion)
+        return
+
+    with engine.connect() as conexion:
+        conexion = conexion.execution_options(isolation_level="AUTOCOMMIT")
+        if postgres:
+            conexion.exec_driver_sql(f"SET lock_timeout = {int(lock_timeout_ms)}")
+            conexion.exec_driver_sql("SET statement_timeout = 0")
+        migracion.modulo.upgrade(Migrador(conexion, log))
+        _registrar(conexion, migracion)
+
+
+def migrate(uri, destino=None, lock_timeout_ms=3000, reintentos=5, log=print):
+    engine = _engine(uri)
+    postgres = engine.dialect.name == "postgresql"
+    migraciones = cargar_migraciones()
+    _crear_tabla(engine)
+    aplicadas_ahora = []
+
+    with engine.connect() as bloqueo:
+        # En autocommit: una transacción abierta haría esperar a CREATE INDEX CONCURRENTLY
+        bloqueo = bloqueo.execution_options(isolation_level="AUTOCOMMIT")
+        if postgres and not bloqueo.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": ADVISORY_LOCK}).scalar():
+            raise MigrationError("Otra migración está en curso.")
+        try:
+            hechas = aplicadas(engine)
+            pendientes = [
+                m for m in migraciones
+                if m.version not in hechas and (destino is None or m.version <= destino)
+            ]
+            if not pendientes:
+                log("No hay migraciones pendientes.")
+            for migracion in pendientes:
+                log(f"Aplicando {migracion.nombre}...")
+                inicio = time.perf_counter()
+                for intento in range(reintentos + 1):
+                    try:
+                        _aplicar(engine, migracion, lock_timeout_ms, log)
+                        break
+                    except OperationalError as e:
+                        if not _es_lock_timeout(e) or intento == reintentos:
+                            raise
+                        espera = min(2 ** intento, 30)
+                        log(f"  tabla bloqueada (lock_timeout), reintento en {espera}s")
+                        time.sleep(espera)
+                log(f"  hecho en {time.perf_counter() - inicio:.1f}s")
+                aplicadas_ahora.append(migracion.version)
+        finally:
+            if postgres:
+                bloqueo.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": ADVISORY_LOCK})
+    engine.dispose()
+    return aplicadas_ahora
+
+
+def estado(uri):
+    engine = _engine(uri)
+    hechas = aplicadas(engine)
+    engine.dispose()
+    return [(m.version, m.nombre, hechas.get(m.version, (None, None))[1]) for m in cargar_migraciones()]
@@ -0,0 +1,9 @@
+# Antes en fix_db.py: el CHECK de applications.status admite 'completed'
+TRANSACCIONAL = False
+
+
+def upgrade(m):
+    m.crear_check(
+        "applications_status_check", "applications",
+        "status IN ('pending', 'accepted', 'rejected', 'completed')"
+    )
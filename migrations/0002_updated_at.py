@@ -0,0 +1,10 @@
+# Antes en fix_db.py: updated_at para ETag / Last-Modified.
+# Con un DEFAULT no volátil PostgreSQL no reescribe la tabla al añadir la columna.
+TRANSACCIONAL = False
+
+
+def upgrade(m):
+    definicion = "TIMESTAMP DEFAULT (now() AT TIME ZONE 'utc')" if m.postgres else "TIMESTAMP"
+    for tabla in ("job_offers", "applications"):
+        m.agregar_columna(tabla, "updated_at", definicion)
+    m.crear_indice("ix_job_offers_updated_at", "job_offers", "updated_at")
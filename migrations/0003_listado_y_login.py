@@ -0,0 +1,7 @@
+# Índices del listado paginado de ofertas abiertas y del login por nombre
+TRANSACCIONAL = False
+
+
+def upgrade(m):
+    m.crear_indice("ix_job_offers_status_publish", "job_offers", "status, publish_date DESC, offer_id DESC")
+    m.crear_indice("ix_users_lower_name", "users", "lower(name)")
@@ -0,0 +1,11 @@
+# Índices sobre claves foráneas: joins de perfiles y ofertas, y los borrados
+# en cascada (sin índice, borrar un usuario u oferta recorre la tabla hija).
+# applications.employee_id ya está cubierto por uix_employee_offer.
+TRANSACCIONAL = False
+
+
+def upgrade(m):
+    m.crear_indice("ix_applications_offer_id", "applications", "offer_id")
+    m.crear_indice("ix_job_offers_boss_id", "job_offers", "boss_id")
+    m.crear_indice("ix_employees_user_id", "employees", "user_id")
+    m.crear_indice("ix_bosses_user_id", "bosses", "user_id")
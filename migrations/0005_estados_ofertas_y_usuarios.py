@@ -0,0 +1,7 @@
+# Valores permitidos de job_offers.status y users.user_type
+TRANSACCIONAL = False
+
+
+def upgrade(m):
+    m.crear_check("job_offers_status_check", "job_offers", "status IN ('open', 'closed')")
+    m.crear_check("users_user_type_check", "users", "user_type IN ('boss', 'employee')")
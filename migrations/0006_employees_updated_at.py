@@ -0,0 +1,9 @@
+# updated_at en employees: el índice de afinidad de cada proceso sincroniza
+# los perfiles modificados por otros procesos
+TRANSACCIONAL = False
+
+
+def upgrade(m):
+    definicion = "TIMESTAMP DEFAULT (now() AT TIME ZONE 'utc')" if m.postgres else "TIMESTAMP"
+    m.agregar_columna("employees", "updated_at", definicion)
+    m.crear_indice("ix_employees_updated_at", "employees", "updated_at")
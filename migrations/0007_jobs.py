@@ -0,0 +1,41 @@
+# Cola de tareas en segundo plano (jobs.py) y contador de postulaciones por
+# oferta. El contador se rellena con una tarea encolada aquí, no en la
+# migración: en tablas grandes lo hace el worker por lotes.
+from datetime import datetime
+
+TRANSACCIONAL = False
+
+
+def upgrade(m):
+    clave = "SERIAL PRIMARY KEY" if m.postgres else "INTEGER PRIMARY KEY"
+    m.ejecutar(
+        "CREATE TABLE IF NOT EXISTS jobs ("
+        f"job_id {clave}, "
+        "name VARCHAR(100) NOT NULL, "
+        "payload TEXT NOT NULL, "
+        "status VARCHAR(20) NOT NULL, "
+        "attempts INTEGER NOT NULL, "
+        "max_attempts INTEGER NOT NULL, "
+        "run_at TIMESTAMP NOT NULL, "
+        "unique_key VARCHAR(200), "
+        "locked_by VARCHAR(100), "
+        "locked_at TIMESTAMP, "
+        "last_error TEXT, "
+        "created_at TIMESTAMP NOT NULL, "
+        "finished_at TIMESTAMP, "
+        "CONSTRAINT jobs_status_check CHECK (status IN ('pending', 'running', 'done', 'failed')))"
+    )
+    m.crear_indice("ix_jobs_status_run_at", "jobs", "status, run_at")
+    m.crear_indice("uix_jobs_unique_key_pending", "jobs", "unique_key", unico=True, donde="status = 'pending'")
+
+    m.crear_indice(
+        "ix_applications_rejected_updated", "applications", "updated_at", donde="status = 'rejected'"
+    )
+
+    m.agregar_columna("job_offers", "applications_count", "INTEGER NOT NULL DEFAULT 0")
+    ahora = datetime.utcnow()
+    m.ejecutar(
+        "INSERT INTO jobs (name, payload, status, attempts, max_attempts, run_at, created_at) "
+        "VALUES ('recalcular_contadores', '{}', 'pending', 0, 5, :ahora, :ahora)",
+        ahora=ahora
+    )
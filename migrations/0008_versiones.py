@@ -0,0 +1,25 @@
+# Firmas de ETag sin contar filas (conditional.py): updated_at en bosses,
+# marca de actividad de postulaciones por oferta, índices para los max() y
+# la tabla de versiones que se incrementa en los borrados.
+TRANSACCIONAL = False
+
+
+def upgrade(m):
+    ahora = "TIMESTAMP DEFAULT (now() AT TIME ZONE 'utc')" if m.postgres else "TIMESTAMP"
+    m.agregar_columna("bosses", "updated_at", ahora)
+    m.crear_indice("ix_bosses_updated_at", "bosses", "updated_at")
+
+    m.agregar_columna("job_offers", "applications_updated_at", "TIMESTAMP")
+    m.crear_indice("ix_job_offers_boss_updated", "job_offers", "boss_id, updated_at")
+    m.crear_indice("ix_job_offers_boss_applications_updated", "job_offers", "boss_id, applications_updated_at")
+    m.crear_indice("ix_applications_employee_updated", "applications", "employee_id, updated_at")
+
+    m.ejecutar(
+        "CREATE TABLE IF NOT EXISTS versiones ("
+        "nombre VARCHAR(50) PRIMARY KEY, "
+        "valor INTEGER NOT NULL)"
+    )
+    m.ejecutar(
+        "INSERT INTO versiones (nombre, valor) SELECT 'borrados', 0 "
+        "WHERE NOT EXISTS (SELECT 1 FROM versiones WHERE nombre = 'borrados')"
+    )
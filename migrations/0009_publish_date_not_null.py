@@ -0,0 +1,16 @@
+# job_offers.publish_date obligatorio: las filas con NULL quedaban fuera de
+# la paginación por cursor (tuple < cursor nunca es cierto) y rompían
+# strftime en las vistas y en matching.py. Se rellenan con su updated_at (o
+# la fecha actual) antes de añadir la restricción.
+TRANSACCIONAL = False
+
+
+def upgrade(m):
+    ahora = "now() AT TIME ZONE 'utc'" if m.postgres else "CURRENT_TIMESTAMP"
+    m.ejecutar(
+        f"UPDATE job_offers SET publish_date = COALESCE(updated_at, {ahora}) "
+        "WHERE publish_date IS NULL"
+    )
+    if m.postgres:
+        m.ejecutar(f"ALTER TABLE job_offers ALTER COLUMN publish_date SET DEFAULT ({ahora})")
+    m.no_nulo("job_offers", "publish_date")
@@ -0,0 +1,47 @@
+# Búsqueda de texto completo (search.py), antes creada por init-db fuera de
+# las migraciones. Una columna GENERATED ... STORED reescribiría job_offers
+# con bloqueo exclusivo; en su lugar: columna nullable (instantánea), trigger
+# que la mantiene, relleno por lotes e índice GIN concurrente.
+TRANSACCIONAL = False
+
+LOTE = 5000
+
+VECTOR = (
+    "setweight(to_tsvector('spanish', coalesce({t}title, '')), 'A') || "
+    "setweight(to_tsvector('spanish', coalesce({t}description, '')), 'B') || "
+    "setweight(to_tsvector('spanish', coalesce({t}location, '')), 'C')"
+)
+
+
+def upgrade(m):
+    if not m.postgres:
+        m.log("  search_vector: sólo PostgreSQL, la búsqueda usa LIKE")
+        return
+    generada = m.ejecutar(
+        "SELECT attgenerated = 's' FROM pg_attribute "
+        "WHERE attrelid = 'job_offers'::regclass AND attname = 'search_vector' AND NOT attisdropped"
+    ).scalar()
+    if generada:
+        # Bases creadas con el antiguo init-db: la columna generada ya vale
+        m.crear_indice("ix_job_offers_search_vector", "job_offers", "search_vector", metodo="GIN")
+        return
+    m.agregar_columna("job_offers", "search_vector", "tsvector")
+    m.ejecutar(
+        "CREATE OR REPLACE FUNCTION job_offers_search_vector() RETURNS trigger AS $$ "
+        f"BEGIN NEW.search_vector := {VECTOR.format(t='NEW.')}; RETURN NEW; END "
+        "$$ LANGUAGE plpgsql"
+    )
+    m.ejecutar("DROP TRIGGER IF EXISTS job_offers_search_vector ON job_offers")
+    m.ejecutar(
+        "CREATE TRIGGER job_offers_search_vector "
+        "BEFORE INSERT OR UPDATE OF title, description, location ON job_offers "
+        "FOR EACH ROW EXECUTE FUNCTION job_offers_search_vector()"
+    )
+    # Lotes cortos en autocommit: ningún UPDATE retiene bloqueos de fila mucho tiempo
+    while m.ejecutar(
+        f"UPDATE job_offers SET search_vector = {VECTOR.format(t='')} "
+        "WHERE offer_id IN (SELECT offer_id FROM job_offers WHERE search_vector IS NULL "
+        f"LIMIT {LOTE})"
+    ).rowcount:
+        pass
+    m.crear_indice("ix_job_offers_search_vector", "job_offers", "search_vector", metodo="GIN")
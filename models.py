@@ -2,7 +2,19 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from datetime import datetime
 
-db = SQLAlchemy()
+from replicas import RoutingSession
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+
+# Valores permitidos; la base de datos los exige con CHECK (ver migrations/)
+TIPOS_USUARIO = ("boss", "employee")
+ESTADOS_OFERTA = ("open", "closed")
+ESTADOS_POSTULACION = ("pending", "accepted", "rejected", "completed")
+ESTADOS_JOB = ("pending", "running", "done", "failed")
+
+
+def valores_sql(valores):
+    return ", ".join(f"'{v}'" for v in valores)
 
 class User(UserMixin, db.Model):
     __tablename__ = "users"
@@ -13,54 +25,137 @@ class User(UserMixin, db.Model):
     user_type = db.Column(db.String(20))  
     registration_date = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # El login admite correo o nombre de usuario sin distinguir mayúsculas
+    __table_args__ = (
+        db.Index("ix_users_lower_name", db.func.lower(name)),
+        db.CheckConstraint(f"user_type IN ({valores_sql(TIPOS_USUARIO)})", name="users_user_type_check"),
+    )
+
     @property
     def id(self):
         return self.user_id
 
-    employee = db.relationship("Employee", backref="user", uselist=False, cascade="all, delete")
-    boss = db.relationship("Boss", backref="user", uselist=False, cascade="all, delete")
+    # Las relaciones declaran su estrategia de carga de forma explícita; las vistas
+    # la sobreescriben por consulta con joinedload/selectinload para evitar N+1.
+    employee = db.relationship("Employee", back_populates="user", uselist=False, cascade="all, delete", lazy="select")
+    boss = db.relationship("Boss", back_populates="user", uselist=False, cascade="all, delete", lazy="select")
 
 class Employee(db.Model):
     __tablename__ = "employees"
     employee_id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False, index=True)
     name = db.Column(db.String(100), nullable=False)
     skills = db.Column(db.Text)
     experience = db.Column(db.Text)
     resume = db.Column(db.Text)
+    # El índice de afinidad (matching.py) reindexa los perfiles modificados
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
-    applications = db.relationship("Application", backref="employee", cascade="all, delete")
+    user = db.relationship("User", back_populates="employee", lazy="select")
+    applications = db.relationship("Application", back_populates="employee", cascade="all, delete", lazy="select")
 
 class Boss(db.Model):
     __tablename__ = "bosses"
     boss_id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False, index=True)
     name = db.Column(db.String(100), nullable=False)
     contact = db.Column(db.String(50))
     phone = db.Column(db.String(20))
     address = db.Column(db.String(200))
+    # El nombre del boss aparece en las páginas del worker (firma de su ETag)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
-    job_offers = db.relationship("JobOffer", backref="boss", cascade="all, delete")
+    user = db.relationship("User", back_populates="boss", lazy="select")
+    job_offers = db.relationship("JobOffer", back_populates="boss", cascade="all, delete", lazy="select")
 
 class JobOffer(db.Model):
     __tablename__ = "job_offers"
     offer_id = db.Column(db.Integer, primary_key=True)
-    boss_id = db.Column(db.Integer, db.ForeignKey("bosses.boss_id", ondelete="SET NULL"))
+    boss_id = db.Column(db.Integer, db.ForeignKey("bosses.boss_id", ondelete="SET NULL"), index=True)
     title = db.Column(db.String(150), nullable=False)
     description = db.Column(db.Text)
     salary = db.Column(db.Numeric(10,2))
     location = db.Column(db.String(100))
-    publish_date = db.Column(db.DateTime, default=datetime.utcnow)
+    publish_date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     status = db.Column(db.String(20), default="open")  
+    # Indexado: /proyectow consulta max(updated_at) en cada GET condicional
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    # Contador desnormalizado de postulaciones: se actualiza en la misma
+    # transacción que las crea o borra (application_actions.tocar_ofertas);
+    # recalcular_contadores (tasks.py) sólo corrige desvíos
+    applications_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    # Último cambio en las postulaciones de la oferta (nueva, cambio de estado):
+    # firma de las páginas del boss sin recorrer applications
+    applications_updated_at = db.Column(db.DateTime)
+
+    boss = db.relationship("Boss", back_populates="job_offers", lazy="select")
+    applications = db.relationship("Application", back_populates="job_offer", cascade="all, delete", lazy="select")
 
-    applications = db.relationship("Application", backref="job_offer", cascade="all, delete")
+    # Índice para el listado paginado de ofertas abiertas (keyset sobre fecha, id)
+    __table_args__ = (
+        db.Index("ix_job_offers_status_publish", "status", publish_date.desc(), offer_id.desc()),
+        # Versión de las páginas del boss (conditional.py)
+        db.Index("ix_job_offers_boss_updated", "boss_id", "updated_at"),
+        db.Index("ix_job_offers_boss_applications_updated", "boss_id", "applications_updated_at"),
+        db.CheckConstraint(f"status IN ({valores_sql(ESTADOS_OFERTA)})", name="job_offers_status_check"),
+    )
 
 class Application(db.Model):
     __tablename__ = "applications"
     application_id = db.Column(db.Integer, primary_key=True)
     employee_id = db.Column(db.Integer, db.ForeignKey("employees.employee_id", ondelete="CASCADE"), nullable=False)
-    offer_id = db.Column(db.Integer, db.ForeignKey("job_offers.offer_id", ondelete="CASCADE"), nullable=False)
+    # employee_id no necesita índice propio: es la primera columna de uix_employee_offer
+    offer_id = db.Column(db.Integer, db.ForeignKey("job_offers.offer_id", ondelete="CASCADE"), nullable=False, index=True)
     application_date = db.Column(db.DateTime, default=datetime.utcnow)
     status = db.Column(db.String(20), default="pending")  
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    employee = db.relationship("Employee", back_populates="applications", lazy="select")
+    job_offer = db.relationship("JobOffer", back_populates="applications", lazy="select")
+
+    __table_args__ = (
+        db.UniqueConstraint('employee_id', 'offer_id', name='uix_employee_offer'),
+        db.CheckConstraint(f"status IN ({valores_sql(ESTADOS_POSTULACION)})", name="applications_status_check"),
+        # Versión de las páginas del worker (conditional.py)
+        db.Index("ix_applications_employee_updated", "employee_id", "updated_at"),
+        # Limpieza periódica de rechazadas antiguas (tarea limpiar en tasks.py)
+        db.Index(
+            "ix_applications_rejected_updated", "updated_at",
+            postgresql_where=db.text("status = 'rejected'"), sqlite_where=db.text("status = 'rejected'")
+        ),
+    )
+
+class Job(db.Model):
+    # Cola de tareas en segundo plano (jobs.py); payload es JSON
+    __tablename__ = "jobs"
+    job_id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.Text, nullable=False, default="{}")
+    status = db.Column(db.String(20), nullable=False, default="pending")
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    unique_key = db.Column(db.String(200))
+    locked_by = db.Column(db.String(100))
+    locked_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        # Lo que consulta el worker en cada vuelta
+        db.Index("ix_jobs_status_run_at", "status", "run_at"),
+        # Como mucho una tarea pendiente por clave (encolar(..., clave=...))
+        db.Index(
+            "uix_jobs_unique_key_pending", "unique_key", unique=True,
+            postgresql_where=db.text("status = 'pending'"), sqlite_where=db.text("status = 'pending'")
+        ),
+        db.CheckConstraint(f"status IN ({valores_sql(ESTADOS_JOB)})", name="jobs_status_check"),
+    )
 
-    __table_args__ = (db.UniqueConstraint('employee_id', 'offer_id', name='uix_employee_offer'), )
+class Version(db.Model):
+    # Contadores que se incrementan en cada borrado: las firmas de ETag usan
+    # max(updated_at), que no cambia cuando desaparece una fila
+    __tablename__ = "versiones"
+    nombre = db.Column(db.String(50), primary_key=True)
+    valor = db.Column(db.Integer, nullable=False, default=0)
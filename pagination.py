@@ -0,0 +1,79 @@
+import base64
+import binascii
+from datetime import datetime
+
+from sqlalchemy import tuple_
+
+
+# --- Paginación por cursor (keyset) ---
+# El cursor codifica (fecha, id) del último elemento de la página anterior,
+# así cada página es un rango sobre el índice en lugar de un OFFSET. Cada
+# listado declara el tipo del primer valor (datetime por defecto; int en la
+# búsqueda por relevancia) y un cursor que no se decodifica a ese tipo se
+# trata como la primera página.
+
+# Fuera de rango la base de datos fallaría al comparar: los id son INTEGER
+# y el rango escalado de la búsqueda, BIGINT
+_ID_MAX = 2 ** 31 - 1
+_ENTERO_MAX = 2 ** 63 - 1
+
+
+def encode_cursor(valor, item_id):
+    texto = valor.isoformat() if isinstance(valor, datetime) else str(int(valor))
+    raw = f"{texto}|{item_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _entero(texto, maximo=_ENTERO_MAX):
+    valor = int(texto)
+    if abs(valor) > maximo:
+        raise ValueError(texto)
+    return valor
+
+
+def _valor_cursor(texto, tipo):
+    if tipo is datetime:
+        valor = datetime.fromisoformat(texto)
+        # Las columnas de fecha son naive (UTC)
+        if valor.tzinfo is not None:
+            raise ValueError(texto)
+        return valor
+    return _entero(texto)
+
+
+def decode_cursor(cursor, tipo=datetime):
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        valor_txt, item_id = base64.urlsafe_b64decode(padded).decode().split("|", 1)
+        return _valor_cursor(valor_txt, tipo), _entero(item_id, _ID_MAX)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        return None
+
+
+def cursor_valido(cursor, tipo=datetime):
+    # Normaliza un cursor inválido a None (p. ej. para claves de caché)
+    return cursor if decode_cursor(cursor, tipo) else None
+
+
+def keyset_select(stmt, date_col, id_col, cursor, limit, tipo=datetime):
+    # Vale tanto para Query como para select() (modo async)
+    posicion = decode_cursor(cursor, tipo)
+    if posicion:
+        stmt = stmt.filter(tuple_(date_col, id_col) < posicion)
+    return stmt.order_by(date_col.desc(), id_col.desc()).limit(limit + 1)
+
+
+def split_page(filas, date_col, id_col, limit):
+    next_cursor = None
+    if len(filas) > limit:
+        filas = filas[:limit]
+        ultimo = filas[-1]
+        next_cursor = encode_cursor(getattr(ultimo, date_col.key), getattr(ultimo, id_col.key))
+    return filas, next_cursor
+
+
+def keyset_page(query, date_col, id_col, cursor, limit, tipo=datetime):
+    filas = keyset_select(query, date_col, id_col, cursor, limit, tipo).all()
+    return split_page(filas, date_col, id_col, limit)
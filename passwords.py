@@ -0,0 +1,71 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeout
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+# --- Hash de contraseñas ---
+# Método y coste configurables (formato de werkzeug, p. ej. "scrypt:32768:8:1"
+# o "pbkdf2:sha256:600000"). Los hashes con otros parámetros se rehacen al
+# hacer login. Opcionalmente el cálculo se hace en un pool de procesos con
+# una cola acotada: si está llena se lanza HasherBusy y la vista responde 503.
+
+class HasherBusy(Exception):
+    pass
+
+
+class PasswordHasher:
+    def __init__(self, method="scrypt", salt_length=16, workers=0, queue_limit=32, timeout=10):
+        self.method = method
+        self.salt_length = salt_length
+        self.workers = workers
+        self.timeout = timeout
+        # Parámetros completos tal y como quedan guardados en el hash
+        self.canonical = generate_password_hash("x", method=method, salt_length=salt_length).split("$", 1)[0]
+        self.slots = threading.BoundedSemaphore(queue_limit) if workers else None
+        self.pool = None
+        self.pool_pid = None
+        self.lock = threading.Lock()
+
+    def _executor(self):
+        # Un pool por proceso: con gunicorn el fork no debe heredar el del maestro
+        with self.lock:
+            if self.pool is None or self.pool_pid != os.getpid():
+                self.pool = ProcessPoolExecutor(max_workers=self.workers)
+                self.pool_pid = os.getpid()
+            return self.pool
+
+    def _run(self, func, *args):
+        if not self.workers:
+            return func(*args)
+        if not self.slots.acquire(blocking=False):
+            raise HasherBusy()
+        try:
+            future = self._executor().submit(func, *args)
+        except BaseException:
+            self.slots.release()
+            raise
+        # El hueco se libera cuando el cálculo termina (o se cancela), no al
+        # agotarse la espera: si no, los hashes abandonados desbordarían la cola
+        future.add_done_callback(lambda _: self.slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FuturesTimeout:
+            future.cancel()
+            raise HasherBusy()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method, self.salt_length)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        return password_hash.split("$", 1)[0] != self.canonical
+
+    def shutdown(self):
+        with self.lock:
+            if self.pool is not None:
+                self.pool.shutdown(wait=False, cancel_futures=True)
+                self.pool = None
@@ -0,0 +1,220 @@
+import hashlib
+import math
+import threading
+import time
+from collections import Counter, OrderedDict, namedtuple
+from functools import wraps
+
+from flask import Response, current_app, request
+from flask_login import current_user
+
+from cache import CacheError, CacheUnavailable, RedisBackend
+
+
+# --- Límite de peticiones (token bucket) ---
+# Cada clave (regla + IP, usuario o cuenta) tiene un cubo de "capacidad"
+# fichas que se rellena a ritmo constante; cada petición gasta una y sin
+# fichas se responde 429 con Retry-After. Por clave se guardan dos números
+# (fichas y última recarga), y una clave inactiva el tiempo que tarda en
+# llenarse equivale a no tenerla, así que se puede olvidar.
+#
+# Backends: "memory://" (por proceso: con N workers de gunicorn el límite
+# efectivo es N veces el configurado) y "redis://" (compartido; el cubo se
+# actualiza con un script Lua atómico y caduca solo con PEXPIRE). Si Redis
+# no responde se usa el cubo en memoria del proceso: nunca se bloquea a
+# nadie por un fallo del backend.
+#
+# Límites en configuración como "N/segundos": N peticiones seguidas como
+# máximo y N cada tantos segundos de media. Vacío o "0" lo desactiva.
+
+Limite = namedtuple("Limite", "capacidad por_segundo")
+
+CLAVE_MAX = 200
+
+
+def parse_limite(texto):
+    if not texto or texto.strip() == "0":
+        return None
+    cantidad, _, segundos = texto.partition("/")
+    cantidad, segundos = int(cantidad), float(segundos or 1)
+    if cantidad <= 0 or segundos <= 0:
+        raise ValueError(f"Límite no válido: {texto}")
+    return Limite(cantidad, cantidad / segundos)
+
+
+class MemoryBuckets:
+    def __init__(self, maxsize=100000, purga=16):
+        self.maxsize = maxsize
+        self.purga = purga
+        self.lock = threading.Lock()
+        # clave -> (fichas, última recarga, instante en que estará lleno);
+        # en orden de último uso
+        self.cubos = OrderedDict()
+
+    def consumir(self, clave, limite):
+        ahora = time.monotonic()
+        with self.lock:
+            self._purgar(ahora)
+            cubo = self.cubos.get(clave)
+            if cubo is None:
+                fichas = limite.capacidad
+            else:
+                fichas = min(limite.capacidad, cubo[0] + (ahora - cubo[1]) * limite.por_segundo)
+            permitido = fichas >= 1
+            if permitido:
+                fichas -= 1
+            lleno = ahora + (limite.capacidad - fichas) / limite.por_segundo
+            self.cubos[clave] = (fichas, ahora, lleno)
+            self.cubos.move_to_end(clave)
+            # Sobrepasado el tamaño se olvidan las menos usadas (su cubo
+            # vuelve a empezar lleno)
+            while len(self.cubos) > self.maxsize:
+                self.cubos.popitem(last=False)
+        return permitido, 0 if permitido else (1 - fichas) / limite.por_segundo
+
+    def _purgar(self, ahora):
+        # Coste acotado por petición: sólo mira las más antiguas
+        for _ in range(self.purga):
+            if not self.cubos:
+                return
+            clave, cubo = next(iter(self.cubos.items()))
+            if cubo[2] > ahora:
+                return
+            del self.cubos[clave]
+
+    def __len__(self):
+        return len(self.cubos)
+
+
+# Requiere Redis 5+ (TIME antes de escribir). Devuelve {permitido, espera}
+# con la espera como texto: Redis trunca a entero los números de Lua.
+SCRIPT_LUA = """
+local capacidad = tonumber(ARGV[1])
+local ritmo = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local ahora = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local cubo = redis.call('HMGET', KEYS[1], 'f', 't')
+local fichas = capacidad
+if cubo[1] then
+    fichas = math.min(capacidad, tonumber(cubo[1]) + (ahora - tonumber(cubo[2])) * ritmo)
+end
+local permitido = 0
+local espera = 0
+if fichas >= 1 then
+    fichas = fichas - 1
+    permitido = 1
+else
+    espera = (1 - fichas) / ritmo
+end
+redis.call('HSET', KEYS[1], 'f', tostring(fichas), 't', tostring(ahora))
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacidad - fichas) / ritmo * 1000) + 1000)
+return {permitido, tostring(espera)}
+"""
+
+
+class RedisBuckets:
+    def __init__(self, redis):
+        self.redis = redis
+        self.sha = hashlib.sha1(SCRIPT_LUA.encode()).hexdigest()
+
+    @classmethod
+    def from_url(cls, url):
+        return cls(RedisBackend.from_url(url))
+
+    def consumir(self, clave, limite):
+        argumentos = (1, clave, limite.capacidad, repr(limite.por_segundo))
+        try:
+            permitido, espera = self.redis.command("EVALSHA", self.sha, *argumentos)
+        except CacheError as e:
+            # El script se carga la primera vez (o tras reiniciar Redis)
+            if not str(e).startswith("NOSCRIPT"):
+                raise
+            permitido, espera = self.redis.command("EVAL", SCRIPT_LUA, *argumentos)
+        return permitido == 1, float(espera)
+
+
+def create_buckets(url):
+    if not url or url.startswith("memory://"):
+        return MemoryBuckets()
+    if url.startswith("redis://"):
+        return RedisBuckets.from_url(url)
+    raise ValueError(f"Backend de límites no soportado: {url}")
+
+
+def _clave_ip():
+    return request.remote_addr
+
+
+def _clave_usuario():
+    return current_user.get_id() if current_user.is_authenticated else None
+
+
+CLAVES = {"ip": _clave_ip, "usuario": _clave_usuario}
+
+
+class RateLimiter:
+    def __init__(self, buckets, prefix="rl"):
+        self.buckets = buckets
+        self.prefix = prefix
+        # Respaldo por proceso si el backend compartido falla
+        self.local = buckets if isinstance(buckets, MemoryBuckets) else MemoryBuckets()
+        self.lock = threading.Lock()
+        self.resultados = Counter()   # (regla, resultado) -> número
+
+    def consumir(self, regla, clave, limite):
+        clave = f"{self.prefix}:{regla}:{clave}"[:CLAVE_MAX]
+        try:
+            return self.buckets.consumir(clave, limite)
+        except CacheUnavailable:
+            pass
+        except (OSError, CacheError) as e:
+            current_app.logger.warning("Error del backend de límites: %s", e)
+        return self.local.consumir(clave, limite)
+
+    def limit(self, regla, limite, por="ip", metodos=("POST",), respuesta=None):
+        # por: "ip", "usuario" o una función que devuelve la clave (None =
+        # no se limita esta petición). respuesta(espera) construye la
+        # respuesta 429; sin ella, texto plano.
+        limite = parse_limite(limite) if isinstance(limite, str) else limite
+        obtener_clave = CLAVES.get(por, por)
+
+        def decorator(f):
+            if limite is None:
+                return f
+
+            @wraps(f)
+            def wrap(*args, **kwargs):
+                if request.method not in metodos or not current_app.config["RATELIMIT_ENABLED"]:
+                    return f(*args, **kwargs)
+                clave = obtener_clave()
+                if not clave:
+                    return f(*args, **kwargs)
+
+                permitido, espera = self.consumir(regla, clave, limite)
+                with self.lock:
+                    self.resultados[(regla, "permitida" if permitido else "rechazada")] += 1
+                if permitido:
+                    return f(*args, **kwargs)
+
+                espera = max(math.ceil(espera), 1)
+                if respuesta is not None:
+                    response = respuesta(espera)
+                else:
+                    response = Response(
+                        f"Demasiadas peticiones. Inténtalo de nuevo en {espera} segundos.\n",
+                        status=429, mimetype="text/plain"
+                    )
+                response.status_code = 429
+                response.headers["Retry-After"] = str(espera)
+                return response
+            return wrap
+        return decorator
+
+    def metrics_lines(self):
+        with self.lock:
+            resultados = sorted(self.resultados.items())
+        lineas = ["# TYPE ratelimit_requests_total counter"]
+        lineas += [f'ratelimit_requests_total{{regla="{r}",resultado="{res}"}} {n}' for (r, res), n in resultados]
+        lineas.append("# TYPE ratelimit_local_keys gauge")
+        lineas.append(f"ratelimit_local_keys {len(self.local)}")
+        return lineas
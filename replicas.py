@@ -0,0 +1,155 @@
+import itertools
+import threading
+import time
+from functools import wraps
+
+from flask import g, request, session, current_app, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError
+
+
+# --- Lectura desde réplicas ---
+# Las vistas marcadas con @read_only leen de una réplica sana (round robin)
+# cuando la petición es GET. Tras una escritura el usuario queda "pegado" al
+# primario durante REPLICA_STICKY_SECONDS para que vea sus propios cambios.
+# Las réplicas se comprueban como mucho cada REPLICA_CHECK_INTERVAL segundos
+# (SELECT 1 y, en PostgreSQL, el retraso de replicación) y se marcan caídas
+# en cuanto una consulta falla por conexión.
+
+SESSION_KEY = "_ultima_escritura"
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_request_context():
+            router = current_app.extensions.get("replicas")
+            engine = router.engine_for_request() if router else None
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class Replica:
+    def __init__(self, key):
+        self.key = key
+        self.healthy = True
+        self.checked_at = 0.0
+
+
+class ReplicaRouter:
+    def __init__(self, db, keys, sticky_seconds=5, check_interval=10, max_lag=30):
+        self.db = db
+        self.replicas = [Replica(k) for k in keys]
+        self.sticky_seconds = sticky_seconds
+        self.check_interval = check_interval
+        self.max_lag = max_lag
+        self.lock = threading.Lock()
+        self.cycle = itertools.cycle(self.replicas) if self.replicas else None
+
+    def _check(self, replica):
+        engine = self.db.engines[replica.key]
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+                if engine.dialect.name == "postgresql":
+                    lag = conn.execute(text(
+                        "SELECT COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+                    )).scalar()
+                    if lag > self.max_lag:
+                        raise RuntimeError(f"retraso de replicación {lag:.0f}s")
+            replica.healthy = True
+        except Exception as e:
+            if replica.healthy:
+                current_app.logger.warning("Réplica %s fuera de servicio: %s", replica.key, e)
+            replica.healthy = False
+        replica.checked_at = time.monotonic()
+
+    def _healthy(self, replica):
+        if time.monotonic() - replica.checked_at > self.check_interval:
+            with self.lock:
+                if time.monotonic() - replica.checked_at > self.check_interval:
+                    self._check(replica)
+        return replica.healthy
+
+    def mark_down(self, key):
+        for replica in self.replicas:
+            if replica.key == key:
+                replica.healthy = False
+                replica.checked_at = time.monotonic()
+
+    def siguiente(self):
+        # Siguiente réplica sana (round robin) o None si no hay ninguna.
+        # Necesita app context: la comprobación usa los engines de Flask.
+        for _ in range(len(self.replicas)):
+            with self.lock:
+                replica = next(self.cycle)
+            if self._healthy(replica):
+                return replica.key
+        return None
+
+    def pick(self):
+        if "replica_key" not in g:
+            # Toda la petición usa la misma réplica (o el primario)
+            g.replica_key = self.siguiente()
+        return g.replica_key
+
+    def engine_for_request(self):
+        if not self.replicas or not g.get("use_replica") or request.method not in ("GET", "HEAD"):
+            return None
+        if time.time() - session.get(SESSION_KEY, 0) < self.sticky_seconds:
+            return None
+        key = self.pick()
+        return self.db.engines[key] if key else None
+
+
+def _marcar_escritura(sess, flush_context):
+    if has_request_context():
+        g.db_write = True
+
+
+def _marcar_dml(orm_execute_state):
+    if has_request_context() and (
+        orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete
+    ):
+        g.db_write = True
+
+
+def read_only(f):
+    @wraps(f)
+    def wrap(*args, **kwargs):
+        g.use_replica = True
+        return f(*args, **kwargs)
+    return wrap
+
+
+def init_replicas(app, db, keys):
+    router = ReplicaRouter(
+        db,
+        keys,
+        sticky_seconds=app.config.get("REPLICA_STICKY_SECONDS", 5),
+        check_interval=app.config.get("REPLICA_CHECK_INTERVAL", 10),
+        max_lag=app.config.get("REPLICA_MAX_LAG_SECONDS", 30)
+    )
+    app.extensions["replicas"] = router
+
+    # Cualquier escritura en la petición (flush o INSERT/UPDATE/DELETE directos)
+    # hace que las lecturas siguientes del usuario vayan al primario
+    if not event.contains(RoutingSession, "after_flush", _marcar_escritura):
+        event.listen(RoutingSession, "after_flush", _marcar_escritura)
+        event.listen(RoutingSession, "do_orm_execute", _marcar_dml)
+
+    @app.after_request
+    def _recordar_escritura(response):
+        if g.get("db_write"):
+            session[SESSION_KEY] = time.time()
+        return response
+
+    with app.app_context():
+        for key in keys:
+            @event.listens_for(db.engines[key], "handle_error")
+            def _replica_caida(context, key=key):
+                if context.is_disconnect or isinstance(context.sqlalchemy_exception, OperationalError):
+                    router.mark_down(key)
+
+    return router
@@ -0,0 +1,61 @@
+from sqlalchemy import BigInteger, cast, func, literal_column, or_
+
+from models import db, JobOffer
+from pagination import encode_cursor, keyset_page, keyset_select
+
+
+# --- Búsqueda de texto completo sobre ofertas ---
+# En PostgreSQL se usa la columna tsvector search_vector (configuración
+# 'spanish', mantenida por trigger) con índice GIN, creados en
+# migrations/0010_busqueda.py. En otros motores (SQLite en pruebas) se cae a LIKE.
+
+SEARCH_CONFIG = "spanish"
+RANGO_ESCALA = 1_000_000
+
+
+def is_postgres():
+    return db.engine.dialect.name == "postgresql"
+
+
+def _contiene(texto):
+    # % y _ del usuario son literales, no comodines de LIKE
+    escapado = texto.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escapado}%"
+
+
+def search_offers(texto, ubicacion=None, salario_min=None, salario_max=None, limit=20, cursor=None):
+    # Devuelve (ofertas, next_cursor); paginación por cursor como /proyectow
+    query = JobOffer.query.filter(JobOffer.status == "open")
+
+    if ubicacion:
+        query = query.filter(JobOffer.location.ilike(_contiene(ubicacion), escape="\\"))
+    if salario_min is not None:
+        query = query.filter(JobOffer.salary >= salario_min)
+    if salario_max is not None:
+        query = query.filter(JobOffer.salary <= salario_max)
+
+    texto = (texto or "").strip()
+    if texto and is_postgres():
+        # Por relevancia: el cursor lleva (rango, id) en lugar de (fecha, id).
+        # El rango (real) se escala a entero: el cursor no depende de la
+        # representación del float y los empates se deshacen por id.
+        vector = literal_column("job_offers.search_vector")
+        tsquery = func.websearch_to_tsquery(literal_column(f"'{SEARCH_CONFIG}'"), texto)
+        rango = cast(func.ts_rank_cd(vector, tsquery) * RANGO_ESCALA, BigInteger)
+        query = query.filter(vector.op("@@")(tsquery)).add_columns(rango.label("rango"))
+        filas = keyset_select(query, rango, JobOffer.offer_id, cursor, limit, tipo=int).all()
+        next_cursor = None
+        if len(filas) > limit:
+            filas = filas[:limit]
+            next_cursor = encode_cursor(filas[-1].rango, filas[-1][0].offer_id)
+        return [oferta for oferta, _ in filas], next_cursor
+
+    # Fallback: cada término debe aparecer en título, descripción o ubicación
+    for termino in texto.split():
+        patron = _contiene(termino)
+        query = query.filter(or_(
+            JobOffer.title.ilike(patron, escape="\\"),
+            JobOffer.description.ilike(patron, escape="\\"),
+            JobOffer.location.ilike(patron, escape="\\")
+        ))
+    return keyset_page(query, JobOffer.publish_date, JobOffer.offer_id, cursor, limit)
@@ -0,0 +1,302 @@
+import random
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import func, insert, select, text
+
+from models import db, User, Employee, Boss, JobOffer, Application, ESTADOS_POSTULACION
+
+
+# --- Datos sintéticos (flask seed) ---
+# Genera usuarios, perfiles, ofertas y postulaciones a escala de producción.
+# Cada tabla sale de un generador (memoria constante) y se carga con COPY en
+# PostgreSQL o con INSERT por lotes en otros motores. Con la misma semilla
+# y la misma base de partida el resultado es idéntico.
+#
+# Los ids se asignan aquí (a partir del máximo existente) para enlazar los
+# perfiles y las postulaciones sin leerlos de vuelta; al terminar se ajustan
+# las secuencias de PostgreSQL. Las postulaciones de cada worker son ofertas
+# distintas (uix_employee_offer), sus estados son los del CHECK
+# applications_status_check y cada oferta tiene como mucho una aceptada (o
+# completada), como al aceptar desde la aplicación. Todas las tablas con
+# updated_at lo reciben (firmas de ETag, sincronización del índice de
+# afinidad).
+
+SeedResult = namedtuple("SeedResult", "tabla filas segundos")
+
+PESOS_POSTULACION = (70, 10, 15, 5)
+
+NOMBRES = [
+    "Ana", "Luis", "María", "Carlos", "Lucía", "Jorge", "Sofía", "Diego", "Valeria", "Andrés",
+    "Camila", "Miguel", "Daniela", "José", "Paula", "Javier", "Elena", "Raúl", "Carmen", "Pablo",
+]
+APELLIDOS = [
+    "García", "Rodríguez", "López", "Martínez", "Sánchez", "Pérez", "Gómez", "Fernández", "Díaz",
+    "Torres", "Ramírez", "Flores", "Rivera", "Vargas", "Castro", "Romero", "Herrera", "Medina",
+]
+HABILIDADES = [
+    "python", "django", "flask", "sql", "postgresql", "javascript", "react", "vue", "node",
+    "diseño ux", "figma", "android", "ios", "kotlin", "swift", "devops", "docker", "aws",
+    "redacción", "traducción", "marketing", "seo", "excel", "contabilidad", "fotografía",
+]
+TIPOS_PROYECTO = [
+    "Tienda online", "App móvil", "Landing page", "API REST", "Panel de administración",
+    "Migración de base de datos", "Rediseño de marca", "Campaña SEO", "Traducción de manual",
+    "Integración de pagos", "Dashboard de ventas", "Automatización de informes",
+]
+UBICACIONES = ["Remoto", "Madrid", "Barcelona", "Lima", "Bogotá", "CDMX", "Buenos Aires", "Santiago"]
+CARGOS = ["CEO", "CTO", "Product Manager", "Responsable de RR. HH.", "Fundador"]
+
+
+def _rnd(semilla, tabla):
+    # Un generador por tabla: cambiar el volumen de una no altera las demás
+    return random.Random(f"{semilla}:{tabla}")
+
+
+def _nombre(rnd):
+    return f"{rnd.choice(NOMBRES)} {rnd.choice(APELLIDOS)} {rnd.choice(APELLIDOS)}"
+
+
+def generar_usuarios(semilla, primer_id, n_bosses, n_workers, password_hash, ahora):
+    rnd = _rnd(semilla, "users")
+    for i in range(n_bosses + n_workers):
+        user_id = primer_id + i
+        yield (
+            user_id,
+            _nombre(rnd),
+            f"seed{user_id}@example.com",
+            password_hash,
+            "boss" if i < n_bosses else "employee",
+            ahora - timedelta(minutes=rnd.randrange(3 * 365 * 24 * 60)),
+        )
+
+
+def generar_bosses(semilla, primer_id, primer_user_id, n, ahora):
+    rnd = _rnd(semilla, "bosses")
+    for i in range(n):
+        yield (
+            primer_id + i,
+            primer_user_id + i,
+            _nombre(rnd),
+            rnd.choice(CARGOS),
+            f"6{rnd.randrange(10 ** 8):08d}",
+            f"{rnd.choice(APELLIDOS)} {rnd.choice(['S.L.', 'S.A.', 'y Asociados', 'Studio'])}",
+            ahora,
+        )
+
+
+def generar_workers(semilla, primer_id, primer_user_id, n, ahora):
+    rnd = _rnd(semilla, "employees")
+    for i in range(n):
+        yield (
+            primer_id + i,
+            primer_user_id + i,
+            _nombre(rnd),
+            ", ".join(rnd.sample(HABILIDADES, rnd.randint(2, 6))),
+            f"{rnd.randint(1, 15)} años de experiencia en proyectos freelance.",
+            "",
+            ahora,
+        )
+
+
+def generar_ofertas(semilla, primer_id, boss_ids, n, cerradas, ahora):
+    rnd = _rnd(semilla, "job_offers")
+    for i in range(n):
+        fecha = ahora - timedelta(minutes=rnd.randrange(365 * 24 * 60))
+        tipo = rnd.choice(TIPOS_PROYECTO)
+        yield (
+            primer_id + i,
+            rnd.randrange(boss_ids[0], boss_ids[1]),
+            f"{tipo} #{primer_id + i}",
+            f"{tipo} para cliente del sector {rnd.choice(['retail', 'salud', 'educación', 'finanzas'])}. "
+            f"Se valora experiencia en {', '.join(rnd.sample(HABILIDADES, 3))}.",
+            Decimal(rnd.randint(100, 20000)),
+            rnd.choice(UBICACIONES),
+            fecha,
+            "closed" if cerradas[i] else "open",
+            fecha,
+        )
+
+
+def generar_postulaciones(semilla, primer_id, employee_ids, offer_ids, n, cerradas, ahora):
+    # Reparto exacto de n entre los workers; cada uno se postula a ofertas
+    # distintas (sample sin reemplazo), así no hace falta recordar los pares.
+    rnd = _rnd(semilla, "applications")
+    n_workers = employee_ids[1] - employee_ids[0]
+    n_ofertas = offer_ids[1] - offer_ids[0]
+    base, resto = divmod(n, n_workers)
+    # Ofertas que ya tienen su postulación aceptada o completada (1 byte por oferta)
+    asignadas = bytearray(n_ofertas)
+    application_id = primer_id
+    for w in range(n_workers):
+        k = min(base + (1 if w < resto else 0), n_ofertas)
+        for o in rnd.sample(range(n_ofertas), k):
+            # Sólo las ofertas cerradas tienen postulaciones aceptadas o
+            # completadas, y como mucho una; las demás quedan rechazadas
+            if cerradas[o]:
+                estado = rnd.choices(ESTADOS_POSTULACION, PESOS_POSTULACION)[0]
+                if estado in ("accepted", "completed"):
+                    if asignadas[o]:
+                        estado = "rejected"
+                    asignadas[o] = 1
+            else:
+                estado = rnd.choice(("pending", "pending", "rejected"))
+            fecha = ahora - timedelta(minutes=rnd.randrange(180 * 24 * 60))
+            yield (application_id, employee_ids[0] + w, offer_ids[0] + o, fecha, estado, fecha)
+            application_id += 1
+
+
+# --- Carga ---
+
+def _copy_valor(valor):
+    if valor is None:
+        return "\\N"
+    if isinstance(valor, datetime):
+        return valor.isoformat(sep=" ")
+    return (
+        str(valor).replace("\\", "\\\\").replace("\t", "\\t")
+        .replace("\n", "\\n").replace("\r", "\\r")
+    )
+
+
+def _copy(conexion, tabla, columnas, filas, lote):
+    dbapi = conexion.connection.dbapi_connection
+    sql = f"COPY {tabla} ({', '.join(columnas)}) FROM STDIN"
+    cursor = dbapi.cursor()
+    total = 0
+
+    def lineas():
+        nonlocal total
+        buffer = []
+        for fila in filas:
+            buffer.append("\t".join(_copy_valor(v) for v in fila) + "\n")
+            total += 1
+            if len(buffer) >= lote:
+                yield "".join(buffer)
+                buffer = []
+        if buffer:
+            yield "".join(buffer)
+
+    if hasattr(cursor, "copy_expert"):  # psycopg2
+        cursor.copy_expert(sql, _LectorIterable(lineas()))
+    else:  # psycopg 3
+        with cursor.copy(sql) as copy:
+            for bloque in lineas():
+                copy.write(bloque)
+    cursor.close()
+    return total
+
+
+class _LectorIterable:
+    # copy_expert lee de un objeto tipo fichero
+    def __init__(self, bloques):
+        self.bloques = bloques
+        self.pendiente = ""
+
+    def read(self, size=-1):
+        partes = [self.pendiente]
+        largo = len(self.pendiente)
+        while size < 0 or largo < size:
+            bloque = next(self.bloques, None)
+            if bloque is None:
+                break
+            partes.append(bloque)
+            largo += len(bloque)
+        datos = "".join(partes)
+        if size < 0:
+            self.pendiente = ""
+            return datos
+        self.pendiente = datos[size:]
+        return datos[:size]
+
+
+def _insertar(conexion, tabla, columnas, filas, lote):
+    stmt = insert(tabla)
+    total = 0
+    buffer = []
+    for fila in filas:
+        buffer.append(dict(zip(columnas, fila)))
+        if len(buffer) >= lote:
+            conexion.execute(stmt, buffer)
+            total += len(buffer)
+            buffer = []
+    if buffer:
+        conexion.execute(stmt, buffer)
+        total += len(buffer)
+    return total
+
+
+def _siguiente_id(columna):
+    return (db.session.scalar(select(func.max(columna))) or 0) + 1
+
+
+def seed_database(bosses, workers, ofertas, postulaciones, password_hash, semilla=42,
+                  lote=10000, log=print):
+    ahora = datetime.now().replace(microsecond=0)
+    postgres = db.engine.dialect.name == "postgresql"
+
+    primer_user = _siguiente_id(User.user_id)
+    primer_boss = _siguiente_id(Boss.boss_id)
+    primer_worker = _siguiente_id(Employee.employee_id)
+    primer_oferta = _siguiente_id(JobOffer.offer_id)
+    primer_postulacion = _siguiente_id(Application.application_id)
+    db.session.rollback()
+
+    # Qué ofertas están cerradas: 1 byte por oferta, lo comparten los
+    # generadores de ofertas y de postulaciones
+    rnd = _rnd(semilla, "estados")
+    cerradas = bytearray(rnd.random() < 0.3 for _ in range(ofertas))
+
+    boss_ids = (primer_boss, primer_boss + bosses)
+    employee_ids = (primer_worker, primer_worker + workers)
+    offer_ids = (primer_oferta, primer_oferta + ofertas)
+
+    cargas = [
+        (User.__table__, ["user_id", "name", "email", "password_hash", "user_type", "registration_date"],
+         generar_usuarios(semilla, primer_user, bosses, workers, password_hash, ahora)),
+        (Boss.__table__, ["boss_id", "user_id", "name", "contact", "phone", "address", "updated_at"],
+         generar_bosses(semilla, primer_boss, primer_user, bosses, ahora)),
+        (Employee.__table__, ["employee_id", "user_id", "name", "skills", "experience", "resume", "updated_at"],
+         generar_workers(semilla, primer_worker, primer_user + bosses, workers, ahora)),
+    ]
+    if ofertas and bosses:
+        cargas.append((
+            JobOffer.__table__,
+            ["offer_id", "boss_id", "title", "description", "salary", "location", "publish_date",
+             "status", "updated_at"],
+            generar_ofertas(semilla, primer_oferta, boss_ids, ofertas, cerradas, ahora),
+        ))
+        if postulaciones and workers:
+            cargas.append((
+                Application.__table__,
+                ["application_id", "employee_id", "offer_id", "application_date", "status", "updated_at"],
+                generar_postulaciones(
+                    semilla, primer_postulacion, employee_ids, offer_ids, postulaciones, cerradas, ahora
+                ),
+            ))
+
+    resultados = []
+    with db.engine.begin() as conexion:
+        if postgres:
+            # Una carga de millones de filas supera el statement_timeout de la app
+            conexion.exec_driver_sql("SET LOCAL statement_timeout = 0")
+        for tabla, columnas, filas in cargas:
+            inicio = time.perf_counter()
+            if postgres:
+                total = _copy(conexion, tabla.name, columnas, filas, lote)
+            else:
+                total = _insertar(conexion, tabla, columnas, filas, lote)
+            segundos = time.perf_counter() - inicio
+            resultados.append(SeedResult(tabla.name, total, segundos))
+            log(f"{tabla.name}: {total} filas en {segundos:.1f}s ({total / segundos if segundos else 0:.0f} filas/s)")
+
+        if postgres:
+            for tabla, columnas, _ in cargas:
+                conexion.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{tabla.name}', '{columnas[0]}'), "
+                    f"(SELECT coalesce(max({columnas[0]}), 1) FROM {tabla.name}))"
+                ))
+                conexion.exec_driver_sql(f"ANALYZE {tabla.name}")
+    return resultados
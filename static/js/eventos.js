@@ -0,0 +1,42 @@
+// Avisos en tiempo real (Server-Sent Events): cuando cambia una postulación
+// del usuario se muestra un aviso con la opción de actualizar la página.
+(function () {
+    const script = document.currentScript;
+    if (!window.EventSource || !script) return;
+
+    const mensajes = {
+        pending: (d) => `Nueva postulación en «${d.oferta}».`,
+        accepted: (d) => `¡Te han aceptado en «${d.oferta}»!`,
+        rejected: (d) => `Tu postulación a «${d.oferta}» no ha sido seleccionada.`,
+        completed: (d) => `Trabajo completado: «${d.oferta}».`
+    };
+
+    let aviso = null;
+
+    function mostrar(texto) {
+        if (!aviso) {
+            aviso = document.createElement('div');
+            aviso.className = 'live-toast';
+            aviso.setAttribute('role', 'status');
+            aviso.innerHTML = '<span></span><button type="button">Actualizar</button>';
+            aviso.querySelector('button').addEventListener('click', () => location.reload());
+            document.body.appendChild(aviso);
+        }
+        aviso.querySelector('span').textContent = texto;
+    }
+
+    const fuente = new EventSource(script.dataset.url);
+    let conectado = false;
+
+    fuente.addEventListener('postulacion', (e) => {
+        const datos = JSON.parse(e.data);
+        const mensaje = mensajes[datos.estado];
+        if (mensaje) mostrar(mensaje(datos));
+    });
+
+    // Durante un corte se pierden eventos: al reconectar se avisa por si acaso
+    fuente.addEventListener('open', () => {
+        if (conectado) mostrar('Puede haber novedades.');
+        conectado = true;
+    });
+})();
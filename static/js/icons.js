@@ -0,0 +1 @@
+lucide.createIcons();
@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import delete, func, select, update
+
+from application_actions import rechazar_pendientes
+from events import publicar
+from jobs import tarea
+from models import db, JobOffer, Application, Job
+
+
+# --- Tareas en segundo plano (jobs.py) ---
+# Todas son idempotentes: un reintento o una ejecución repetida deja el mismo
+# resultado. Las que recorren muchas filas lo hacen por lotes de LOTE con un
+# commit por lote, para no mantener bloqueos ni pasar de statement_timeout.
+
+LOTE = 1000
+
+
+@tarea("notificar_postulantes")
+def notificar_postulantes(oferta, estado, postulaciones):
+    # postulaciones: [[application_id, employee_id], ...]
+    for app_id, employee_id in postulaciones:
+        publicar(db.session, "worker", employee_id, "postulacion", postulacion=app_id, oferta=oferta, estado=estado)
+
+
+@tarea("rechazar_pendientes")
+def rechazar_pendientes_tarea(offer_id):
+    # Sólo para las tareas encoladas antes de que el rechazo pasara a hacerse
+    # en la transacción que acepta o cierra la oferta
+    rechazar_pendientes([offer_id])
+
+
+@tarea("expirar_ofertas", periodo="JOBS_PERIODO_EXPIRAR")
+def expirar_ofertas():
+    dias = current_app.config["OFERTAS_EXPIRAN_DIAS"]
+    if not dias:
+        return
+    limite = datetime.utcnow() - timedelta(days=dias)
+    cerradas = 0
+    while True:
+        ids = db.session.scalars(
+            update(JobOffer)
+            .where(JobOffer.offer_id.in_(
+                select(JobOffer.offer_id)
+                .where(JobOffer.status == "open", JobOffer.publish_date < limite)
+                .limit(LOTE)
+            ))
+            .values(status="closed")
+            .returning(JobOffer.offer_id),
+            execution_options={"synchronize_session": False}
+        ).all()
+        rechazar_pendientes(ids)
+        db.session.commit()
+        cerradas += len(ids)
+        if len(ids) < LOTE:
+            break
+    if cerradas:
+        current_app.extensions["cache"].invalidate("proyectos")
+        current_app.logger.info("Ofertas expiradas: %d (más de %d días abiertas)", cerradas, dias)
+
+
+def _contar_postulaciones():
+    return (
+        select(func.count(Application.application_id))
+        .where(Application.offer_id == JobOffer.offer_id)
+        .scalar_subquery()
+    )
+
+
+def _actualizar_contadores(*condiciones):
+    real = _contar_postulaciones()
+    db.session.execute(
+        update(JobOffer)
+        .where(*condiciones, JobOffer.applications_count != real)
+        # updated_at no cambia (índice de afinidad); applications_updated_at
+        # sí, para que el boss vea el contador corregido
+        .values(applications_count=real, applications_updated_at=datetime.utcnow(), updated_at=JobOffer.updated_at),
+        execution_options={"synchronize_session": False}
+    )
+
+
+@tarea("recalcular_contadores", periodo="JOBS_PERIODO_CONTADORES")
+def recalcular_contadores(offer_id=None):
+    # Reparación de desvíos (escrituras fuera de la aplicación, datos
+    # anteriores a la migración 0007): las vistas ya mantienen el contador
+    if offer_id is not None:
+        _actualizar_contadores(JobOffer.offer_id == offer_id)
+        return
+    # Todas las ofertas, por rangos de id
+    ultimo = db.session.scalar(select(func.max(JobOffer.offer_id))) or 0
+    for desde in range(0, ultimo + 1, LOTE):
+        _actualizar_contadores(JobOffer.offer_id >= desde, JobOffer.offer_id < desde + LOTE)
+        db.session.commit()
+
+
+@tarea("limpiar", periodo="JOBS_PERIODO_LIMPIEZA")
+def limpiar():
+    config = current_app.config
+
+    # Tareas terminadas: sólo sirven para consultar el historial reciente
+    limite = datetime.utcnow() - timedelta(hours=config["JOBS_RETENCION_HORAS"])
+    while True:
+        borradas = db.session.execute(
+            delete(Job).where(Job.job_id.in_(
+                select(Job.job_id).where(Job.status == "done", Job.finished_at < limite).limit(LOTE)
+            )),
+            execution_options={"synchronize_session": False}
+        ).rowcount
+        db.session.commit()
+        if borradas < LOTE:
+            break
+
+    # Las postulaciones rechazadas no se borran: son las que impiden volver a
+    # postularse a la misma oferta
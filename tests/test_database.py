@@ -0,0 +1,22 @@
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from database import TimedAsyncQueuePool, async_database_url, engine_options
+
+CONFIG = {
+    "DB_POOL_SIZE": 5,
+    "DB_MAX_OVERFLOW": 10,
+    "DB_POOL_TIMEOUT": 30,
+    "DB_POOL_RECYCLE": 1800,
+    "DB_POOL_PRE_PING": True,
+    "DB_PGBOUNCER": True,
+}
+
+
+def test_engine_async_postgres_sin_conectar():
+    # create_async_engine rechaza pools síncronos al construir el engine
+    for uri in ("postgresql+psycopg2://u:p@localhost/db", "postgresql://u:p@localhost/db"):
+        engine = create_async_engine(async_database_url(uri), **engine_options(uri, CONFIG, use_async=True))
+        assert engine.dialect.name == "postgresql"
+        assert engine.url.drivername == "postgresql+asyncpg"
+        assert isinstance(engine.pool, TimedAsyncQueuePool)
+        assert engine.pool.size() == CONFIG["DB_POOL_SIZE"]
@@ -0,0 +1,26 @@
+import base64
+from datetime import datetime
+
+from pagination import decode_cursor, encode_cursor
+
+
+def _crudo(texto):
+    return base64.urlsafe_b64encode(texto.encode()).decode().rstrip("=")
+
+
+def test_cursor_ida_y_vuelta_por_tipo():
+    fecha = datetime(2024, 5, 1, 12, 30)
+    assert decode_cursor(encode_cursor(fecha, 7)) == (fecha, 7)
+    assert decode_cursor(encode_cursor(123456, 7), int) == (123456, 7)
+
+
+def test_cursor_de_otro_tipo_es_primera_pagina():
+    assert decode_cursor(encode_cursor(123456, 7)) is None
+    assert decode_cursor(encode_cursor(datetime(2024, 5, 1), 7), int) is None
+
+
+def test_cursor_invalido_es_primera_pagina():
+    for cursor in ("%%%", _crudo("sin-separador"), _crudo("0.5|1"), _crudo("2024-05-01T00:00:00+02:00|1"),
+                   _crudo("2024-05-01|99999999999"), _crudo(f"{2 ** 64}|1"), _crudo("nan|1")):
+        assert decode_cursor(cursor) is None
+        assert decode_cursor(cursor, int) is None